@@ -0,0 +1,194 @@
+import json
+import math
+import random
+import re
+import time
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field, ValidationError
+
+SELECTION_STRATEGIES = ("dgm", "weighted", "uniform")
+TAG_SCHEMA_VERSION = 1
+
+
+class AgentRecord(BaseModel):
+    """Versioned metadata stored as JSON in an archive tag message."""
+    schema_version: int = TAG_SCHEMA_VERSION
+    kind: str = "agent"  # "agent" for agent-archive-* tags, "task" for task-complete-* tags
+    description: str = ""
+    parent: Optional[str] = None
+    score: Optional[float] = None
+    task_scores: Dict[str, float] = Field(default_factory=dict)
+    wall_time_s: float = 0.0
+    tokens: int = 0
+    cost_usd: float = 0.0
+    cpu_s: float = 0.0
+    peak_rss_mb: float = 0.0
+    max_fds: int = 0
+    failure_reason: Optional[str] = None
+    created_at: float = Field(default_factory=time.time)
+
+    def to_message(self) -> str:
+        return json.dumps(self.model_dump(), sort_keys=True)
+
+    @classmethod
+    def from_message(cls, message: Optional[str]) -> "AgentRecord":
+        """Parses a tag message; free-text messages from before the JSON format are read best-effort."""
+        if not isinstance(message, str):
+            return cls()
+        message = message.strip()
+        if message.startswith("{"):
+            try:
+                return cls.model_validate_json(message)
+            except ValidationError:
+                pass
+        # Legacy format: "Agent self-modification: <file>\nParent: <tag> Performance: 0.85"
+        parent = re.search(r"Parent:\s*(\S+)", message)
+        performance = re.search(r"Performance:\s*([-+0-9.eE]+)", message)
+        score = None
+        if performance:
+            try:
+                score = float(performance.group(1))
+            except ValueError:
+                pass
+        description = re.split(r"\s*(?:Parent|Performance):", message)[0].strip()
+        return cls(description=description, parent=parent.group(1) if parent else None, score=score, created_at=0.0)
+
+
+class FenwickTree:
+    """Binary indexed tree over non-negative weights: O(log N) update, prefix sum and sampling."""
+
+    def __init__(self, capacity: int = 16):
+        self._tree = [0.0] * (capacity + 1)
+        self._values = [0.0] * capacity
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def _grow(self, min_capacity: int) -> None:
+        capacity = len(self._values)
+        while capacity < min_capacity:
+            capacity *= 2
+        values = self._values + [0.0] * (capacity - len(self._values))
+        # Linear-time rebuild; amortised O(1) per insertion thanks to doubling.
+        self._tree = [0.0] + values[:]
+        for i in range(1, capacity + 1):
+            parent = i + (i & -i)
+            if parent <= capacity:
+                self._tree[parent] += self._tree[i]
+        self._values = values
+
+    def set(self, index: int, value: float) -> None:
+        if index >= len(self._values):
+            self._grow(index + 1)
+        delta = value - self._values[index]
+        self._values[index] = value
+        i = index + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def get(self, index: int) -> float:
+        return self._values[index]
+
+    def prefix_sum(self, index: int) -> float:
+        """Sum of values[0..index] inclusive."""
+        total = 0.0
+        i = index + 1
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def total(self) -> float:
+        return self.prefix_sum(len(self._values) - 1)
+
+    def find(self, target: float) -> int:
+        """Returns the smallest index whose prefix sum exceeds `target`."""
+        position = 0
+        step = 1 << (len(self._values).bit_length())
+        while step:
+            nxt = position + step
+            if nxt < len(self._tree) and self._tree[nxt] <= target:
+                position = nxt
+                target -= self._tree[nxt]
+            step >>= 1
+        return min(position, len(self._values) - 1)
+
+
+class AgentArchive:
+    """The archive of agent versions as an explicit parent -> child tree with O(log N) selection.
+
+    With the "dgm" strategy each agent is weighted as in the Darwin Gödel Machine paper:
+    sigmoid(lambda * (score - midpoint)) / (1 + number_of_children), so strong agents are
+    favoured while agents that already have many children make way for less explored ones.
+    "weighted" is the previous score + 0.1 weighting and "uniform" ignores scores.
+    """
+
+    def __init__(self, strategy: str = "dgm", sigmoid_lambda: float = 10.0, sigmoid_midpoint: float = 0.5):
+        if strategy not in SELECTION_STRATEGIES:
+            raise ValueError(f"Unknown selection strategy '{strategy}'. Choose from {SELECTION_STRATEGIES}.")
+        self.strategy = strategy
+        self.sigmoid_lambda = sigmoid_lambda
+        self.sigmoid_midpoint = sigmoid_midpoint
+        self._index: Dict[str, int] = {}
+        self._tags: List[str] = []
+        self.scores: Dict[str, float] = {}
+        self.parents: Dict[str, Optional[str]] = {}
+        self.children: Dict[str, List[str]] = {}
+        self._weights = FenwickTree()
+
+    def __contains__(self, tag: str) -> bool:
+        return tag in self._index
+
+    def __len__(self) -> int:
+        return len(self._tags)
+
+    def weight(self, tag: str) -> float:
+        score = self.scores.get(tag, 0.0)
+        if self.strategy == "uniform":
+            return 1.0
+        if self.strategy == "weighted":
+            return score + 0.1
+        sigmoid = 1.0 / (1.0 + math.exp(-self.sigmoid_lambda * (score - self.sigmoid_midpoint)))
+        return sigmoid / (1.0 + len(self.children.get(tag, [])))
+
+    def _refresh(self, tag: str) -> None:
+        if tag in self._index:
+            self._weights.set(self._index[tag], max(self.weight(tag), 0.0))
+
+    def add(self, tag: str, parent: Optional[str] = None, score: float = 0.0) -> None:
+        """Adds an agent version; O(log N) including the parent's weight change."""
+        if tag in self._index:
+            return
+        self._index[tag] = len(self._tags)
+        self._tags.append(tag)
+        self.scores[tag] = score
+        self.parents[tag] = parent
+        self.children.setdefault(tag, [])
+        self._refresh(tag)
+        if parent:
+            self.children.setdefault(parent, []).append(tag)
+            self._refresh(parent)
+
+    def update_score(self, tag: str, score: float) -> None:
+        self.scores[tag] = score
+        self._refresh(tag)
+
+    def lineage(self, tag: str) -> List[str]:
+        """Returns the chain of ancestors from the root down to `tag`."""
+        chain = []
+        while tag is not None and tag not in chain:
+            chain.append(tag)
+            tag = self.parents.get(tag)
+        return chain[::-1]
+
+    def sample(self, rng: Optional[random.Random] = None) -> Optional[str]:
+        """Draws a parent with probability proportional to its weight in O(log N)."""
+        if not self._tags:
+            return None
+        total = self._weights.total()
+        if total <= 0:
+            return (rng or random).choice(self._tags)
+        index = self._weights.find((rng or random).random() * total)
+        return self._tags[min(index, len(self._tags) - 1)]
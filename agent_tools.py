@@ -0,0 +1,95 @@
+import logging
+import os
+import subprocess
+import traceback
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from google.adk.agents.invocation_context import InvocationContext
+
+logger = logging.getLogger(__name__)
+
+# The agents' file, command and code tools. No ADK imports at module level, so the tools
+# (and their tests) load without the agent stack.
+
+
+def _read_file_impl(path: str) -> str:
+    logger.debug("Tool `_read_file_impl`: Reading %s", path)
+    try:
+        with open(path, "r", encoding="utf-8") as f: return f.read()
+    except Exception as e:
+        logger.error("Error reading %s: %s", path, e)
+        return f"Error reading {path}: {e}"
+
+def _write_file_impl(path: str, content: str) -> str:
+    logger.debug("Tool `_write_file_impl`: Writing to %s", path)
+    try:
+        dir_name = os.path.dirname(path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f: f.write(content)
+        return f"Successfully wrote to {path}."
+    except Exception as e:
+        logger.error("Error writing %s: %s", path, e)
+        return f"Error writing {path}: {e}"
+
+def _execute_command_impl(command: str) -> str:
+    logger.info("Executing command: %s", command)
+    try:
+        result = subprocess.run(command, shell=True, capture_output=True, text=True, check=False)
+        if result.returncode != 0:
+            logger.warning("Command '%s' failed with RC %s.\nStdout: %s\nStderr: %s", command, result.returncode, result.stdout, result.stderr)
+        return f"Stdout:\n{result.stdout}\nStderr:\n{result.stderr}\nRC: {result.returncode}"
+    except Exception as e:
+        logger.error("Error executing %s: %s", command, e)
+        return f"Error executing {command}: {e}"
+
+def _unsafe_execute_code_impl(code: str, tool_context: Optional["InvocationContext"] = None) -> str:
+    logger.debug("Tool `_unsafe_execute_code_impl`: Executing complete code block:\n%s", code)
+    # Deferred: the ADK code executors are only needed when code is actually run.
+    from google.adk.code_executors import UnsafeLocalCodeExecutor
+    from google.adk.code_executors.code_execution_utils import CodeExecutionInput, CodeExecutionResult
+    executor = UnsafeLocalCodeExecutor()
+    code_execution_input_obj = CodeExecutionInput(code=code)
+
+    if tool_context is None:
+        return "Error: tool_context (InvocationContext) was not provided to _unsafe_execute_code_impl by the FunctionTool wrapper."
+
+    try:
+        code_execution_result: CodeExecutionResult = executor.execute_code(
+            invocation_context=tool_context,
+            code_execution_input=code_execution_input_obj
+        )
+        
+        output_parts = []
+        if code_execution_result.stdout:
+            output_parts.append(f"Stdout:\n{code_execution_result.stdout}")
+        if code_execution_result.stderr:
+            output_parts.append(f"Stderr:\n{code_execution_result.stderr}")
+        
+        current_exit_code = getattr(code_execution_result, "exit_code", None)
+        if current_exit_code is not None:
+             output_parts.append(f"Exit Code: {current_exit_code}")
+        else:
+             output_parts.append("Exit Code: Unknown (not reported by executor)")
+
+
+        if code_execution_result.output_files:
+            output_parts.append("Output Files:")
+            for f_info in code_execution_result.output_files:
+                f_path = getattr(f_info, 'path', 'Unknown path')
+                f_size = getattr(f_info, 'size_bytes', 'Unknown size')
+                output_parts.append(f"  - Path: {f_path}, Size: {f_size} bytes")
+
+        if not output_parts or (len(output_parts) == 1 and "Exit Code:" in output_parts[0] and not code_execution_result.stdout and not code_execution_result.stderr):
+            exit_code_str = f"Exit Code: {current_exit_code}" if current_exit_code is not None else "Exit Code: Unknown"
+            output = f"Code executed ({exit_code_str}). No textual output (stdout/stderr)."
+        else:
+            output = "\n".join(output_parts)
+            
+        logger.info("Code execution result (first 500 chars): %s...", output[:500])
+        return output.strip()
+
+    except Exception as e:
+        logger.error("Tool `_unsafe_execute_code_impl`: Error executing code: %s\n%s", e, traceback.format_exc())
+        return f"Error executing code: {e}"
@@ -0,0 +1,151 @@
+import json
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# ARC grids use colour indices 0-15, so one hex digit per cell is lossless.
+_HEX_DIGITS = np.array(list("0123456789abcdef"))
+# When more than this fraction of cells changed, a full frame is cheaper than a diff.
+DIFF_FULL_FRAME_RATIO = 0.3
+
+
+class GridFrame:
+    """A single ARC game observation backed by a 2D uint8 NumPy array."""
+
+    __slots__ = ("cells",)
+
+    def __init__(self, cells: np.ndarray):
+        # Validated before the cast, which would silently wrap out-of-range values and truncate floats.
+        cells = np.asarray(cells)
+        if cells.ndim == 3:
+            # ARC-AGI-3 frames may be a stack of layers; the last one is the current view.
+            cells = cells[-1]
+        if cells.ndim != 2:
+            raise ValueError(f"Grid must be 2D (or a stack of 2D layers), got shape {cells.shape}.")
+        if cells.size == 0:
+            raise ValueError(f"Grid must have at least one row and one column, got shape {cells.shape}.")
+        if not np.issubdtype(cells.dtype, np.integer):
+            raise ValueError(f"Grid cell values must be integers, got {cells.dtype}.")
+        if int(cells.min()) < 0 or int(cells.max()) > 15:
+            raise ValueError("Grid cell values must be colour indices in the range 0-15.")
+        self.cells = cells.astype(np.uint8)
+
+    @classmethod
+    def from_json(cls, frame_json: str) -> "GridFrame":
+        """Parses a nested JSON list, or an object with a 'frame' key as returned by the game API."""
+        data = json.loads(frame_json)
+        if isinstance(data, dict):
+            data = data.get("frame", data.get("grid"))
+        return cls(np.array(data))
+
+    @classmethod
+    def from_text(cls, text: str) -> "GridFrame":
+        """Parses the compact text encoding produced by `to_text`."""
+        rows = [line.strip() for line in text.strip().splitlines() if line.strip()]
+        return cls(np.array([[int(ch, 16) for ch in row] for row in rows]))
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.cells.shape
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, GridFrame) and np.array_equal(self.cells, other.cells)
+
+    def to_text(self) -> str:
+        """One hex digit per cell, one line per row."""
+        return "\n".join("".join(row) for row in _HEX_DIGITS[self.cells])
+
+    def to_rle(self) -> str:
+        """Run-length encodes each row as `<count>x<colour>` runs, collapsing repeated rows."""
+        lines: List[str] = []
+        previous_row: Optional[str] = None
+        repeat = 0
+        for row in self.cells:
+            boundaries = np.flatnonzero(np.diff(row)) + 1
+            starts = np.concatenate(([0], boundaries))
+            lengths = np.diff(np.concatenate((starts, [row.size])))
+            encoded = " ".join(f"{n}x{_HEX_DIGITS[row[s]]}" for s, n in zip(starts, lengths))
+            if encoded == previous_row:
+                repeat += 1
+                continue
+            if repeat:
+                lines.append(f"(same x{repeat})")
+                repeat = 0
+            lines.append(encoded)
+            previous_row = encoded
+        if repeat:
+            lines.append(f"(same x{repeat})")
+        return "\n".join(lines)
+
+    def diff(self, previous: "GridFrame") -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Returns (coords, old values, new values) for every changed cell, vectorized."""
+        if previous.shape != self.shape:
+            raise ValueError(f"Cannot diff frames of different shapes {previous.shape} and {self.shape}.")
+        coords = np.argwhere(previous.cells != self.cells)
+        rows, cols = coords[:, 0], coords[:, 1]
+        return coords, previous.cells[rows, cols], self.cells[rows, cols]
+
+
+def format_frame(frame: GridFrame) -> str:
+    """Formats a full frame using whichever of the text or RLE encodings is shorter."""
+    height, width = frame.shape
+    text = frame.to_text()
+    rle = frame.to_rle()
+    if len(rle) < len(text):
+        return f"FRAME {height}x{width} (rle, runs of <count>x<colour>):\n{rle}"
+    return f"FRAME {height}x{width} (hex colour per cell):\n{text}"
+
+
+def format_diff(previous: Optional[GridFrame], current: GridFrame,
+                full_frame_ratio: float = DIFF_FULL_FRAME_RATIO) -> str:
+    """Formats only the cells that changed since `previous`.
+
+    Changes are grouped per row as `r<row>: c<col>:<old>-><new> ...`. Falls back to a
+    full frame when there is no comparable previous frame or most of the board changed.
+    """
+    if previous is None or previous.shape != current.shape:
+        return format_frame(current)
+    coords, old_values, new_values = current.diff(previous)
+    if len(coords) == 0:
+        return "NO CHANGE"
+    if len(coords) > full_frame_ratio * current.cells.size:
+        return format_frame(current)
+    lines = [f"DIFF {len(coords)} cells changed (c<col>:<old>-><new>):"]
+    row_breaks = np.flatnonzero(np.diff(coords[:, 0])) + 1
+    for group in np.split(np.arange(len(coords)), row_breaks):
+        row = coords[group[0], 0]
+        changes = " ".join(
+            f"c{coords[i, 1]}:{_HEX_DIGITS[old_values[i]]}->{_HEX_DIGITS[new_values[i]]}" for i in group
+        )
+        lines.append(f"r{row}: {changes}")
+    return "\n".join(lines)
+
+
+# Last frame seen per observation stream, so the Executor only ever receives changes.
+_last_frames: Dict[str, GridFrame] = {}
+
+
+def _grid_observe_impl(frame_json: str, stream: str = "default") -> str:
+    """Records a game frame (JSON grid) and returns only what changed since the previous frame on `stream`."""
+    try:
+        frame = GridFrame.from_json(frame_json)
+    except (ValueError, TypeError, IndexError, OverflowError, json.JSONDecodeError) as e:
+        logger.error("Tool `_grid_observe_impl`: Invalid frame: %s", e)
+        return f"Error parsing frame: {e}"
+    output = format_diff(_last_frames.get(stream), frame)
+    _last_frames[stream] = frame
+    return output
+
+
+def _grid_diff_impl(previous_json: str, current_json: str) -> str:
+    """Returns the changed cells between two JSON grids."""
+    try:
+        previous = GridFrame.from_json(previous_json)
+        current = GridFrame.from_json(current_json)
+    except (ValueError, TypeError, IndexError, OverflowError, json.JSONDecodeError) as e:
+        logger.error("Tool `_grid_diff_impl`: Invalid frame: %s", e)
+        return f"Error parsing frame: {e}"
+    return format_diff(previous, current)
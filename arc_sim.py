@@ -0,0 +1,258 @@
+import argparse
+import importlib
+import json
+import logging
+import os
+import random
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+OFFLINE_EVAL_EPISODES = int(os.getenv("OFFLINE_EVAL_EPISODES", 0))
+OFFLINE_EVAL_WORKERS = int(os.getenv("OFFLINE_EVAL_WORKERS", os.cpu_count() or 1))
+OFFLINE_EVAL_POLICY = os.getenv("OFFLINE_EVAL_POLICY", "system_agents:arc_policy")
+OFFLINE_EVAL_MAX_ACTIONS = int(os.getenv("OFFLINE_EVAL_MAX_ACTIONS", 200))
+
+FLOOR, PLAYER, GOAL, WALL = 0, 3, 4, 5
+# ARC-AGI-3 action names. ACTION1-4 move, ACTION5 interacts (a no-op here),
+# ACTION6 is a coordinate click (also a no-op here) and RESET restarts the level.
+MOVES = {"ACTION1": (-1, 0), "ACTION2": (1, 0), "ACTION3": (0, -1), "ACTION4": (0, 1)}
+ACTIONS = ["RESET", "ACTION1", "ACTION2", "ACTION3", "ACTION4", "ACTION5", "ACTION6"]
+
+NOT_FINISHED, WIN, GAME_OVER = "NOT_FINISHED", "WIN", "GAME_OVER"
+
+
+def _shortest_path(walls: np.ndarray, start: Tuple[int, int], goal: Tuple[int, int]) -> Optional[List[str]]:
+    """BFS over open cells; returns the list of move actions from start to goal."""
+    height, width = walls.shape
+    previous: Dict[Tuple[int, int], Tuple[Tuple[int, int], str]] = {start: (start, "")}
+    frontier = deque([start])
+    while frontier:
+        cell = frontier.popleft()
+        if cell == goal:
+            path = []
+            while cell != start:
+                cell, action = previous[cell][0], previous[cell][1]
+                path.append(action)
+            return path[::-1]
+        for action, (dr, dc) in MOVES.items():
+            nr, nc = cell[0] + dr, cell[1] + dc
+            if 0 <= nr < height and 0 <= nc < width and not walls[nr, nc] and (nr, nc) not in previous:
+                previous[(nr, nc)] = (cell, action)
+                frontier.append((nr, nc))
+    return None
+
+
+class GridWorldGame:
+    """A deterministic grid game with the ARC-AGI-3 action/observation interface.
+
+    Each level is a maze: move the player (colour 3) onto the goal (colour 4) without
+    walking through walls (colour 5). Clearing a level scores a point; clearing all
+    levels is a WIN, running out of actions is GAME_OVER.
+    """
+
+    def __init__(self, seed: int = 0, size: int = 8, levels: int = 3,
+                 wall_density: float = 0.2, max_actions: int = OFFLINE_EVAL_MAX_ACTIONS):
+        self.seed = seed
+        self.size = size
+        self.levels = levels
+        self.wall_density = wall_density
+        self.max_actions = max_actions
+        self._rng = random.Random(seed)
+        self._layouts = [self._generate_level() for _ in range(levels)]
+        self.reset_game()
+
+    def _generate_level(self) -> Tuple[np.ndarray, Tuple[int, int], Tuple[int, int]]:
+        """Generates a solvable maze level."""
+        while True:
+            walls = np.array([[self._rng.random() < self.wall_density for _ in range(self.size)] for _ in range(self.size)])
+            open_cells = [(r, c) for r in range(self.size) for c in range(self.size) if not walls[r, c]]
+            if len(open_cells) < 2:
+                continue
+            start, goal = self._rng.sample(open_cells, 2)
+            if _shortest_path(walls, start, goal):
+                return walls, start, goal
+
+    @classmethod
+    def from_grid(cls, cells: Any, player_color: int = PLAYER, goal_color: int = GOAL,
+                  wall_colors: Tuple[int, ...] = (WALL,), max_actions: int = OFFLINE_EVAL_MAX_ACTIONS) -> "GridWorldGame":
+        """Builds a single-level game modelling an observed frame, e.g. to plan moves with search."""
+        cells = np.asarray(cells)
+        if cells.ndim == 3:
+            cells = cells[-1]
+        players = np.argwhere(cells == player_color)
+        goals = np.argwhere(cells == goal_color)
+        if not len(players) or not len(goals):
+            raise ValueError(f"Frame must contain a player (colour {player_color}) and a goal (colour {goal_color}).")
+        game = object.__new__(cls)
+        game.seed = None
+        game.size = max(cells.shape)
+        game.levels = 1
+        game.wall_density = None
+        game.max_actions = max_actions
+        game._rng = None
+        game._layouts = [(np.isin(cells, wall_colors), tuple(int(v) for v in players[0]), tuple(int(v) for v in goals[0]))]
+        game.reset_game()
+        return game
+
+    def reset_game(self) -> None:
+        self.level = 0
+        self.score = 0
+        self.action_counter = 0
+        self.state = NOT_FINISHED
+        self._load_level()
+
+    def _load_level(self) -> None:
+        walls, start, goal = self._layouts[self.level]
+        self.walls = walls
+        self.player = start
+        self.goal = goal
+
+    def clone(self) -> "GridWorldGame":
+        """Returns an independent copy sharing the (immutable) level layouts."""
+        copy = object.__new__(GridWorldGame)
+        copy.__dict__.update(self.__dict__)
+        copy._rng = None
+        return copy
+
+    def state_key(self) -> Tuple[int, int, int]:
+        """A hashable key identifying the game state (action counter excluded)."""
+        return (self.level, self.player[0], self.player[1])
+
+    @property
+    def available_actions(self) -> List[str]:
+        return list(MOVES.keys())
+
+    def grid(self) -> np.ndarray:
+        cells = np.where(self.walls, WALL, FLOOR).astype(np.uint8)
+        cells[self.goal] = GOAL
+        cells[self.player] = PLAYER
+        return cells
+
+    def observation(self) -> Dict[str, Any]:
+        return {
+            "game_id": f"gridworld-{self.seed}",
+            "frame": [self.grid().tolist()],
+            "state": self.state,
+            "score": self.score,
+            "win_score": self.levels,
+            "action_counter": self.action_counter,
+            "available_actions": ACTIONS,
+        }
+
+    def step(self, action: str) -> Dict[str, Any]:
+        """Applies an action and returns the new observation."""
+        self.apply_action(action)
+        return self.observation()
+
+    def apply_action(self, action: str) -> None:
+        """Applies an action without building an observation (cheap enough for search)."""
+        if self.state != NOT_FINISHED:
+            return
+        self.action_counter += 1
+        if action == "RESET":
+            self._load_level()
+        elif action in MOVES:
+            dr, dc = MOVES[action]
+            nr, nc = self.player[0] + dr, self.player[1] + dc
+            height, width = self.walls.shape
+            if 0 <= nr < height and 0 <= nc < width and not self.walls[nr, nc]:
+                self.player = (nr, nc)
+            if self.player == self.goal:
+                self.score += 1
+                self.level += 1
+                if self.level == self.levels:
+                    self.state = WIN
+                    return
+                self._load_level()
+        if self.state == NOT_FINISHED and self.action_counter >= self.max_actions:
+            self.state = GAME_OVER
+
+
+def random_policy(observation: Dict[str, Any], rng: random.Random) -> str:
+    """Baseline that moves uniformly at random."""
+    return rng.choice(list(MOVES.keys()))
+
+
+def greedy_policy(observation: Dict[str, Any], rng: random.Random) -> str:
+    """Baseline that walks the shortest path to the goal read off the frame."""
+    cells = np.array(observation["frame"][-1])
+    player = tuple(int(v) for v in np.argwhere(cells == PLAYER)[0])
+    goal = tuple(int(v) for v in np.argwhere(cells == GOAL)[0])
+    path = _shortest_path(cells == WALL, player, goal)
+    return path[0] if path else random_policy(observation, rng)
+
+
+def load_policy(policy_spec: str) -> Callable[[Dict[str, Any], random.Random], str]:
+    """Resolves a 'module:function' policy spec."""
+    module_name, _, func_name = policy_spec.partition(":")
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+def run_episode(policy_spec: str, seed: int, max_actions: int = OFFLINE_EVAL_MAX_ACTIONS,
+                size: int = 8, levels: int = 3) -> Dict[str, Any]:
+    """Plays one episode; the score is the fraction of levels cleared."""
+    policy = load_policy(policy_spec)
+    game = GridWorldGame(seed=seed, size=size, levels=levels, max_actions=max_actions)
+    rng = random.Random(seed)
+    observation = game.observation()
+    start_time = time.perf_counter()
+    error = None
+    while observation["state"] == NOT_FINISHED:
+        try:
+            action = policy(observation, rng)
+        except Exception as e:
+            error = f"Policy raised: {e}"
+            break
+        observation = game.step(action)
+    return {
+        "seed": seed,
+        "score": game.score / levels,
+        "levels_completed": game.score,
+        "actions": game.action_counter,
+        "state": observation["state"],
+        "wall_time_s": time.perf_counter() - start_time,
+        "error": error,
+    }
+
+
+def run_batch(policy_spec: str, seeds: List[int], workers: int = OFFLINE_EVAL_WORKERS,
+              max_actions: int = OFFLINE_EVAL_MAX_ACTIONS, size: int = 8, levels: int = 3) -> Dict[str, Any]:
+    """Runs episodes across a process pool and aggregates their scores."""
+    start_time = time.perf_counter()
+    episode_fn = partial(run_episode, policy_spec, max_actions=max_actions, size=size, levels=levels)
+    if workers <= 1 or len(seeds) <= 1:
+        episodes = [episode_fn(seed) for seed in seeds]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunksize = max(1, len(seeds) // (workers * 4))
+            episodes = list(pool.map(episode_fn, seeds, chunksize=chunksize))
+    scores = [e["score"] for e in episodes]
+    summary = {
+        "policy": policy_spec,
+        "episodes": len(episodes),
+        "mean_score": float(np.mean(scores)) if scores else 0.0,
+        "min_score": float(np.min(scores)) if scores else 0.0,
+        "win_rate": sum(e["state"] == WIN for e in episodes) / len(episodes) if episodes else 0.0,
+        "mean_actions": float(np.mean([e["actions"] for e in episodes])) if episodes else 0.0,
+        "errors": sum(1 for e in episodes if e["error"]),
+        "wall_time_s": time.perf_counter() - start_time,
+        "task_scores": {f"gridworld-{e['seed']}": e["score"] for e in episodes},
+    }
+    logger.info("Offline evaluation of %s: mean score %.3f over %s episodes.", policy_spec, summary['mean_score'], len(episodes))
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline batched evaluation on the local grid-world simulator.")
+    parser.add_argument("--policy", default=OFFLINE_EVAL_POLICY, help="Policy as 'module:function'.")
+    parser.add_argument("--episodes", type=int, default=max(OFFLINE_EVAL_EPISODES, 32))
+    parser.add_argument("--workers", type=int, default=OFFLINE_EVAL_WORKERS)
+    args = parser.parse_args()
+    print(json.dumps(run_batch(args.policy, list(range(args.episodes)), workers=args.workers), indent=2))
@@ -0,0 +1,252 @@
+import asyncio
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Any, List, Optional
+
+import aiofiles
+import aiofiles.os as aios
+from google.adk.artifacts.base_artifact_service import BaseArtifactService
+from google.genai import types as adk_types
+from pydantic import BaseModel, DirectoryPath, Field
+from typing_extensions import override
+
+from metrics import ARTIFACT_BYTES
+
+logger = logging.getLogger(__name__)
+
+
+class FileSystemArtifactService(BaseArtifactService, BaseModel):
+  """A file system-based implementation of the artifact service."""
+
+  base_storage_path: DirectoryPath = Field(default=Path("adk_artifacts"))
+
+  def model_post_init(self, __context: Any) -> None:
+    """Ensure the base storage path exists after Pydantic initialization."""
+    os.makedirs(self.base_storage_path, exist_ok=True)
+    logger.info("File artifact storage initialized at: %s", os.path.abspath(self.base_storage_path))
+
+  def _file_has_user_namespace(self, filename: str) -> bool:
+    """Checks if the filename has a user namespace."""
+    return filename.startswith("user:")
+
+  def _get_artifact_base_dir(
+      self, app_name: str, user_id: str, session_id: str, filename: str
+  ) -> str:
+    """Constructs the base directory path for a given artifact (up to the filename)."""
+    if self._file_has_user_namespace(filename):
+      return os.path.join(self.base_storage_path, app_name, user_id, "user", filename)
+    return os.path.join(self.base_storage_path, app_name, user_id, session_id, filename)
+
+  def _get_version_path(self, artifact_base_dir: str, version: int) -> str:
+    """Constructs the path to a specific version of an artifact."""
+    return os.path.join(artifact_base_dir, str(version))
+
+  async def _ensure_dir_exists(self, dir_path: str) -> None:
+    """Asynchronously ensures a directory exists."""
+    if not await aios.path.exists(dir_path):
+      await aios.makedirs(dir_path, exist_ok=True)
+
+  @override
+  async def save_artifact(
+      self,
+      *,
+      app_name: str,
+      user_id: str,
+      session_id: str,
+      filename: str,
+      artifact: adk_types.Part,
+  ) -> int:
+    artifact_base_dir = self._get_artifact_base_dir(app_name, user_id, session_id, filename)
+    await self._ensure_dir_exists(artifact_base_dir)
+
+    current_versions = []
+    if await aios.path.isdir(artifact_base_dir):
+        entries = await aios.listdir(artifact_base_dir)
+        for entry in entries:
+            if await aios.path.isdir(os.path.join(artifact_base_dir, entry)) and entry.isdigit():
+                current_versions.append(int(entry))
+    
+    new_version = 0
+    if current_versions:
+        new_version = max(current_versions) + 1
+    
+    version_path = self._get_version_path(artifact_base_dir, new_version)
+    await self._ensure_dir_exists(version_path)
+
+    data_file_path = os.path.join(version_path, "data.bin")
+    mimetype_file_path = os.path.join(version_path, "mimetype.txt")
+
+    try:
+      async with aiofiles.open(data_file_path, "wb") as f:
+        if artifact.inline_data and artifact.inline_data.data:
+          await f.write(artifact.inline_data.data)
+          ARTIFACT_BYTES.inc(len(artifact.inline_data.data))
+        else:
+          await f.write(b'')
+      
+      async with aiofiles.open(mimetype_file_path, "w", encoding="utf-8") as f:
+        if artifact.inline_data and artifact.inline_data.mime_type:
+          await f.write(artifact.inline_data.mime_type)
+        else:
+          await f.write("application/octet-stream")
+
+      logger.info("Saved artifact '%s' (version %s) to %s", filename, new_version, version_path)
+      return new_version
+    except Exception as e:
+      logger.error("Error saving artifact %s version %s: %s", filename, new_version, e)
+      if await aios.path.exists(version_path):
+          await asyncio.to_thread(shutil.rmtree, version_path)
+      raise
+
+  @override
+  async def load_artifact(
+      self,
+      *,
+      app_name: str,
+      user_id: str,
+      session_id: str,
+      filename: str,
+      version: Optional[int] = None,
+  ) -> Optional[adk_types.Part]:
+    artifact_base_dir = self._get_artifact_base_dir(app_name, user_id, session_id, filename)
+
+    if not await aios.path.isdir(artifact_base_dir):
+      logger.debug("Artifact base directory not found for '%s': %s", filename, artifact_base_dir)
+      return None
+
+    target_version = version
+    if target_version is None:
+      versions = await self.list_versions(app_name=app_name, user_id=user_id, session_id=session_id, filename=filename)
+      if not versions:
+        logger.debug("No versions found for artifact '%s' at %s", filename, artifact_base_dir)
+        return None
+      target_version = max(versions)
+    
+    version_path = self._get_version_path(artifact_base_dir, target_version)
+    if not await aios.path.isdir(version_path):
+      logger.debug("Version %s not found for artifact '%s' at %s", target_version, filename, version_path)
+      return None
+
+    data_file_path = os.path.join(version_path, "data.bin")
+    mimetype_file_path = os.path.join(version_path, "mimetype.txt")
+
+    if not await aios.path.exists(data_file_path) or \
+       not await aios.path.exists(mimetype_file_path):
+      logger.warning("Data or mimetype file missing for artifact '%s' version %s at %s", filename, target_version, version_path)
+      return None
+
+    try:
+      async with aiofiles.open(data_file_path, "rb") as f:
+        data_bytes = await f.read()
+      
+      async with aiofiles.open(mimetype_file_path, "r", encoding="utf-8") as f:
+        mime_type_str = await f.read()
+      
+      logger.info("Loaded artifact '%s' (version %s) from %s", filename, target_version, version_path)
+      return adk_types.Part(inline_data=adk_types.Blob(mime_type=mime_type_str, data=data_bytes))
+    except Exception as e:
+      logger.error("Error loading artifact %s version %s: %s", filename, target_version, e)
+      return None
+
+  @override
+  async def list_artifact_keys(
+      self, *, app_name: str, user_id: str, session_id: str
+  ) -> List[str]:
+    filenames = set()
+    
+    session_scope_path = os.path.join(self.base_storage_path, app_name, user_id, session_id)
+    user_scope_path = os.path.join(self.base_storage_path, app_name, user_id, "user")
+
+    async def scan_path(path_to_scan: str, is_user_scope: bool):
+        if await aios.path.isdir(path_to_scan):
+            try:
+                for item_name in await aios.listdir(path_to_scan):
+                    item_path = os.path.join(path_to_scan, item_name)
+                    if await aios.path.isdir(item_path):
+                        filenames.add(item_name)
+            except FileNotFoundError:
+                logger.debug("Directory not found during scan: %s", path_to_scan)
+            except Exception as e:
+                logger.error("Error listing artifact keys in %s: %s", path_to_scan, e)
+    
+    await scan_path(session_scope_path, is_user_scope=False)
+    await scan_path(user_scope_path, is_user_scope=True)
+        
+    return sorted(list(filenames))
+
+  @override
+  async def delete_artifact(
+      self, *, app_name: str, user_id: str, session_id: str, filename: str
+  ) -> None:
+    artifact_base_dir = self._get_artifact_base_dir(app_name, user_id, session_id, filename)
+    if await aios.path.isdir(artifact_base_dir):
+      try:
+        await asyncio.to_thread(shutil.rmtree, artifact_base_dir)
+        logger.info("Deleted artifact '%s' from %s", filename, artifact_base_dir)
+      except Exception as e:
+        logger.error("Error deleting artifact %s: %s", filename, e)
+        raise
+    else:
+      logger.debug("Artifact '%s' not found for deletion at %s", filename, artifact_base_dir)
+
+  @override
+  async def list_versions(
+      self, *, app_name: str, user_id: str, session_id: str, filename: str
+  ) -> List[int]:
+    artifact_base_dir = self._get_artifact_base_dir(app_name, user_id, session_id, filename)
+    versions = []
+    if await aios.path.isdir(artifact_base_dir):
+      try:
+        for entry in await aios.listdir(artifact_base_dir):
+          if entry.isdigit() and await aios.path.isdir(os.path.join(artifact_base_dir, entry)):
+            versions.append(int(entry))
+      except FileNotFoundError:
+         logger.debug("Artifact base directory not found while listing versions: %s", artifact_base_dir)
+         return []
+      except Exception as e:
+        logger.error("Error listing versions for artifact %s: %s", filename, e)
+        return []
+    return sorted(versions)
+
+  # Abstract in newer ADK releases (which also define ArtifactVersion); older ones never call them.
+  @override
+  async def get_artifact_version(
+      self, *, app_name: str, user_id: str, filename: str, session_id: Optional[str] = None,
+      version: Optional[int] = None,
+  ) -> Optional[Any]:
+    from google.adk.artifacts.base_artifact_service import ArtifactVersion
+    if version is None:
+      versions = await self.list_versions(app_name=app_name, user_id=user_id, session_id=session_id, filename=filename)
+      if not versions:
+        return None
+      version = max(versions)
+    version_path = self._get_version_path(self._get_artifact_base_dir(app_name, user_id, session_id, filename), version)
+    data_file_path = os.path.join(version_path, "data.bin")
+    if not await aios.path.exists(data_file_path):
+      return None
+    mime_type = None
+    mimetype_file_path = os.path.join(version_path, "mimetype.txt")
+    if await aios.path.exists(mimetype_file_path):
+      async with aiofiles.open(mimetype_file_path, "r", encoding="utf-8") as f:
+        mime_type = await f.read()
+    return ArtifactVersion(
+        version=version,
+        canonical_uri=Path(os.path.abspath(data_file_path)).as_uri(),
+        custom_metadata={},
+        create_time=await aios.path.getmtime(data_file_path),
+        mime_type=mime_type,
+    )
+
+  @override
+  async def list_artifact_versions(
+      self, *, app_name: str, user_id: str, filename: str, session_id: Optional[str] = None
+  ) -> List[Any]:
+    artifact_versions = []
+    for version in await self.list_versions(app_name=app_name, user_id=user_id, session_id=session_id, filename=filename):
+      artifact_version = await self.get_artifact_version(
+          app_name=app_name, user_id=user_id, filename=filename, session_id=session_id, version=version)
+      if artifact_version is not None:
+        artifact_versions.append(artifact_version)
+    return artifact_versions
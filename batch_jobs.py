@@ -0,0 +1,125 @@
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+BATCH_RESULTS_PATH = os.getenv("BATCH_RESULTS_PATH", "traces/batch_results.jsonl")
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", 2)) # Concurrent child processes
+BATCH_MAX_ATTEMPTS = int(os.getenv("BATCH_MAX_ATTEMPTS", 2)) # A job that crashed is retried until it has failed this often
+
+# Results after which a job is not run again; anything else counts as a failed attempt.
+FINAL_STATUSES = ("completed", "modified")
+
+
+class BatchJob(BaseModel):
+    """One objective from a batch queue file."""
+    job_id: str
+    objective: str
+    metadata: Dict[str, Any] = Field(default_factory=dict)
+
+
+class JobResult(BaseModel):
+    """The outcome of one attempt at a job, as appended to the results file."""
+    job_id: str
+    status: str  # completed, modified (the agent asked to reload), failed or timeout
+    attempt: int = 1
+    agent_ref: Optional[str] = None
+    agent_commit: Optional[str] = None
+    worker: Optional[int] = None
+    started_at: float = 0.0
+    finished_at: float = Field(default_factory=time.time)
+    wall_time_s: float = 0.0
+    tokens: int = 0
+    cpu_s: float = 0.0
+    peak_rss_mb: float = 0.0
+    output_summary: Any = None
+    error: Optional[str] = None
+
+
+def load_jobs(path: str) -> List[BatchJob]:
+    """Reads a JSONL queue of objectives.
+
+    Each line needs an `objective`, or a `title` and/or `body` (the backlog format), and may carry
+    an `id` or `request_id`; other fields are kept as metadata. Lines without an id are numbered.
+    """
+    jobs = []
+    seen = set()
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            job_id = str(entry.pop("id", None) or entry.pop("request_id", None) or f"line-{line_number}")
+            objective = entry.pop("objective", None) or "\n\n".join(
+                part for part in (entry.get("title"), entry.get("body")) if part)
+            if not objective:
+                raise ValueError(f"{path}:{line_number}: job {job_id} has no objective, title or body.")
+            if job_id in seen:
+                raise ValueError(f"{path}:{line_number}: duplicate job id {job_id}.")
+            seen.add(job_id)
+            jobs.append(BatchJob(job_id=job_id, objective=objective.strip(), metadata=entry))
+    return jobs
+
+
+class JobLedger:
+    """The append-only results file of a batch run, used to resume it after a crash.
+
+    A job is done once it has a final result, or once it has failed `max_attempts` times; jobs
+    that were running when the orchestrator died have no result and are simply run again.
+    A file holds the results of one agent commit: resuming it with another raises ValueError.
+    """
+
+    def __init__(self, path: str = BATCH_RESULTS_PATH, max_attempts: int = BATCH_MAX_ATTEMPTS,
+                 agent_commit: Optional[str] = None):
+        self.path = Path(path)
+        self.max_attempts = max_attempts
+        self.results: Dict[str, List[JobResult]] = {}
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        result = JobResult.model_validate_json(line)
+                    except ValueError:
+                        logger.warning("Skipping unreadable line in %s: %s", self.path, line[:200])
+                        continue
+                    self.results.setdefault(result.job_id, []).append(result)
+        other_commits = {r.agent_commit for results in self.results.values() for r in results} - {agent_commit, None}
+        if agent_commit and other_commits:
+            raise ValueError(f"{self.path} holds results of agent commit(s) {', '.join(sorted(other_commits))}, "
+                             f"not {agent_commit}; resume with the same agent version or use another results file.")
+
+    def attempts(self, job_id: str) -> int:
+        return len(self.results.get(job_id, []))
+
+    def is_done(self, job_id: str) -> bool:
+        results = self.results.get(job_id, [])
+        return any(r.status in FINAL_STATUSES for r in results) or len(results) >= self.max_attempts
+
+    def pending(self, jobs: List[BatchJob]) -> List[BatchJob]:
+        return [job for job in jobs if not self.is_done(job.job_id)]
+
+    def record(self, result: JobResult) -> None:
+        """Appends a result and flushes it to disk before the next job is scheduled."""
+        self.results.setdefault(result.job_id, []).append(result)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(result.model_dump_json() + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def summary(self) -> Dict[str, int]:
+        """Number of jobs by their latest status."""
+        counts: Dict[str, int] = {}
+        for results in self.results.values():
+            status = results[-1].status
+            counts[status] = counts.get(status, 0) + 1
+        return counts
@@ -0,0 +1,268 @@
+import argparse
+import asyncio
+import contextlib
+import inspect
+import json
+import logging
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+from unittest.mock import patch
+
+logger = logging.getLogger(__name__)
+
+BENCHMARK_RESULTS_PATH = os.getenv("BENCHMARK_RESULTS_PATH", "traces/benchmarks.json")
+# A benchmark regresses if its median grows by more than this percentage (and by more than the noise floor).
+BENCHMARK_REGRESSION_PCT = float(os.getenv("BENCHMARK_REGRESSION_PCT", 20))
+BENCHMARK_NOISE_FLOOR_MS = float(os.getenv("BENCHMARK_NOISE_FLOOR_MS", 0.05))
+
+ARTIFACT_VERSIONS = (10, 1_000, 100_000)
+ARCHIVE_TAGS = (10, 1_000, 10_000)
+
+
+def measure(fn: Callable[[], Any], repeats: int = 5, number: int = 1) -> Dict[str, float]:
+    """Times `repeats` batches of `number` calls; awaitables returned by `fn` are run to completion. Times are per call."""
+    loop = asyncio.new_event_loop()
+    samples = []
+    try:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            for _ in range(number):
+                result = fn()
+                if inspect.isawaitable(result):
+                    loop.run_until_complete(result)
+            samples.append((time.perf_counter() - start) / number)
+    finally:
+        loop.close()
+    return {
+        "median_s": statistics.median(samples),
+        "min_s": min(samples),
+        "mean_s": statistics.fmean(samples),
+        "repeats": repeats,
+        "number": number,
+    }
+
+
+@contextlib.contextmanager
+def _workdir() -> Iterator[Path]:
+    """Runs a benchmark inside a scratch directory."""
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="dgm-bench-") as path:
+        os.chdir(path)
+        try:
+            yield Path(path)
+        finally:
+            os.chdir(previous)
+
+
+def bench_tools(quick: bool = False) -> Dict[str, Dict[str, float]]:
+    """The agents' file, command and code tools."""
+    from agent_tools import _execute_command_impl, _read_file_impl, _unsafe_execute_code_impl, _write_file_impl
+    content = "x" * 64 * 1024
+    with _workdir():
+        _write_file_impl("data.txt", content)
+        return {
+            "tools.read_file_64k": measure(lambda: _read_file_impl("data.txt"), number=200),
+            "tools.write_file_64k": measure(lambda: _write_file_impl("out/data.txt", content), number=50),
+            "tools.execute_command": measure(lambda: _execute_command_impl("echo ok"), number=5),
+            "tools.unsafe_execute_code": measure(lambda: _unsafe_execute_code_impl("print(1 + 1)", tool_context=object()), number=20),
+        }
+
+
+def _populate_artifact_versions(service: Any, versions: int, filename: str) -> None:
+    """Writes versions straight to disk: saving them one by one is itself O(n) per save."""
+    base_dir = Path(service._get_artifact_base_dir("bench", "user", "session", filename))
+    for version in range(versions):
+        version_dir = base_dir / str(version)
+        version_dir.mkdir(parents=True)
+        (version_dir / "data.bin").write_bytes(b"\x89PNG" + version.to_bytes(4, "big"))
+        (version_dir / "mimetype.txt").write_text("image/png")
+
+
+def bench_artifacts(quick: bool = False, sizes: Optional[Sequence[int]] = None, repeats: Optional[int] = None) -> Dict[str, Dict[str, float]]:
+    """FileSystemArtifactService save, load (latest version) and list_versions as versions accumulate."""
+    from google.genai import types as adk_types
+    from artifact_store import FileSystemArtifactService
+    results = {}
+    part = adk_types.Part(inline_data=adk_types.Blob(mime_type="image/png", data=b"\x89PNG" * 256))
+    for size in sizes or (ARTIFACT_VERSIONS[:2] if quick else ARTIFACT_VERSIONS):
+        with _workdir() as path:
+            service = FileSystemArtifactService(base_storage_path=path)
+            _populate_artifact_versions(service, size, "frame.png")
+            keys = {"app_name": "bench", "user_id": "user", "session_id": "session", "filename": "frame.png"}
+            runs = repeats or (5 if size <= 1_000 else 1)
+            results[f"artifacts.save.{size}"] = measure(lambda: service.save_artifact(artifact=part, **keys), repeats=runs)
+            results[f"artifacts.load_latest.{size}"] = measure(lambda: service.load_artifact(**keys), repeats=runs)
+            results[f"artifacts.list_versions.{size}"] = measure(lambda: service.list_versions(**keys), repeats=runs)
+    return results
+
+
+def _create_archive_tags(count: int, seed: int = 0) -> None:
+    """Creates `count` annotated agent-archive tags with random lineage and scores in one git fast-import."""
+    from agent_archive import AgentRecord
+    rng = random.Random(seed)
+    subprocess.run(["git", "init", "-q"], check=True)
+
+    def data(payload: str) -> str:
+        return f"data {len(payload.encode('utf-8'))}\n{payload}\n"
+
+    stream = ["commit refs/heads/master\nmark :1\ncommitter Bench <bench@example.com> 0 +0000\n", data("init"),
+              "M 644 inline knowledge.md\n", data("k")]
+    for index in range(count):
+        parent = f"agent-archive-{rng.randrange(index):06d}" if index else None
+        message = AgentRecord(description="benchmark agent", parent=parent, score=rng.random(), created_at=float(index)).to_message()
+        stream += [f"tag agent-archive-{index:06d}\nfrom :1\ntagger Bench <bench@example.com> 0 +0000\n", data(message)]
+    subprocess.run(["git", "fast-import", "--quiet"], input="".join(stream), text=True, check=True)
+
+
+def bench_parent_selection(quick: bool = False, sizes: Optional[Sequence[int]] = None, repeats: Optional[int] = None) -> Dict[str, Dict[str, float]]:
+    """MainOrchestrator._select_parent_agent on an archive of N tags: first call (cold) and later calls (warm)."""
+    from main_orchestrator import MainOrchestrator
+    results = {}
+    for size in sizes or (ARCHIVE_TAGS[:2] if quick else ARCHIVE_TAGS):
+        with _workdir():
+            _create_archive_tags(size)
+            runs = repeats or 5
+            # Construction (git discovery, queues) is not part of selection, so build orchestrators up front.
+            cold = [MainOrchestrator() for _ in range(runs)]
+            results[f"parent_selection.cold.{size}"] = measure(lambda: cold.pop()._select_parent_agent(), repeats=runs)
+            warm = MainOrchestrator()
+            warm._select_parent_agent()
+            results[f"parent_selection.warm.{size}"] = measure(warm._select_parent_agent, repeats=runs)
+    return results
+
+
+_MOCK_LLM_RESPONSES = {
+    "PlannerAgent": "1. Read knowledge.md.\n2. Report the system status.",
+    "ExecutorAgent": json.dumps({"execution_summary": "Reported status.", "system_agents_modified_and_validated": False}),
+    "LearningAgent": "No new learnings.",
+}
+
+
+async def _mock_llm_run(agent: Any, context: Any):
+    from google.adk.events import Event
+    from google.genai import types as adk_types
+    yield Event(
+        author=agent.name,
+        invocation_id=context.invocation_id,
+        content=adk_types.Content(role="model", parts=[adk_types.Part(text=_MOCK_LLM_RESPONSES.get(agent.name, "OK"))]),
+        usage_metadata=adk_types.GenerateContentResponseUsageMetadata(prompt_token_count=1000, candidates_token_count=100, total_token_count=1100),
+    )
+
+
+def bench_adk_loop(quick: bool = False, repeats: Optional[int] = None) -> Dict[str, Dict[str, float]]:
+    """One planner -> executor -> learner loop through the real runner, session store and tracing, with the LLM mocked."""
+    from google.adk.agents import LlmAgent
+    import system_agents
+    with _workdir() as path:
+        Path("knowledge.md").write_text("# System Learnings\n\n(No prior learnings)")
+        with patch.dict(os.environ, {"SESSION_DB_PATH": str(path / "sessions.db")}), \
+                patch.object(LlmAgent, "_run_async_impl", _mock_llm_run):
+            # The top-level agent counts its loops, so every run gets a freshly built runner.
+            runs = repeats or (3 if quick else 10)
+            services = [system_agents.get_adk_runner_and_services(
+                initial_objective="Report the system status.", initial_knowledge="# System Learnings")[:2] for _ in range(runs)]
+            return {"adk_loop.mocked_llm": measure(
+                lambda: system_agents.run_adk_loop(*services.pop(), "Report the system status.", "# System Learnings"),
+                repeats=runs)}
+
+
+SUITES: Dict[str, Callable[..., Dict[str, Dict[str, float]]]] = {
+    "tools": bench_tools,
+    "artifacts": bench_artifacts,
+    "parent_selection": bench_parent_selection,
+    "adk_loop": bench_adk_loop,
+}
+
+
+def git_short_commit() -> Optional[str]:
+    """The checked-out commit, recorded with benchmark and import-time results."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suites(names: Sequence[str], quick: bool = False) -> Dict[str, Any]:
+    """Runs the named suites with logging below WARNING silenced."""
+    record: Dict[str, Any] = {"timestamp": time.time(), "commit": git_short_commit(), "python": sys.version.split()[0],
+                              "quick": quick, "results": {}}
+    logging.disable(logging.INFO)
+    try:
+        for name in names:
+            start = time.perf_counter()
+            record["results"].update(SUITES[name](quick=quick))
+            print(f"Suite {name} finished in {time.perf_counter() - start:.1f}s.", file=sys.stderr)
+    finally:
+        logging.disable(logging.NOTSET)
+    return record
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any], threshold_pct: float = BENCHMARK_REGRESSION_PCT,
+                    noise_floor_ms: float = BENCHMARK_NOISE_FLOOR_MS, metric: str = "median_s",
+                    ms_per_unit: float = 1000.0) -> List[Dict[str, Any]]:
+    """Per-result change of `metric` against `baseline`, with regressions marked.
+
+    Also used by import_profile.py, whose results give `median_ms` (`ms_per_unit` 1).
+    """
+    rows = []
+    for name, result in sorted(current["results"].items()):
+        before = baseline.get("results", {}).get(name)
+        if not before:
+            continue
+        delta = result[metric] - before[metric]
+        change_pct = 100.0 * delta / before[metric] if before[metric] else 0.0
+        rows.append({
+            "name": name,
+            "baseline": before[metric],
+            "current": result[metric],
+            "change_pct": change_pct,
+            "regression": change_pct > threshold_pct and delta * ms_per_unit > noise_floor_ms,
+        })
+    return rows
+
+
+def _print_comparison(rows: List[Dict[str, Any]]) -> None:
+    print(f"{'benchmark':<40}{'baseline_ms':>14}{'current_ms':>14}{'change':>10}")
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        print(f"{row['name']:<40}{row['baseline'] * 1000:>14.3f}{row['current'] * 1000:>14.3f}{row['change_pct']:>+9.1f}%{flag}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the benchmark suite or compare two result files.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run", help="Run benchmarks and write JSON results.")
+    run_parser.add_argument("--suite", action="append", choices=sorted(SUITES), help="Suite to run (repeatable; default all).")
+    run_parser.add_argument("--quick", action="store_true", help="Skip the largest artifact and archive sizes.")
+    run_parser.add_argument("--output", default=BENCHMARK_RESULTS_PATH, help="Where to write the results.")
+    run_parser.add_argument("--baseline", help="Compare against this results file after running.")
+    compare_parser = subparsers.add_parser("compare", help="Compare results against a baseline.")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    for sub in (run_parser, compare_parser):
+        sub.add_argument("--threshold", type=float, default=BENCHMARK_REGRESSION_PCT, help="Allowed slowdown in percent.")
+        sub.add_argument("--noise-floor-ms", type=float, default=BENCHMARK_NOISE_FLOOR_MS, help="Ignore slowdowns smaller than this.")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        current = run_suites(args.suite or list(SUITES), quick=args.quick)
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(json.dumps(current, indent=2), encoding="utf-8")
+        print(f"Wrote {len(current['results'])} results to {args.output}")
+        baseline_path = args.baseline
+    else:
+        current = json.loads(Path(args.current).read_text(encoding="utf-8"))
+        baseline_path = args.baseline
+    if baseline_path:
+        rows = compare_results(json.loads(Path(baseline_path).read_text(encoding="utf-8")), current, args.threshold, args.noise_floor_ms)
+        _print_comparison(rows)
+        sys.exit(1 if any(row["regression"] for row in rows) else 0)
+    for name, result in sorted(current["results"].items()):
+        print(f"{name:<40}{result['median_s'] * 1000:>12.3f} ms")
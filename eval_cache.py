@@ -0,0 +1,104 @@
+import ast
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from arc_sim import OFFLINE_EVAL_EPISODES, OFFLINE_EVAL_MAX_ACTIONS, OFFLINE_EVAL_POLICY
+from eval_harness import OFFLINE_EVAL_RUNGS
+
+logger = logging.getLogger(__name__)
+
+EVAL_CACHE_PATH = os.getenv("EVAL_CACHE_PATH", ".eval_cache.json") # Empty disables the cache
+# Sources beside system_agents.py that decide how a candidate is scored (simulator, levels, rungs).
+EVALUATION_SOURCES = ("arc_sim.py", "eval_harness.py")
+
+
+def _sort_import_runs(body: list) -> list:
+    """Sorts each run of consecutive import statements, since their order does not matter."""
+    result, run = [], []
+    for node in body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            run.append(node)
+            continue
+        result.extend(sorted(run, key=ast.dump))
+        run = []
+        result.append(node)
+    result.extend(sorted(run, key=ast.dump))
+    return result
+
+
+def normalized_code_hash(source: str) -> str:
+    """Hashes code by its AST, so whitespace, comments and import order do not change the hash.
+
+    Docstrings are kept: ADK sends tool docstrings to the model, so they change behaviour.
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return hashlib.sha256(source.encode("utf-8")).hexdigest()
+    tree.body = _sort_import_runs(tree.body)
+    return hashlib.sha256(ast.dump(tree, include_attributes=False).encode("utf-8")).hexdigest()
+
+
+def text_fingerprint(text: str) -> str:
+    """Hashes text with trailing whitespace and blank-line runs normalised away."""
+    lines = [line.rstrip() for line in text.strip().splitlines()]
+    normalized = "\n".join(line for i, line in enumerate(lines) if line or (i and lines[i - 1]))
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def _read_text(path: Path) -> str:
+    return path.read_text(encoding="utf-8") if path.exists() else ""
+
+
+def evaluation_key(code_path: Path, knowledge_path: Path) -> str:
+    """Cache key of a candidate: code hash, knowledge fingerprint, the hashes of the evaluation
+    sources next to the code, and the evaluation settings."""
+    code_hashes = [normalized_code_hash(_read_text(code_path))]
+    code_hashes += [normalized_code_hash(_read_text(code_path.parent / name)) for name in EVALUATION_SOURCES]
+    knowledge = _read_text(knowledge_path)
+    settings = f"{OFFLINE_EVAL_POLICY}|{OFFLINE_EVAL_EPISODES}|{OFFLINE_EVAL_RUNGS}|{OFFLINE_EVAL_MAX_ACTIONS}"
+    return hashlib.sha256(
+        f"{'|'.join(code_hashes)}|{text_fingerprint(knowledge)}|{settings}".encode("utf-8")
+    ).hexdigest()
+
+
+class EvaluationCache:
+    """Persistent map from candidate key to its offline evaluation summary."""
+
+    def __init__(self, path: str = EVAL_CACHE_PATH):
+        self.path = Path(path) if path else None
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        if self.path and self.path.exists():
+            try:
+                self._entries = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning("Ignoring unreadable evaluation cache %s: %s", self.path, e)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry["summary"]
+
+    def put(self, key: str, summary: Dict[str, Any], tag_name: Optional[str] = None) -> None:
+        if self.path is None:
+            return
+        self._entries[key] = {"summary": summary, "tag": tag_name, "evaluated_at": time.time()}
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        try:
+            tmp_path.write_text(json.dumps(self._entries), encoding="utf-8")
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning("Could not write evaluation cache %s: %s", self.path, e)
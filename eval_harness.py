@@ -0,0 +1,99 @@
+import logging
+import os
+from queue import Empty
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from arc_sim import OFFLINE_EVAL_EPISODES, OFFLINE_EVAL_POLICY, OFFLINE_EVAL_WORKERS, run_batch
+
+logger = logging.getLogger(__name__)
+
+# Cumulative episode counts per rung, e.g. "8,32,128". Empty means one rung of OFFLINE_EVAL_EPISODES.
+OFFLINE_EVAL_RUNGS = os.getenv("OFFLINE_EVAL_RUNGS", "")
+# A candidate is promoted to the next rung if its partial score reaches this percentile of the archive.
+EVAL_PROMOTION_PERCENTILE = float(os.getenv("EVAL_PROMOTION_PERCENTILE", 50))
+EVAL_DECISION_TIMEOUT_S = float(os.getenv("EVAL_DECISION_TIMEOUT_S", 30))
+
+
+def parse_rungs(spec: str = OFFLINE_EVAL_RUNGS, total: int = OFFLINE_EVAL_EPISODES) -> List[int]:
+    """Parses cumulative rung sizes, capped at `total` and strictly increasing."""
+    sizes = sorted({min(int(part), total) for part in spec.split(",") if part.strip()} | {total}) if total > 0 else []
+    return [size for size in sizes if size > 0]
+
+
+def promotion_threshold(archive_scores: List[float], percentile: float = EVAL_PROMOTION_PERCENTILE) -> Optional[float]:
+    """The score a candidate needs to continue; None (always continue) while the archive is empty."""
+    if not archive_scores:
+        return None
+    return float(np.percentile(archive_scores, percentile))
+
+
+def wait_for_decision(control_q: Optional[Any], timeout_s: float = EVAL_DECISION_TIMEOUT_S) -> bool:
+    """Blocks until the orchestrator says whether to continue; continues if there is no answer."""
+    if control_q is None:
+        return True
+    try:
+        while True:
+            message = control_q.get(timeout=timeout_s)
+            if message.get("type") == "evaluation_decision":
+                return bool(message.get("continue", True))
+    except Empty:
+        logger.warning("No evaluation decision within %ss; continuing.", timeout_s)
+        return True
+
+
+class SuccessiveHalvingEvaluator:
+    """Scores a candidate on the simulated task suite in rungs of increasing size.
+
+    After each rung but the last, the partial score is reported as an `evaluation_progress`
+    message and the evaluator waits for the orchestrator's decision, so weak candidates are
+    stopped after a few tasks instead of running the whole suite.
+    """
+
+    def __init__(self, policy_spec: str = OFFLINE_EVAL_POLICY, rungs: Optional[List[int]] = None,
+                 ipc_q: Optional[Any] = None, control_q: Optional[Any] = None,
+                 workers: int = OFFLINE_EVAL_WORKERS, decision_timeout_s: float = EVAL_DECISION_TIMEOUT_S,
+                 batch_fn: Callable[..., Dict[str, Any]] = run_batch):
+        self.policy_spec = policy_spec
+        self.rungs = rungs if rungs is not None else parse_rungs()
+        self.ipc_q = ipc_q
+        self.control_q = control_q
+        self.workers = workers
+        self.decision_timeout_s = decision_timeout_s
+        self.batch_fn = batch_fn
+
+    def run(self) -> Dict[str, Any]:
+        task_scores: Dict[str, float] = {}
+        wall_time_s, errors, rungs_completed, early_stopped = 0.0, 0, 0, False
+        for index, size in enumerate(self.rungs):
+            seeds = list(range(len(task_scores), size))
+            batch = self.batch_fn(self.policy_spec, seeds, workers=self.workers)
+            task_scores.update(batch["task_scores"])
+            wall_time_s += batch["wall_time_s"]
+            errors += batch["errors"]
+            rungs_completed = index + 1
+            score = float(np.mean(list(task_scores.values())))
+            logger.info("Evaluation rung %s/%s: %s tasks, score %.3f.", rungs_completed, len(self.rungs), len(task_scores), score)
+            if rungs_completed == len(self.rungs):
+                break
+            if self.ipc_q:
+                self.ipc_q.put({'type': 'evaluation_progress', 'rung': rungs_completed, 'rungs': len(self.rungs),
+                                'episodes': len(task_scores), 'score': score})
+            if not wait_for_decision(self.control_q, self.decision_timeout_s):
+                logger.info("Evaluation stopped early after rung %s.", rungs_completed)
+                early_stopped = True
+                break
+        scores = list(task_scores.values())
+        return {
+            "policy": self.policy_spec,
+            "episodes": len(scores),
+            "mean_score": float(np.mean(scores)) if scores else 0.0,
+            "min_score": float(np.min(scores)) if scores else 0.0,
+            "errors": errors,
+            "wall_time_s": wall_time_s,
+            "rungs_completed": rungs_completed,
+            "rungs": len(self.rungs),
+            "early_stopped": early_stopped,
+            "task_scores": task_scores,
+        }
@@ -0,0 +1,213 @@
+import argparse
+import gzip
+import json
+import logging
+import os
+import queue
+import shutil
+import time
+from logging.handlers import QueueListener, RotatingFileHandler
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+EVENT_TRACE_PATH = os.getenv("EVENT_TRACE_PATH", "traces/events.jsonl")
+EVENT_TRACE_MAX_BYTES = int(os.getenv("EVENT_TRACE_MAX_BYTES", 10 * 1024 * 1024))
+EVENT_TRACE_BACKUPS = int(os.getenv("EVENT_TRACE_BACKUPS", 5))
+EVENT_TRACE_COMPRESS = os.getenv("EVENT_TRACE_COMPRESS", "true").lower() in ("1", "true", "yes")
+
+
+def _gzip_namer(default_name: str) -> str:
+    return default_name + ".gz"
+
+
+def _gzip_rotator(source: str, dest: str) -> None:
+    """Compresses a rotated trace file."""
+    with open(source, "rb") as src, gzip.open(dest, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+
+class EventRecorder:
+    """Builds one flat record per ADK event: latency since the previous event, tool
+    call-to-response latency (matched by call id), payload size and token usage."""
+
+    def __init__(self):
+        self._last_event_monotonic: Optional[float] = None
+        self._pending_tool_calls: Dict[str, float] = {}
+        self.event_count = 0
+
+    def record(self, event: Any, session_id: Optional[str] = None) -> Dict[str, Any]:
+        now = time.monotonic()
+        latency = now - self._last_event_monotonic if self._last_event_monotonic is not None else 0.0
+        self._last_event_monotonic = now
+        self.event_count += 1
+
+        record: Dict[str, Any] = {
+            "seq": self.event_count,
+            "wall_time": time.time(),
+            "event_time": getattr(event, "timestamp", None),
+            "session_id": session_id,
+            "invocation_id": getattr(event, "invocation_id", None),
+            "author": getattr(event, "author", None),
+            "latency_s": round(latency, 6),
+        }
+
+        content = getattr(event, "content", None)
+        payload_bytes = 0
+        tool_calls: List[str] = []
+        tool_responses: Dict[str, Optional[float]] = {}
+        if content is not None and getattr(content, "parts", None):
+            for part in content.parts:
+                if part.text:
+                    payload_bytes += len(part.text.encode("utf-8"))
+                if part.inline_data and part.inline_data.data:
+                    payload_bytes += len(part.inline_data.data)
+                if part.function_call:
+                    tool_calls.append(part.function_call.name)
+                    self._pending_tool_calls[part.function_call.id or part.function_call.name] = now
+                    payload_bytes += len(json.dumps(part.function_call.args or {}, default=str))
+                if part.function_response:
+                    call_key = part.function_response.id or part.function_response.name
+                    started = self._pending_tool_calls.pop(call_key, None)
+                    tool_responses[part.function_response.name] = round(now - started, 6) if started is not None else None
+                    payload_bytes += len(json.dumps(part.function_response.response or {}, default=str))
+        record["payload_bytes"] = payload_bytes
+        if tool_calls:
+            record["tool_calls"] = tool_calls
+        if tool_responses:
+            record["tool_latency_s"] = tool_responses
+
+        usage = getattr(event, "usage_metadata", None)
+        if usage is not None:
+            record["tokens"] = {
+                "prompt": getattr(usage, "prompt_token_count", None),
+                "output": getattr(usage, "candidates_token_count", None),
+                "total": getattr(usage, "total_token_count", None),
+            }
+        return record
+
+
+class _JsonLineFormatter(logging.Formatter):
+    """Serializes the trace record carried as the log message; runs on the listener's thread."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(record.msg, default=str)
+
+
+class EventTraceSink:
+    """Streams one JSON line per ADK event to a rotating file from a background thread.
+
+    Record extraction happens on the caller's thread and is cheap; serialization
+    and file I/O happen on the writer thread so the agent loop never waits on disk.
+    Records are handed over as dicts, so callers must not modify them after writing.
+    """
+
+    def __init__(self, path: str = EVENT_TRACE_PATH, max_bytes: int = EVENT_TRACE_MAX_BYTES,
+                 backup_count: int = EVENT_TRACE_BACKUPS, compress: bool = EVENT_TRACE_COMPRESS):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._handler = RotatingFileHandler(self.path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+        self._handler.setFormatter(_JsonLineFormatter())
+        if compress:
+            self._handler.namer = _gzip_namer
+            self._handler.rotator = _gzip_rotator
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._listener = QueueListener(self._queue, self._handler)
+        self._listener.start()
+        self.recorder = EventRecorder()
+        logger.info("Event trace streaming to: %s", self.path.resolve())
+
+    @property
+    def event_count(self) -> int:
+        return self.recorder.event_count
+
+    def record_event(self, event: Any, session_id: Optional[str] = None) -> Dict[str, Any]:
+        """Builds a trace record for an ADK event and enqueues it for writing."""
+        record = self.recorder.record(event, session_id)
+        self.write(record)
+        return record
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """Enqueues an already-built record for writing; the writer thread serializes it."""
+        self._queue.put_nowait(logging.makeLogRecord({"msg": record, "levelno": logging.INFO}))
+
+    def close(self) -> None:
+        """Flushes queued records and closes the trace file."""
+        self._listener.stop()
+        self._handler.close()
+
+
+def trace_files(path: str) -> List[Path]:
+    """Returns the trace file and its rotated backups, oldest first."""
+    base = Path(path)
+    backups = []
+    for candidate in base.parent.glob(base.name + ".*"):
+        suffix = candidate.name[len(base.name) + 1:].split(".")[0]
+        if suffix.isdigit():
+            backups.append((int(suffix), candidate))
+    files = [p for _, p in sorted(backups, reverse=True)]
+    if base.exists():
+        files.append(base)
+    return files
+
+
+def read_trace(path: str) -> Iterator[Dict[str, Any]]:
+    """Yields trace records from the trace file and its (possibly compressed) backups."""
+    for file_path in trace_files(path):
+        opener = gzip.open if file_path.suffix == ".gz" else open
+        with opener(file_path, "rt", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+
+def _add_sample(bucket: Dict[str, Dict[str, float]], key: str, value: float) -> None:
+    stats = bucket.setdefault(key, {"count": 0, "total_s": 0.0, "max_s": 0.0})
+    stats["count"] += 1
+    stats["total_s"] += value
+    stats["max_s"] = max(stats["max_s"], value)
+
+
+def summarize_latency(records: Iterator[Dict[str, Any]]) -> Dict[str, Any]:
+    """Computes per-agent and per-tool latency breakdowns from trace records.
+
+    The time since the previous event is attributed to the author of the event
+    that ended the gap; tool latency is the time from call to matching response.
+    """
+    agents: Dict[str, Dict[str, float]] = {}
+    tools: Dict[str, Dict[str, float]] = {}
+    for record in records:
+        author = record.get("author") or "unknown"
+        _add_sample(agents, author, record.get("latency_s", 0.0))
+        tokens = record.get("tokens") or {}
+        agents[author]["tokens"] = agents[author].get("tokens", 0) + (tokens.get("total") or 0)
+        for tool_name, latency in (record.get("tool_latency_s") or {}).items():
+            if latency is not None:
+                _add_sample(tools, tool_name, latency)
+    for bucket in (agents, tools):
+        for stats in bucket.values():
+            stats["mean_s"] = stats["total_s"] / stats["count"] if stats["count"] else 0.0
+    return {"agents": agents, "tools": tools}
+
+
+def _print_table(title: str, bucket: Dict[str, Dict[str, float]]) -> None:
+    print(f"\n{title}")
+    print(f"{'name':<32}{'count':>8}{'total_s':>12}{'mean_s':>10}{'max_s':>10}")
+    for name, stats in sorted(bucket.items(), key=lambda item: item[1]["total_s"], reverse=True):
+        print(f"{name:<32}{stats['count']:>8}{stats['total_s']:>12.3f}{stats['mean_s']:>10.3f}{stats['max_s']:>10.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize where loop time goes from an event trace.")
+    parser.add_argument("path", nargs="?", default=EVENT_TRACE_PATH, help="Trace file (rotated backups are included).")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON.")
+    args = parser.parse_args()
+    summary = summarize_latency(read_trace(args.path))
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        _print_table("Per-agent latency", summary["agents"])
+        _print_table("Per-tool latency", summary["tools"])
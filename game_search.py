@@ -0,0 +1,289 @@
+import heapq
+import json
+import logging
+import math
+import random
+import time
+from collections import deque
+from itertools import count
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from arc_grid import GridFrame, format_frame
+from arc_sim import NOT_FINISHED, WIN, GridWorldGame
+
+logger = logging.getLogger(__name__)
+
+# A heuristic scores a batch of game states at once (estimated distance to the goal,
+# lower is better), so an expensive scorer such as an LLM can be called once per batch.
+Heuristic = Callable[[List[Any]], List[float]]
+
+STRATEGIES = ("bfs", "best_first", "mcts")
+
+
+class SearchResult(BaseModel):
+    """Outcome of a search from one game state."""
+    strategy: str
+    solved: bool
+    actions: List[str] = Field(default_factory=list)
+    nodes_expanded: int = 0
+    transposition_hits: int = 0
+    elapsed_s: float = 0.0
+    stop_reason: str = ""
+
+
+class TranspositionTable:
+    """Remembers the shallowest depth each state was reached at, to skip revisits."""
+
+    def __init__(self):
+        self._depths: Dict[Hashable, int] = {}
+        self.hits = 0
+
+    def visit(self, key: Hashable, depth: int) -> bool:
+        """Records a visit; returns False (and counts a hit) if the state was already reached as cheaply."""
+        best = self._depths.get(key)
+        if best is not None and best <= depth:
+            self.hits += 1
+            return False
+        self._depths[key] = depth
+        return True
+
+    def __len__(self) -> int:
+        return len(self._depths)
+
+
+def manhattan_heuristic(games: List[GridWorldGame]) -> List[float]:
+    """Grid-world heuristic: Manhattan distance from player to goal."""
+    return [abs(g.player[0] - g.goal[0]) + abs(g.player[1] - g.goal[1]) for g in games]
+
+
+def make_frame_heuristic(score_frames: Callable[[List[str]], List[float]]) -> Heuristic:
+    """Adapts a batch scorer over rendered frames (e.g. one LLM call per batch) into a Heuristic."""
+    def heuristic(games: List[Any]) -> List[float]:
+        return score_frames([format_frame(GridFrame(g.grid())) for g in games])
+    return heuristic
+
+
+class _Budget:
+    def __init__(self, max_nodes: int, time_limit_s: float):
+        self.max_nodes = max_nodes
+        self.deadline = time.perf_counter() + time_limit_s
+        self.nodes = 0
+
+    def exhausted(self) -> Optional[str]:
+        if self.nodes >= self.max_nodes:
+            return "node_budget"
+        if time.perf_counter() >= self.deadline:
+            return "time_budget"
+        return None
+
+
+def _is_goal(game: Any, start_score: int) -> bool:
+    return game.state == WIN or game.score > start_score
+
+
+def _child(game: Any, action: str) -> Any:
+    child = game.clone()
+    child.apply_action(action)
+    return child
+
+
+def _bfs(root: Any, budget: _Budget, table: TranspositionTable, heuristic: Optional[Heuristic],
+         batch_size: int) -> Tuple[Optional[List[str]], str]:
+    start_score = root.score
+    table.visit(root.state_key(), 0)
+    frontier = deque([(root, [])])
+    while frontier:
+        reason = budget.exhausted()
+        if reason:
+            return None, reason
+        node, path = frontier.popleft()
+        budget.nodes += 1
+        for action in node.available_actions:
+            child = _child(node, action)
+            if _is_goal(child, start_score):
+                return path + [action], "solved"
+            if child.state == NOT_FINISHED and table.visit(child.state_key(), len(path) + 1):
+                frontier.append((child, path + [action]))
+    return None, "exhausted"
+
+
+def _best_first(root: Any, budget: _Budget, table: TranspositionTable, heuristic: Optional[Heuristic],
+                batch_size: int) -> Tuple[Optional[List[str]], str]:
+    """A*-style best-first search; children of several nodes are scored in one heuristic batch."""
+    heuristic = heuristic or (lambda games: [0.0] * len(games))
+    start_score = root.score
+    tie_breaker = count()
+    table.visit(root.state_key(), 0)
+    frontier = [(0.0, next(tie_breaker), root, [])]
+    while frontier:
+        reason = budget.exhausted()
+        if reason:
+            return None, reason
+        pending: List[Tuple[Any, List[str]]] = []
+        while frontier and len(pending) < batch_size:
+            _, _, node, path = heapq.heappop(frontier)
+            budget.nodes += 1
+            for action in node.available_actions:
+                child = _child(node, action)
+                if _is_goal(child, start_score):
+                    return path + [action], "solved"
+                if child.state == NOT_FINISHED and table.visit(child.state_key(), len(path) + 1):
+                    pending.append((child, path + [action]))
+        if pending:
+            scores = heuristic([child for child, _ in pending])
+            for (child, path), h in zip(pending, scores):
+                heapq.heappush(frontier, (len(path) + h, next(tie_breaker), child, path))
+    return None, "exhausted"
+
+
+class _MctsNode:
+    __slots__ = ("visits", "value", "children")
+
+    def __init__(self):
+        self.visits = 0
+        self.value = 0.0
+        self.children: Dict[str, Hashable] = {}
+
+
+def _mcts(root: Any, budget: _Budget, table: TranspositionTable, heuristic: Optional[Heuristic],
+          batch_size: int, exploration: float = 1.4, rollout_depth: int = 30, seed: int = 0) -> Tuple[Optional[List[str]], str]:
+    """UCT search; nodes are shared through a transposition table keyed by state."""
+    rng = random.Random(seed)
+    start_score = root.score
+    nodes: Dict[Hashable, _MctsNode] = {root.state_key(): _MctsNode()}
+    best_solution: Optional[List[str]] = None
+    while True:
+        reason = budget.exhausted()
+        if reason:
+            break
+        budget.nodes += 1
+        game, path, keys = root.clone(), [], [root.state_key()]
+        # Selection and expansion (depth-capped, since transpositions can form cycles).
+        while game.state == NOT_FINISHED and len(path) < 4 * rollout_depth:
+            node = nodes[keys[-1]]
+            untried = [a for a in game.available_actions if a not in node.children]
+            if untried:
+                action = rng.choice(untried)
+            else:
+                action = max(node.children, key=lambda a: _uct(nodes[node.children[a]], node.visits, exploration))
+            game.apply_action(action)
+            path.append(action)
+            key = game.state_key()
+            if key in nodes and action not in node.children:
+                table.hits += 1
+            node.children[action] = key
+            new_node = key not in nodes
+            nodes.setdefault(key, _MctsNode())
+            keys.append(key)
+            if _is_goal(game, start_score) or new_node:
+                break
+        # Rollout.
+        reward = 0.0
+        if _is_goal(game, start_score):
+            reward = 1.0
+            if best_solution is None or len(path) < len(best_solution):
+                best_solution = list(path)
+        else:
+            rollout = game.clone()
+            rollout_actions: List[str] = []
+            for _ in range(rollout_depth):
+                if rollout.state != NOT_FINISHED:
+                    break
+                action = rng.choice(rollout.available_actions)
+                rollout.apply_action(action)
+                rollout_actions.append(action)
+                if _is_goal(rollout, start_score):
+                    reward = 0.99 ** len(rollout_actions)
+                    candidate = path + rollout_actions
+                    if best_solution is None or len(candidate) < len(best_solution):
+                        best_solution = candidate
+                    break
+            else:
+                if heuristic:
+                    reward = 0.5 / (1.0 + heuristic([rollout])[0])
+        # Backpropagation.
+        for key in keys:
+            nodes[key].visits += 1
+            nodes[key].value += reward
+        if best_solution is not None and len(best_solution) <= len(path):
+            return best_solution, "solved"
+    if best_solution is not None:
+        return best_solution, "solved"
+    return None, reason
+
+
+def _uct(child: _MctsNode, parent_visits: int, exploration: float) -> float:
+    if child.visits == 0:
+        return math.inf
+    return child.value / child.visits + exploration * math.sqrt(math.log(parent_visits + 1) / child.visits)
+
+
+def _remove_cycles(root: Any, actions: List[str]) -> List[str]:
+    """Replays a solution and cuts any segment that returns to an earlier state."""
+    game = root.clone()
+    seen: Dict[Hashable, int] = {game.state_key(): 0}
+    kept: List[str] = []
+    for action in actions:
+        game.apply_action(action)
+        kept.append(action)
+        key = game.state_key()
+        if key in seen:
+            del kept[seen[key]:]
+        else:
+            seen[key] = len(kept)
+        seen = {k: depth for k, depth in seen.items() if depth <= len(kept)}
+    return kept
+
+
+_SEARCHERS = {"bfs": _bfs, "best_first": _best_first, "mcts": _mcts}
+
+
+def search(game: Any, strategy: str = "best_first", heuristic: Optional[Heuristic] = None,
+           max_nodes: int = 10000, time_limit_s: float = 5.0, batch_size: int = 32) -> SearchResult:
+    """Searches for an action sequence that raises the game's score (clears the current level).
+
+    `game` must provide clone(), apply_action(action), state_key(), available_actions,
+    and `state`/`score` attributes, as `arc_sim.GridWorldGame` does.
+    """
+    if strategy not in _SEARCHERS:
+        raise ValueError(f"Unknown search strategy '{strategy}'. Choose from {STRATEGIES}.")
+    start_time = time.perf_counter()
+    budget = _Budget(max_nodes, time_limit_s)
+    table = TranspositionTable()
+    actions, stop_reason = _SEARCHERS[strategy](game.clone(), budget, table, heuristic, batch_size)
+    if actions:
+        actions = _remove_cycles(game, actions)
+    result = SearchResult(
+        strategy=strategy,
+        solved=actions is not None,
+        actions=actions or [],
+        nodes_expanded=budget.nodes,
+        transposition_hits=table.hits,
+        elapsed_s=time.perf_counter() - start_time,
+        stop_reason=stop_reason,
+    )
+    logger.info("%s search: solved=%s in %s actions, %s nodes, %s transpositions, %.3fs.", strategy, result.solved,
+                len(result.actions), result.nodes_expanded, result.transposition_hits, result.elapsed_s)
+    return result
+
+
+def _search_game_impl(frame_json: str, strategy: str = "best_first", max_nodes: int = 5000,
+                      time_limit_s: float = 5.0, player_color: int = 3, goal_color: int = 4,
+                      wall_colors: str = "5") -> str:
+    """Plans the moves (ACTION1-4) that take the player to the goal in a grid frame using local tree search.
+
+    Colours identify the player, the goal and (comma-separated) wall colours. Returns JSON with the
+    action sequence, whether the goal was reached, and search statistics.
+    """
+    try:
+        walls = tuple(int(c) for c in str(wall_colors).split(",") if c.strip())
+        game = GridWorldGame.from_grid(GridFrame.from_json(frame_json).cells, player_color=player_color,
+                                       goal_color=goal_color, wall_colors=walls, max_actions=max_nodes)
+        heuristic = manhattan_heuristic if strategy != "bfs" else None
+        result = search(game, strategy=strategy, heuristic=heuristic, max_nodes=max_nodes, time_limit_s=time_limit_s)
+        return json.dumps(result.model_dump())
+    except (ValueError, TypeError, IndexError, OverflowError, json.JSONDecodeError) as e:
+        logger.error("Tool `_search_game_impl`: %s", e)
+        return f"Error searching game state: {e}"
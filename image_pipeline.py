@@ -0,0 +1,163 @@
+import asyncio
+import hashlib
+import io
+import json
+import logging
+import mimetypes
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from google.genai import types as adk_types
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; without it images are cached and deduplicated but not re-encoded.
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+IMAGE_MAX_DIM = int(os.getenv("IMAGE_MAX_DIM", 1024))
+IMAGE_FORMAT = os.getenv("IMAGE_FORMAT", "PNG").upper()
+IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", 85))
+# Nearest-neighbour keeps cell boundaries crisp on ARC grid screenshots; use "lanczos" for photos.
+IMAGE_RESAMPLE = os.getenv("IMAGE_RESAMPLE", "nearest").lower()
+IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR", ".image_cache")
+
+_FORMAT_MIME_TYPES = {"PNG": "image/png", "JPEG": "image/jpeg", "WEBP": "image/webp", "GIF": "image/gif"}
+
+
+class ImagePipeline:
+    """Downsamples, re-encodes and caches objective images.
+
+    The source file is identified by (path, mtime, size) -> content hash, so an
+    unchanged file is neither re-read nor re-hashed after the first run. Processed
+    bytes are cached on disk by content hash and processing settings, which also
+    deduplicates the same image referenced under different paths.
+    """
+
+    def __init__(self, cache_dir: str = IMAGE_CACHE_DIR, max_dim: int = IMAGE_MAX_DIM,
+                 image_format: str = IMAGE_FORMAT, quality: int = IMAGE_QUALITY,
+                 resample: str = IMAGE_RESAMPLE):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_dim = max_dim
+        self.image_format = image_format
+        self.quality = quality
+        self.resample = resample
+        self._index_path = self.cache_dir / "index.json"
+        self._index: Dict[str, str] = self._load_index()
+        self._index_lock = threading.Lock()
+        self._memory: Dict[str, Tuple[str, bytes]] = {}
+        self.stats = {"hits": 0, "misses": 0, "bytes_in": 0, "bytes_out": 0}
+
+    def _load_index(self) -> Dict[str, str]:
+        try:
+            return json.loads(self._index_path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_index(self) -> None:
+        tmp_path = self._index_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self._index), encoding="utf-8")
+        os.replace(tmp_path, self._index_path)
+
+    @property
+    def _settings_key(self) -> str:
+        return f"{self.max_dim}-{self.image_format}-{self.quality}-{self.resample}"
+
+    def _cache_paths(self, digest: str) -> Tuple[Path, Path]:
+        base = self.cache_dir / f"{digest}-{self._settings_key}"
+        return base.with_suffix(".bin"), base.with_suffix(".mime")
+
+    def _process(self, data: bytes, source_mime: str) -> Tuple[str, bytes]:
+        """Resizes and re-encodes image bytes, keeping the original if that is smaller."""
+        if Image is None:
+            return source_mime, data
+        resample = Image.Resampling.LANCZOS if self.resample == "lanczos" else Image.Resampling.NEAREST
+        with Image.open(io.BytesIO(data)) as img:
+            resized = max(img.size) > self.max_dim
+            if resized:
+                img.thumbnail((self.max_dim, self.max_dim), resample)
+            if self.image_format == "JPEG" and img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+            out = io.BytesIO()
+            save_kwargs = {"optimize": True}
+            if self.image_format in ("JPEG", "WEBP"):
+                save_kwargs["quality"] = self.quality
+            img.save(out, format=self.image_format, **save_kwargs)
+        processed = out.getvalue()
+        if not resized and len(processed) >= len(data):
+            return source_mime, data
+        return _FORMAT_MIME_TYPES.get(self.image_format, source_mime), processed
+
+    def _load_sync(self, path: str) -> Optional[Tuple[str, str, bytes]]:
+        """Returns (digest, mime_type, bytes) for an image file, using the caches where possible."""
+        stat = os.stat(path)
+        source_key = f"{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}"
+        digest = self._index.get(source_key)
+        if digest is not None:
+            if digest in self._memory:
+                self.stats["hits"] += 1
+                return (digest, *self._memory[digest])
+            data_path, mime_path = self._cache_paths(digest)
+            if data_path.exists() and mime_path.exists():
+                self.stats["hits"] += 1
+                self._memory[digest] = (mime_path.read_text(encoding="utf-8"), data_path.read_bytes())
+                return (digest, *self._memory[digest])
+
+        source_mime, _ = mimetypes.guess_type(path)
+        if not source_mime or not source_mime.startswith("image"):
+            logger.warning("Could not determine image MIME type for '%s'.", path)
+            return None
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        with self._index_lock:
+            self._index[source_key] = digest
+            self._save_index()
+        data_path, mime_path = self._cache_paths(digest)
+        if data_path.exists() and mime_path.exists():
+            self.stats["hits"] += 1
+            self._memory[digest] = (mime_path.read_text(encoding="utf-8"), data_path.read_bytes())
+            return (digest, *self._memory[digest])
+
+        self.stats["misses"] += 1
+        mime_type, processed = self._process(data, source_mime)
+        data_path.write_bytes(processed)
+        mime_path.write_text(mime_type, encoding="utf-8")
+        self.stats["bytes_in"] += len(data)
+        self.stats["bytes_out"] += len(processed)
+        logger.info("Processed image '%s': %s -> %s bytes (%s).", path, len(data), len(processed), mime_type)
+        self._memory[digest] = (mime_type, processed)
+        return digest, mime_type, processed
+
+    async def load(self, path: str) -> Optional[Tuple[str, adk_types.Part]]:
+        """Loads one image off the event loop. Returns (content digest, Part) or None."""
+        try:
+            result = await asyncio.to_thread(self._load_sync, path)
+        except Exception as e:
+            logger.error("Failed to load image file '%s': %s", path, e)
+            return None
+        if result is None:
+            return None
+        digest, mime_type, data = result
+        return digest, adk_types.Part(inline_data=adk_types.Blob(mime_type=mime_type, data=data))
+
+    async def load_many(self, paths: List[str]) -> Dict[str, Optional[adk_types.Part]]:
+        """Loads images concurrently, returning {path: Part}.
+
+        A path whose content duplicates an earlier path maps to None so each image is
+        attached only once; unreadable or non-image paths are omitted.
+        """
+        results = await asyncio.gather(*(self.load(p) for p in paths))
+        seen = set()
+        parts: Dict[str, Optional[adk_types.Part]] = {}
+        for path, result in zip(paths, results):
+            if result is None:
+                continue
+            digest, part = result
+            parts[path] = None if digest in seen else part
+            seen.add(digest)
+        return parts
@@ -0,0 +1,110 @@
+import argparse
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks import compare_results, git_short_commit
+
+logger = logging.getLogger(__name__)
+
+IMPORT_PROFILE_HISTORY = os.getenv("IMPORT_PROFILE_HISTORY", "traces/import_times.jsonl")
+IMPORT_PROFILE_MODULES = ["agent_tools", "artifact_store", "system_agents", "main_orchestrator"]
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Parses `python -X importtime` output into entries with self and cumulative microseconds."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # The header line.
+        name = fields[2].rstrip()
+        entries.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip())) // 2,
+            "self_us": int(fields[0]),
+            "cumulative_us": int(fields[1]),
+        })
+    return entries
+
+
+def profile_import(module: str, repeats: int = 5, cwd: Optional[str] = None) -> Dict[str, Any]:
+    """Imports `module` in `repeats` fresh interpreters; returns the median time and the slowest imports."""
+    runs = []
+    for _ in range(repeats):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                                capture_output=True, text=True, cwd=cwd)
+        if result.returncode != 0:
+            raise RuntimeError(f"Importing {module} failed: {result.stderr.strip().splitlines()[-1:]}")
+        entries = parse_importtime(result.stderr)
+        total = next((e["cumulative_us"] for e in entries if e["module"] == module and e["depth"] == 0), 0)
+        runs.append((total, entries))
+    runs.sort(key=lambda run: run[0])
+    median_total, median_entries = runs[len(runs) // 2]
+    slowest = sorted(median_entries, key=lambda e: e["self_us"], reverse=True)[:10]
+    return {
+        "module": module,
+        "median_ms": median_total / 1000,
+        "min_ms": runs[0][0] / 1000,
+        "stdev_ms": statistics.pstdev(total for total, _ in runs) / 1000,
+        "modules_imported": len(median_entries),
+        "slowest_self_ms": {e["module"]: e["self_us"] / 1000 for e in slowest},
+    }
+
+
+def load_history(path: str = IMPORT_PROFILE_HISTORY) -> List[Dict[str, Any]]:
+    if not Path(path).exists():
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def append_history(record: Dict[str, Any], path: str = IMPORT_PROFILE_HISTORY) -> None:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def compare(previous: Dict[str, Any], current: Dict[str, Any], max_regression_pct: float) -> List[str]:
+    """Modules whose median import time grew by more than `max_regression_pct` since `previous`."""
+    rows = compare_results(previous, current, max_regression_pct, noise_floor_ms=0.0, metric="median_ms", ms_per_unit=1.0)
+    return [f"{row['name']}: {row['baseline']:.1f}ms -> {row['current']:.1f}ms (+{row['change_pct']:.0f}%)"
+            for row in rows if row["regression"]]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Profile module import times with -X importtime and track them over time.")
+    parser.add_argument("modules", nargs="*", default=IMPORT_PROFILE_MODULES, help="Modules to import.")
+    parser.add_argument("--repeats", type=int, default=5, help="Fresh interpreters per module; the median is kept.")
+    parser.add_argument("--history", default=IMPORT_PROFILE_HISTORY, help="JSONL file the results are appended to.")
+    parser.add_argument("--max-regression", type=float, default=None, metavar="PCT",
+                        help="Exit with status 1 if a module got more than PCT%% slower than the previous run.")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+    args = parser.parse_args()
+
+    record = {"timestamp": time.time(), "commit": git_short_commit(), "python": sys.version.split()[0],
+              "results": {module: profile_import(module, args.repeats) for module in args.modules}}
+    history = load_history(args.history)
+    if args.json:
+        print(json.dumps(record, indent=2))
+    else:
+        previous = history[-1]["results"] if history else {}
+        print(f"{'module':<24}{'median_ms':>12}{'previous_ms':>14}{'modules':>10}  slowest (self ms)")
+        for module, result in record["results"].items():
+            before = previous.get(module, {}).get("median_ms")
+            slowest = ", ".join(f"{name} {ms:.0f}" for name, ms in list(result["slowest_self_ms"].items())[:3])
+            print(f"{module:<24}{result['median_ms']:>12.1f}{(f'{before:.1f}' if before else '-'):>14}{result['modules_imported']:>10}  {slowest}")
+    append_history(record, args.history)
+    if args.max_regression is not None and history:
+        regressions = compare(history[-1], record, args.max_regression)
+        for regression in regressions:
+            print(f"Import time regression: {regression}")
+        sys.exit(1 if regressions else 0)
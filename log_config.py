@@ -0,0 +1,136 @@
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional, TextIO
+
+import colorlog
+
+LOGGING_LEVEL = os.getenv("LOGGING_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "color") # color or json (one object per line)
+LOG_MAX_MESSAGE_CHARS = int(os.getenv("LOG_MAX_MESSAGE_CHARS", 4000)) # Longer messages are cut; 0 disables the cap
+LOG_QUEUE_ENABLED = os.getenv("LOG_QUEUE_ENABLED", "true").lower() == "true"
+
+LOG_COLORS = {
+    'DEBUG':    'cyan',
+    'INFO':     'green',
+    'WARNING':  'yellow',
+    'ERROR':    'red',
+    'CRITICAL': 'red,bg_white',
+}
+
+# Attributes every LogRecord has; anything else was passed with `extra=` and goes into the JSON output.
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "taskName"}
+
+_listener: Optional[QueueListener] = None
+_listener_pid: Optional[int] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as single-line JSON objects, including any `extra=` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "process": record.process,
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES})
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class PayloadCapFilter(logging.Filter):
+    """Cuts messages longer than `max_chars` so a stray state dump or tool output cannot flood the log."""
+
+    def __init__(self, max_chars: int = LOG_MAX_MESSAGE_CHARS):
+        super().__init__()
+        self.max_chars = max_chars
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        message = record.getMessage()
+        if 0 < self.max_chars < len(message):
+            message = f"{message[:self.max_chars]}... [{len(message) - self.max_chars} chars truncated]"
+        # Merged once here, so later handlers and the queue do not format the args again.
+        record.msg = message
+        record.args = None
+        return True
+
+
+class _LocalQueueHandler(QueueHandler):
+    """Hands records to the listener thread with the message merged but the traceback kept apart."""
+
+    def __init__(self, log_queue: queue.SimpleQueue, target: logging.Handler):
+        super().__init__(log_queue)
+        self.target = target
+        self.pid = os.getpid()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if os.getpid() != self.pid:
+            # A forked process (pool worker, pre-screen worker) has no listener thread: write directly.
+            self.target.handle(record)
+        else:
+            super().emit(record)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Args may be mutable objects (session state), so they are merged before the caller moves on.
+        record = copy.copy(record)
+        record.message = record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def make_formatter(fmt: str = LOG_FORMAT) -> logging.Formatter:
+    if fmt == "json":
+        return JsonFormatter()
+    return colorlog.ColoredFormatter('%(log_color)s%(asctime)s - %(name)s - %(levelname)s - %(message)s', log_colors=LOG_COLORS)
+
+
+def configure_logging(level: str = LOGGING_LEVEL, fmt: str = LOG_FORMAT, use_queue: bool = LOG_QUEUE_ENABLED,
+                      max_chars: int = LOG_MAX_MESSAGE_CHARS, stream: Optional[TextIO] = None) -> None:
+    """Replaces the root handlers with one that writes `fmt` records to `stream` (stderr by default).
+
+    With `use_queue`, callers only put records on an in-memory queue and a listener thread does the
+    formatting and I/O, so logging never blocks the asyncio loop on a slow terminal or pipe. The
+    listener thread does not survive a fork: a forked child writes synchronously until it calls this again.
+    """
+    global _listener, _listener_pid
+    stop_logging()
+    stream_handler = colorlog.StreamHandler(stream)
+    stream_handler.setFormatter(make_formatter(fmt))
+    root_logger = logging.getLogger()
+    root_logger.setLevel(level)
+    root_logger.handlers.clear()
+    if use_queue:
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        handler: logging.Handler = _LocalQueueHandler(log_queue, stream_handler)
+        _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+        _listener.start()
+        _listener_pid = os.getpid()
+    else:
+        handler = stream_handler
+    handler.addFilter(PayloadCapFilter(max_chars))
+    root_logger.addHandler(handler)
+
+
+def stop_logging() -> None:
+    """Writes out queued records and stops the listener thread, if this process started one."""
+    global _listener, _listener_pid
+    if _listener is not None and _listener_pid == os.getpid():
+        _listener.stop()
+    _listener = None
+    _listener_pid = None
+
+
+atexit.register(stop_logging)
@@ -2,49 +2,40 @@ import asyncio
 import logging
 import multiprocessing
 import os
+import queue
 import shutil
 import subprocess
 import sys
 import time
 import traceback
-import random
 import argparse
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
+from collections import deque
 from queue import Empty as QueueEmptyException
 
-import colorlog
 import git
 from dotenv import load_dotenv
 from git.exc import GitCommandError, InvalidGitRepositoryError, NoSuchPathError
 
+from agent_archive import SELECTION_STRATEGIES, AgentArchive, AgentRecord
+from batch_jobs import BATCH_MAX_ATTEMPTS, BATCH_RESULTS_PATH, BATCH_WORKERS, FINAL_STATUSES, BatchJob, JobLedger, JobResult, load_jobs
+from eval_cache import EvaluationCache, evaluation_key
+from eval_harness import EVAL_PROMOTION_PERCENTILE, promotion_threshold
+from log_config import configure_logging, stop_logging
+from metrics import (BATCH_JOBS, CANDIDATES_EVALUATED, CHILD_RESTARTS, CYCLES, IPC_QUEUE_DEPTH, METRICS_PORT, REGISTRY as METRICS,
+                     ROLLBACKS, start_metrics_server)
+from prescreen import PRESCREEN_ENABLED, PrescreenWorker
+from resource_monitor import CHILD_WALL_LIMIT_S, ResourceMonitor, apply_limits
+from tracing import TRACER, traced
+
 # Load environment variables from .env file
 load_dotenv()
 
-# Configure logging with color
+# Route logging through a queue listener thread (colored or JSON, see log_config.py)
 LOGGING_LEVEL = os.getenv("LOGGING_LEVEL", "INFO").upper()
 THIRD_PARTY_LOGGING_LEVEL = os.getenv("THIRD_PARTY_LOGGING_LEVEL", "WARNING").upper()
-
-handler = colorlog.StreamHandler()
-handler.setFormatter(colorlog.ColoredFormatter(
-    '%(log_color)s%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    log_colors={
-        'DEBUG':    'cyan',
-        'INFO':     'green',
-        'WARNING':  'yellow',
-        'ERROR':    'red',
-        'CRITICAL': 'red,bg_white',
-    }
-))
-
-# Configure root logger explicitly to override any library settings
-root_logger = logging.getLogger()
-root_logger.setLevel(LOGGING_LEVEL)
-
-# Clear any existing handlers and add our colored handler
-if root_logger.hasHandlers():
-    root_logger.handlers.clear()
-root_logger.addHandler(handler)
+configure_logging(level=LOGGING_LEVEL)
 
 # Get the main orchestrator logger and set its level explicitly
 logger = logging.getLogger("MainOrchestrator")
@@ -55,8 +46,8 @@ third_party_loggers = ["httpcore", "httpx", "google_adk", "google_genai", "git",
 for lib_name in third_party_loggers:
     logging.getLogger(lib_name).setLevel(THIRD_PARTY_LOGGING_LEVEL)
 
-logger.info(f"Application logging level set to {LOGGING_LEVEL}")
-logger.info(f"Third-party library logging level set to {THIRD_PARTY_LOGGING_LEVEL}")
+logger.info("Application logging level set to %s", LOGGING_LEVEL)
+logger.info("Third-party library logging level set to %s", THIRD_PARTY_LOGGING_LEVEL)
 
 # --- Configuration ---
 SYSTEM_AGENTS_FILE = Path(os.getenv("SYSTEM_AGENTS_FILE", "system_agents.py"))
@@ -66,6 +57,11 @@ GIT_COMMIT_USER_NAME = os.getenv("GIT_COMMIT_USER_NAME", "AdaptiveAgentSystem")
 GIT_COMMIT_USER_EMAIL = os.getenv("GIT_COMMIT_USER_EMAIL", "agent@example.com")
 MAX_CHILD_RESTARTS = int(os.getenv("MAX_CHILD_RESTARTS", 3)) # Max restarts before giving up on a failed state
 CHILD_PROCESS_TIMEOUT_SECONDS = int(os.getenv("CHILD_PROCESS_TIMEOUT_SECONDS", 300)) # Timeout for child process operations
+PARENT_SELECTION_STRATEGY = os.getenv("PARENT_SELECTION_STRATEGY", "dgm") # dgm, weighted or uniform
+TOKEN_COST_PER_MILLION = float(os.getenv("TOKEN_COST_PER_MILLION", 0.0)) # USD per million tokens, for tag cost figures
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", 2)) # Candidates waiting between the mutation and evaluation stages
+PIPELINE_WORKTREE_DIR = Path(os.getenv("PIPELINE_WORKTREE_DIR", ".worktrees"))
+PIPELINE_CHECKOUT_ATTEMPTS = int(os.getenv("PIPELINE_CHECKOUT_ATTEMPTS", 3)) # A candidate that cannot be checked out this often is dropped
 
 # --- Git Helper Functions ---
 def get_git_repo() -> Optional[git.Repo]:
@@ -85,12 +81,13 @@ def get_git_repo() -> Optional[git.Repo]:
                 repo.index.commit("Initial commit with .gitignore")
             return repo
         except GitCommandError as e:
-            logger.error(f"Failed to initialize Git repository: {e}")
+            logger.error("Failed to initialize Git repository: %s", e)
             return None
     except Exception as e:
-        logger.error(f"Error getting Git repository: {e}")
+        logger.error("Error getting Git repository: %s", e)
         return None
 
+@traced(category="git")
 def git_commit_files(files: List[Path], message: str) -> bool:
     """Adds and commits specified files."""
     repo = get_git_repo()
@@ -99,12 +96,13 @@ def git_commit_files(files: List[Path], message: str) -> bool:
     try:
         repo.index.add([str(f) for f in files])
         repo.index.commit(message)
-        logger.info(f"Committed {files} with message: {message}")
+        logger.info("Committed %s with message: %s", files, message)
         return True
     except GitCommandError as e:
-        logger.error(f"Failed to commit files: {e}")
+        logger.error("Failed to commit files: %s", e)
         return False
 
+@traced(category="git")
 def git_get_current_commit_hash() -> Optional[str]:
     """Gets the current commit hash."""
     repo = get_git_repo()
@@ -113,36 +111,54 @@ def git_get_current_commit_hash() -> Optional[str]:
     try:
         return repo.head.commit.hexsha
     except Exception as e:
-        logger.error(f"Could not get current commit hash: {e}")
+        logger.error("Could not get current commit hash: %s", e)
         return None
 
-def git_tag_commit(tag_name: str, message: Optional[str] = None) -> bool:
-    """Tags the current commit."""
+@traced(category="git")
+def git_tag_commit(tag_name: str, message: Optional[str] = None, ref: str = "HEAD") -> bool:
+    """Tags the current commit (or `ref`)."""
     repo = get_git_repo()
     if not repo:
         return False
     try:
-        repo.create_tag(tag_name, message=message)
-        logger.info(f"Tagged current commit with: {tag_name}")
+        repo.create_tag(tag_name, ref=ref, message=message)
+        logger.info("Tagged current commit with: %s", tag_name)
         return True
     except GitCommandError as e:
-        logger.error(f"Failed to tag commit: {e}")
+        logger.error("Failed to tag commit: %s", e)
+        return False
+
+@traced(category="git")
+def git_update_tag_message(tag_name: str, message: str) -> bool:
+    """Replaces the message of an existing tag, keeping it on the same commit."""
+    repo = get_git_repo()
+    if not repo:
+        return False
+    try:
+        commit = repo.tags[tag_name].commit
+        repo.create_tag(tag_name, ref=commit, message=message, force=True)
+        logger.info("Updated message of tag: %s", tag_name)
+        return True
+    except (GitCommandError, IndexError, KeyError) as e:
+        logger.error("Failed to update tag %s: %s", tag_name, e)
         return False
 
+@traced(category="git")
 def git_rollback_files(files: List[Path], commit_hash_or_tag: str) -> bool:
     """Rolls back specified files to a given commit hash or tag."""
     repo = get_git_repo()
     if not repo:
         return False
     try:
-        logger.warning(f"Rolling back {files} to commit/tag: {commit_hash_or_tag}")
+        logger.warning("Rolling back %s to commit/tag: %s", files, commit_hash_or_tag)
         repo.git.checkout(commit_hash_or_tag, "--", *[str(f) for f in files])
         logger.info("Rollback successful.")
         return True
     except GitCommandError as e:
-        logger.error(f"Rollback failed: {e}")
+        logger.error("Rollback failed: %s", e)
         return False
 
+@traced(category="git")
 def git_get_tag_message(tag_name: str) -> Optional[str]:
     """Gets the message of a specific tag."""
     repo = get_git_repo()
@@ -152,44 +168,132 @@ def git_get_tag_message(tag_name: str) -> Optional[str]:
         tag = repo.tags[tag_name]
         return tag.tag.message
     except (KeyError, AttributeError):
-        logger.warning(f"Could not find tag or message for tag: {tag_name}")
+        logger.warning("Could not find tag or message for tag: %s", tag_name)
+        return None
+
+@traced(category="git")
+def git_show_file(revision: str, file_path: Path) -> Optional[str]:
+    """Returns the content of a file at a given revision."""
+    repo = get_git_repo()
+    if not repo:
+        return None
+    try:
+        content = repo.git.show(f"{revision}:{file_path.as_posix()}")
+    except GitCommandError as e:
+        logger.warning("Could not read %s at %s: %s", file_path, revision, e)
+        return None
+    return content if isinstance(content, str) else None
+
+@traced(category="git")
+def git_load_tag_messages(pattern: str = "agent-archive-*", names: Optional[List[str]] = None) -> Dict[str, str]:
+    """Reads the messages of all tags matching `pattern`, or of the tags in `names`, with a single git call."""
+    repo = get_git_repo()
+    if not repo:
+        return {}
+    refs = [f"refs/tags/{name}" for name in names] if names is not None else [f"refs/tags/{pattern}"]
+    try:
+        output = repo.git.for_each_ref(*refs, format="%(refname:strip=2)%00%(contents)%00")
+    except GitCommandError as e:
+        logger.error("Failed to list tag messages: %s", e)
+        return {}
+    if not isinstance(output, str):
+        return {}
+    fields = output.split("\0")
+    return {fields[i].strip(): fields[i + 1] for i in range(0, len(fields) - 1, 2) if fields[i].strip()}
+
+@traced(category="git")
+def git_worktree_checkout(path: Path, ref: str) -> bool:
+    """Checks `ref` out (detached) in a clean git worktree at `path`, creating the worktree if needed."""
+    repo = get_git_repo()
+    if not repo:
+        return False
+    try:
+        if (path / ".git").exists():
+            worktree = git.Repo(path)
+            worktree.git.checkout("--detach", "--force", ref)
+            worktree.git.clean("-fdx")
+        else:
+            repo.git.worktree("add", "--detach", "--force", str(path.resolve()), ref)
+        logger.info("Checked out %s in worktree %s", ref, path)
+        return True
+    except (GitCommandError, InvalidGitRepositoryError, NoSuchPathError) as e:
+        logger.error("Failed to check out %s in worktree %s: %s", ref, path, e)
+        return False
+
+@traced(category="git")
+def git_commit_worktree(path: Path, files: List[Path], message: str) -> Optional[str]:
+    """Commits files in a worktree and returns the new commit hash."""
+    try:
+        worktree = git.Repo(path)
+        worktree.index.add([str(f) for f in files if (path / f).exists()])
+        return worktree.index.commit(message).hexsha
+    except (GitCommandError, InvalidGitRepositoryError, NoSuchPathError) as e:
+        logger.error("Failed to commit in worktree %s: %s", path, e)
         return None
 
+def queue_depth(q: multiprocessing.Queue) -> int:
+    """Approximate number of queued messages; 0 where qsize() is unsupported (macOS)."""
+    try:
+        return q.qsize()
+    except NotImplementedError:
+        return 0
+
 # --- Child Process Target Function ---
-def child_process_target(ipc_queue: multiprocessing.Queue):
+def child_process_target(ipc_queue: multiprocessing.Queue, control_queue: Optional[multiprocessing.Queue] = None,
+                         cached_evaluation: Optional[dict] = None, mode: str = "full", workdir: Optional[str] = None,
+                         objective: Optional[str] = None):
     """
     This function is run by the child process.
-    It imports and runs the ADK agent loop from system_agents.py.
+    It imports and runs the ADK agent loop from system_agents.py (from `workdir`, e.g. a git worktree, if given).
+    A batch job passes its `objective`, which replaces input.md.
     """
+    configure_logging(level=LOGGING_LEVEL) # The parent's log listener thread is not inherited by a forked child.
     logger.info("Child Process: Started.")
+    apply_limits()
+    if workdir:
+        os.chdir(workdir)
+        sys.path.insert(0, os.path.abspath(workdir))
     try:
         # Ensure system_agents can be imported (it's in the same directory)
         # If system_agents.py has issues, this import will fail.
         import system_agents
         logger.info("Child Process: system_agents.py imported successfully.")
         # The main logic from system_agents.py
-        asyncio.run(system_agents.child_process_main(ipc_queue))
+        # Only pass the objective when there is one, so agent versions from before batch mode still load.
+        job_kwargs = {"objective": objective} if objective is not None else {}
+        asyncio.run(system_agents.child_process_main(ipc_queue, control_queue, cached_evaluation, mode, **job_kwargs))
         logger.info("Child Process: ADK loop completed.")
     except ImportError as e:
-        logger.error(f"Child Process: Failed to import system_agents.py. Error: {e}", exc_info=True)
+        logger.error("Child Process: Failed to import system_agents.py. Error: %s", e, exc_info=True)
         ipc_queue.put({"type": "critical_error", "message": f"ImportError in child: {e}", "details": traceback.format_exc()})
     except Exception as e:
-        logger.error(f"Child Process: Unhandled exception in ADK loop. Error: {e}", exc_info=True)
+        logger.error("Child Process: Unhandled exception in ADK loop. Error: %s", e, exc_info=True)
         ipc_queue.put({"type": "critical_error", "message": f"Unhandled exception in child: {e}", "details": traceback.format_exc()})
     finally:
         logger.info("Child Process: Exiting.")
+        stop_logging() # The child exits without running atexit hooks.
 
 
 # --- Main Orchestrator Logic ---
 class MainOrchestrator:
-    def __init__(self, run_once=False):
+    def __init__(self, run_once=False, selection_strategy: str = PARENT_SELECTION_STRATEGY):
         """Initializes the MainOrchestrator."""
         self.run_once = run_once
         self.child_process: Optional[multiprocessing.Process] = None
         self.ipc_queue: multiprocessing.Queue = multiprocessing.Queue()
+        self.control_queue: multiprocessing.Queue = multiprocessing.Queue() # Orchestrator -> child decisions
         self.current_commit_hash: Optional[str] = None
         self.last_good_commit_hash: Optional[str] = None
+        self.current_agent_tag: Optional[str] = None # Archive tag of the agent version the child is running
         self.restart_count = 0
+        # Parent -> child tree of archived agents, kept in sync with the tags incrementally.
+        self.archive = AgentArchive(strategy=selection_strategy)
+        self.eval_cache = EvaluationCache()
+        self.current_eval_key: Optional[str] = None # Cache key of the code/knowledge the child is running
+        self.prescreen_worker = PrescreenWorker() if PRESCREEN_ENABLED else None
+        self.resource_monitor: Optional[ResourceMonitor] = None
+        self.child_stop_reason: Optional[str] = None # Why the orchestrator killed the running child, if it did
+        self.metrics_server = None
         self.repo = get_git_repo()
         # Initial commit of agent files if they exist and are not yet committed
         # This helps establish a baseline.
@@ -199,7 +303,7 @@ class MainOrchestrator:
         if initial_files_to_commit:
             if git_commit_files(initial_files_to_commit, "Initial state of agent files"):
                 self.last_good_commit_hash = git_get_current_commit_hash()
-                logger.info(f"Initial commit successful. Last good commit: {self.last_good_commit_hash}")
+                logger.info("Initial commit successful. Last good commit: %s", self.last_good_commit_hash)
 
     def _list_agent_tags(self) -> List[str]:
         """Lists all agent archive tags."""
@@ -207,41 +311,96 @@ class MainOrchestrator:
             return []
         return [tag.name for tag in self.repo.tags if tag.name.startswith("agent-archive-")]
 
+    def _get_tag_record(self, tag_name: str) -> AgentRecord:
+        """Reads the structured metadata of a tag."""
+        return AgentRecord.from_message(git_get_tag_message(tag_name))
+
     def _get_performance_from_tag(self, tag_name: str) -> float:
         """Parses performance score from tag message."""
-        message = git_get_tag_message(tag_name)
-        if not message:
-            return 0.0
-        # This is a placeholder implementation. A more robust solution would
-        # parse a structured message, e.g., JSON.
-        try:
-            # Example message: "Agent self-modification: system_agents.py. Performance: 0.85"
-            performance_str = message.split("Performance:")[1].strip()
-            return float(performance_str)
-        except (IndexError, ValueError):
-            return 0.0
+        return self._get_tag_record(tag_name).score or 0.0
+
+    def _load_agent_records(self, tags: Optional[List[str]] = None) -> Dict[str, AgentRecord]:
+        """Bulk-loads the metadata of the given agent archive tags, or of all of them."""
+        return {tag: AgentRecord.from_message(message) for tag, message in git_load_tag_messages("agent-archive-*", tags).items()}
+
+    def _update_tag_record(self, tag_name: str, **changes) -> Optional[AgentRecord]:
+        """Rewrites a tag's metadata with `changes` applied."""
+        record = self._get_tag_record(tag_name).model_copy(update=changes)
+        if not git_update_tag_message(tag_name, record.to_message()):
+            return None
+        return record
+
+    def _record_usage(self, tag_name: Optional[str], usage: Optional[dict]):
+        """Adds a child run's wall time and token usage to an agent's tag metadata."""
+        if not tag_name or not usage:
+            return
+        record = self._get_tag_record(tag_name)
+        tokens = record.tokens + int(usage.get("tokens") or 0)
+        self._update_tag_record(
+            tag_name,
+            wall_time_s=record.wall_time_s + float(usage.get("wall_time_s") or 0.0),
+            tokens=tokens,
+            cost_usd=tokens * TOKEN_COST_PER_MILLION / 1_000_000,
+        )
+
+    def _record_resources(self, tag_name: Optional[str], figures: dict):
+        """Logs a child run's resource figures and adds them to an agent's tag metadata."""
+        logger.info("Child resources for %s: CPU %.1fs, peak RSS %.1f MB, max FDs %s, wall %.1fs.", tag_name or 'current state',
+                    figures['cpu_s'], figures['peak_rss_mb'], figures['max_fds'], figures['wall_time_s'])
+        if not tag_name:
+            return
+        record = self._get_tag_record(tag_name)
+        self._update_tag_record(
+            tag_name,
+            cpu_s=record.cpu_s + figures["cpu_s"],
+            peak_rss_mb=max(record.peak_rss_mb, figures["peak_rss_mb"]),
+            max_fds=max(record.max_fds, figures["max_fds"]),
+        )
+
+    def _finish_resource_accounting(self):
+        """Closes the running child's resource accounting, attributing it to the version it ran."""
+        if self.resource_monitor:
+            self._record_resources(self.current_agent_tag, self.resource_monitor.finish())
+            self.resource_monitor = None
+
+    def _check_child_resources(self):
+        """Samples the child; terminates it once it exceeds the wall-time limit."""
+        if not self.resource_monitor:
+            return
+        stats = self.resource_monitor.sample()
+        if stats and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Child %s resources: %s", self.resource_monitor.pid, stats)
+        if self.resource_monitor.over_wall_limit():
+            reason = f"Exceeded wall-time limit of {CHILD_WALL_LIMIT_S}s."
+            logger.error("Child process exceeded the wall-time limit of %ss. Terminating it.", CHILD_WALL_LIMIT_S)
+            if self.current_agent_tag:
+                self._update_tag_record(self.current_agent_tag, failure_reason=reason)
+            # Terminating clears child_process and its exit code, so the run loop needs the reason to fail the run.
+            self.child_stop_reason = reason
+            self.terminate_child_process()
+
+    def _sync_archive(self):
+        """Adds archive tags not yet known to the in-memory tree, loading only their metadata in one call."""
+        new_tags = [tag for tag in self._list_agent_tags() if tag not in self.archive]
+        if not new_tags:
+            return
+        # On the first sync every tag is new, and the pattern is shorter than listing them all.
+        records = self._load_agent_records(new_tags if len(self.archive) else None)
+        for tag in sorted(records):
+            if tag not in self.archive:
+                self.archive.add(tag, parent=records[tag].parent, score=records[tag].score or 0.0)
 
     def _select_parent_agent(self) -> Optional[str]:
         """Selects a parent agent from the archive."""
-        tags = self._list_agent_tags()
-        if not tags:
+        self._sync_archive()
+        if not len(self.archive):
             logger.info("No agent tags found, starting from current state.")
             return None
 
-        # This is a simplified selection logic. A more advanced implementation
-        # would use the formula from the DGM paper.
-        # For now, we'll do a weighted random selection based on performance.
-        weights = [self._get_performance_from_tag(tag) for tag in tags]
-        
-        # Add a small base weight to allow selection of zero-performance agents
-        weights = [w + 0.1 for w in weights]
-
-        try:
-            selected_tag = random.choices(tags, weights=weights, k=1)[0]
-            logger.info(f"Selected parent agent tag: {selected_tag}")
-            return selected_tag
-        except IndexError:
-            return None
+        selected_tag = self.archive.sample()
+        logger.info("Selected parent agent tag: %s (%s selection, weight %.4f, %s children)", selected_tag, self.archive.strategy,
+                    self.archive.weight(selected_tag), len(self.archive.children.get(selected_tag, [])))
+        return selected_tag
 
     def start_child_process(self, tag_name: Optional[str] = None):
         """
@@ -253,32 +412,42 @@ class MainOrchestrator:
             return
 
         if tag_name:
-            logger.info(f"Checking out agent version: {tag_name}")
+            logger.info("Checking out agent version: %s", tag_name)
             files_to_checkout = [SYSTEM_AGENTS_FILE, KNOWLEDGE_FILE]
             if not git_rollback_files(files_to_checkout, tag_name):
-                logger.error(f"Failed to checkout tag {tag_name}. Aborting child process start.")
+                logger.error("Failed to checkout tag %s. Aborting child process start.", tag_name)
                 return
+            self.current_agent_tag = tag_name
 
         logger.info("Main Orchestrator: Starting child ADK process...")
         try:
             # Ensure system_agents.py exists before trying to run it
             if not SYSTEM_AGENTS_FILE.exists():
-                logger.error(f"{SYSTEM_AGENTS_FILE} not found. Cannot start child process.")
+                logger.error("%s not found. Cannot start child process.", SYSTEM_AGENTS_FILE)
                 # Potentially create a dummy if PRD implies it should always exist
                 # For now, error out.
                 return
 
+            # Functionally identical candidates (or reverts to an earlier version) reuse their evaluation.
+            self.current_eval_key = evaluation_key(SYSTEM_AGENTS_FILE, KNOWLEDGE_FILE)
+            cached_evaluation = self.eval_cache.get(self.current_eval_key)
+            if cached_evaluation:
+                logger.info("Evaluation cache hit for %s: score=%s. Skipping offline evaluation.",
+                            self.current_agent_tag or 'current state', cached_evaluation.get('mean_score'))
+            # A fresh control queue so a previous child's pending decisions are not replayed.
+            self.control_queue = multiprocessing.Queue()
             self.child_process = multiprocessing.Process(
-                target=child_process_target, args=(self.ipc_queue,)
+                target=child_process_target, args=(self.ipc_queue, self.control_queue, cached_evaluation)
             )
             self.child_process.start()
-            logger.info(f"Child process started with PID: {self.child_process.pid}")
+            logger.info("Child process started with PID: %s", self.child_process.pid)
+            self.resource_monitor = ResourceMonitor(self.child_process.pid)
             self.current_commit_hash = git_get_current_commit_hash() # Hash before child runs
             if not self.last_good_commit_hash: # If not set by initial commit
                  self.last_good_commit_hash = self.current_commit_hash
             self.restart_count = 0 # Reset restart count on successful start
         except Exception as e:
-            logger.error(f"Failed to start child process: {e}", exc_info=True)
+            logger.error("Failed to start child process: %s", e, exc_info=True)
             self.child_process = None
 
 
@@ -290,13 +459,16 @@ class MainOrchestrator:
             message: The message dictionary received from the child.
         """
         msg_type = message.get("type")
-        logger.info(f"Main Orchestrator: Received message from child: {msg_type}")
-        logger.debug(f"Full message: {message}")
+        logger.info("Main Orchestrator: Received message from child: %s", msg_type)
+        logger.debug("Full message: %s", message)
 
         if msg_type == "modification_complete":
             file_path = message.get("file_path")
             status = message.get("status")
-            logger.info(f"Child reported modification of {file_path} with status: {status}")
+            logger.info("Child reported modification of %s with status: %s", file_path, status)
+            # The usage belongs to the agent version that made the modification.
+            self._record_usage(self.current_agent_tag, message.get("usage"))
+            self._finish_resource_accounting()
             
             # Commit changes to system_agents.py and knowledge.md
             # The LearningAgent might update knowledge.md in the same cycle
@@ -304,13 +476,22 @@ class MainOrchestrator:
             if SYSTEM_AGENTS_FILE.exists(): files_to_commit.append(SYSTEM_AGENTS_FILE)
             if KNOWLEDGE_FILE.exists(): files_to_commit.append(KNOWLEDGE_FILE)
 
-            if files_to_commit:
+            if SYSTEM_AGENTS_FILE in files_to_commit and not self._prescreen_modification():
+                # The candidate was rolled back; keep only what the Learner recorded.
+                if KNOWLEDGE_FILE.exists() and git_commit_files([KNOWLEDGE_FILE], "Pre-screen rejected a self-modification. See knowledge.md."):
+                    self.last_good_commit_hash = git_get_current_commit_hash()
+            elif files_to_commit:
                 commit_message = f"System self-modification. Executor updated: {file_path}. Learner may have updated knowledge.md."
                 if git_commit_files(files_to_commit, commit_message):
                     self.last_good_commit_hash = git_get_current_commit_hash()
-                    logger.info(f"Successfully committed changes. New last good commit: {self.last_good_commit_hash}")
+                    logger.info("Successfully committed changes. New last good commit: %s", self.last_good_commit_hash)
                     tag_name = f"agent-archive-{time.strftime('%Y%m%d-%H%M%S')}"
-                    git_tag_commit(tag_name, f"Agent self-modification: {file_path}")
+                    parent_tag = self.current_agent_tag
+                    record = AgentRecord(description=f"Agent self-modification: {file_path}", parent=parent_tag)
+                    if git_tag_commit(tag_name, record.to_message()):
+                        self.archive.add(tag_name, parent=parent_tag)
+                        # The restarted child runs (and scores) this new version.
+                        self.current_agent_tag = tag_name
                 else:
                     logger.error("Failed to commit changes after modification. Potential desync.")
             
@@ -322,22 +503,45 @@ class MainOrchestrator:
         elif msg_type == "critical_error":
             error_message = message.get("message", "Unknown error")
             details = message.get("details", "No details")
-            logger.error(f"Child reported critical error: {error_message}\nDetails:\n{details}")
+            logger.error("Child reported critical error: %s\nDetails:\n%s", error_message, details)
+            if self.current_agent_tag:
+                self._update_tag_record(self.current_agent_tag, failure_reason=str(error_message)[:500])
             self.handle_child_failure()
         
+        elif msg_type == "metrics":
+            METRICS.merge(message.get("metrics") or {})
+
+        elif msg_type == "evaluation_progress":
+            promote = self._decide_promotion(self.current_agent_tag, message)
+            self.control_queue.put({"type": "evaluation_decision", "continue": promote})
+
+        elif msg_type == "task_outcome" and message.get("status") == "offline_evaluation":
+            self._record_offline_evaluation(self.current_agent_tag, self.current_eval_key, message)
+
         elif msg_type == "task_outcome":
             status = message.get("status", "unknown")
             summary = message.get("output_summary", {})
-            logger.info(f"Child reported task outcome: Status={status}. Summary: {summary}")
+            logger.info("Child reported task outcome: Status=%s. Summary: %s", status, summary)
+            usage = message.get("usage") or {}
+            self._record_usage(self.current_agent_tag, usage)
             # Commit knowledge.md after every successful task outcome to record learning.
             if KNOWLEDGE_FILE.exists():
                 # A more robust solution would check if the file was actually modified.
                 # For now, we commit it to ensure the LearningAgent's analysis is saved.
                 if git_commit_files([KNOWLEDGE_FILE], f"Task Outcome: Status {status}. See knowledge.md for analysis."):
                     self.last_good_commit_hash = git_get_current_commit_hash()
-                    logger.info(f"Successfully committed knowledge.md. New last good commit: {self.last_good_commit_hash}")
+                    logger.info("Successfully committed knowledge.md. New last good commit: %s", self.last_good_commit_hash)
                     tag_name = f"task-complete-{time.strftime('%Y%m%d-%H%M%S')}"
-                    git_tag_commit(tag_name, f"Task outcome: {status}")
+                    tokens = int(usage.get("tokens") or 0)
+                    git_tag_commit(tag_name, AgentRecord(
+                        kind="task",
+                        description=f"Task outcome: {status}",
+                        parent=self.current_agent_tag,
+                        score=message.get("score"),
+                        wall_time_s=float(usage.get("wall_time_s") or 0.0),
+                        tokens=tokens,
+                        cost_usd=tokens * TOKEN_COST_PER_MILLION / 1_000_000,
+                    ).to_message())
                 else:
                     logger.warning("Failed to commit knowledge.md after task outcome.")
 
@@ -349,7 +553,69 @@ class MainOrchestrator:
             # For now, assume it means the current objective is done.
 
         else:
-            logger.warning(f"Received unknown message type from child: {msg_type}")
+            logger.warning("Received unknown message type from child: %s", msg_type)
+
+    def _decide_promotion(self, tag_name: Optional[str], message: dict) -> bool:
+        """Whether a candidate's partial score at an evaluation rung earns it the next rung."""
+        score = float(message.get("score", 0.0))
+        archive_scores = [s for tag, s in self.archive.scores.items() if tag != tag_name]
+        threshold = promotion_threshold(archive_scores, EVAL_PROMOTION_PERCENTILE)
+        promote = threshold is None or score >= threshold
+        logger.info("Evaluation rung %s/%s of %s: score=%.4f over %s tasks, threshold=%s. %s.", message.get('rung'), message.get('rungs'),
+                    tag_name or 'current state', score, message.get('episodes'), threshold,
+                    'Promoting to next rung' if promote else 'Stopping early')
+        return promote
+
+    def _record_offline_evaluation(self, tag_name: Optional[str], eval_key: Optional[str], message: dict):
+        """Caches an offline evaluation and records its score in the agent's tag and the archive."""
+        score = message.get("score")
+        summary = message.get("output_summary") or {}
+        logger.info("Offline evaluation of %s: score=%s. Summary: %s", tag_name or 'current state', score, summary)
+        if score is not None:
+            CANDIDATES_EVALUATED.inc()
+        # An early stop was relative to the archive at the time, so it is decided again rather than replayed.
+        if eval_key and score is not None and not summary.get("cached") and not summary.get("early_stopped"):
+            self.eval_cache.put(eval_key, summary, tag_name=tag_name)
+        if tag_name and score is not None:
+            # Record the fitness in the archive tag so parent selection can use it.
+            record = self._get_tag_record(tag_name)
+            changes = {}
+            if summary.get("early_stopped"):
+                changes["failure_reason"] = f"Stopped early after evaluation rung {summary.get('rungs_completed')}/{summary.get('rungs')}."
+            self._update_tag_record(
+                tag_name,
+                score=float(score),
+                task_scores={**record.task_scores, **(message.get("task_scores") or {})},
+                wall_time_s=record.wall_time_s + (0.0 if summary.get("cached") else float(summary.get("wall_time_s") or 0.0)),
+                **changes,
+            )
+            self.archive.update_score(tag_name, float(score))
+
+    def _prescreen_modification(self) -> bool:
+        """Screens the modified system_agents.py against the last good version before it is committed.
+
+        A rejected candidate is rolled back and the reason appended to knowledge.md for the LearningAgent.
+        """
+        if not self.prescreen_worker:
+            return True
+        old_source = git_show_file(self.last_good_commit_hash or "HEAD", SYSTEM_AGENTS_FILE)
+        if old_source is None:
+            return True
+        result = self.prescreen_worker.screen(old_source, SYSTEM_AGENTS_FILE.read_text(encoding="utf-8"))
+        if result.passed:
+            return True
+        logger.warning("Pre-screen rejected the modification of %s: %s", SYSTEM_AGENTS_FILE, result.summary())
+        if git_rollback_files([SYSTEM_AGENTS_FILE], self.last_good_commit_hash or "HEAD"):
+            ROLLBACKS.inc(reason="prescreen")
+        try:
+            with KNOWLEDGE_FILE.open("a", encoding="utf-8") as kf:
+                kf.write(f"\n\n## PRE-SCREEN REJECTION\n- Timestamp: {time.asctime()}\n"
+                         f"- Changed: {', '.join(result.changed[:20])}\n"
+                         f"- Reason: {result.summary()}\n"
+                         f"- {SYSTEM_AGENTS_FILE} was restored to {self.last_good_commit_hash or 'HEAD'}.\n")
+        except OSError as e:
+            logger.error("Failed to log pre-screen rejection to knowledge.md: %s", e)
+        return False
 
     def handle_child_failure(self):
         """
@@ -361,15 +627,16 @@ class MainOrchestrator:
             logger.critical("Child process failed during --run-once execution. Aborting.")
             sys.exit(1)
         if self.restart_count > MAX_CHILD_RESTARTS:
-            logger.critical(f"Child process failed {self.restart_count} times. Max restarts reached. Aborting.")
+            logger.critical("Child process failed %s times. Max restarts reached. Aborting.", self.restart_count)
             # Potentially notify admin or take other drastic actions
             sys.exit(1) # Exit orchestrator if child is unrecoverable
 
         if self.last_good_commit_hash and self.last_good_commit_hash != self.current_commit_hash:
-            logger.warning(f"Attempting rollback to last good commit: {self.last_good_commit_hash}")
+            logger.warning("Attempting rollback to last good commit: %s", self.last_good_commit_hash)
             files_to_rollback = [SYSTEM_AGENTS_FILE, KNOWLEDGE_FILE] # Rollback both
             if git_rollback_files(files_to_rollback, self.last_good_commit_hash):
                 logger.info("Rollback successful.")
+                ROLLBACKS.inc(reason="failure")
                 # The LearningAgent should be informed about this rollback in the next run.
                 # This could be done by writing to a status file or a specific section in knowledge.md
                 # before committing the rollback.
@@ -381,7 +648,7 @@ class MainOrchestrator:
                                  f"- Reason: Child process failure or critical error.\n")
                     git_commit_files([KNOWLEDGE_FILE], f"System Rollback: Logged failure and restored to {self.last_good_commit_hash[:7]}")
                 except Exception as e:
-                    logger.error(f"Failed to log rollback event to knowledge.md: {e}")
+                    logger.error("Failed to log rollback event to knowledge.md: %s", e)
             else:
                 logger.error("Rollback failed. System might be in an inconsistent state.")
                 # Critical error, might need manual intervention
@@ -389,15 +656,17 @@ class MainOrchestrator:
         else:
             logger.warning("No distinct last good commit to roll back to, or already at last good commit.")
 
-        logger.info(f"Restarting child process (Attempt {self.restart_count}/{MAX_CHILD_RESTARTS}).")
+        logger.info("Restarting child process (Attempt %s/%s).", self.restart_count, MAX_CHILD_RESTARTS)
+        CHILD_RESTARTS.inc()
         self.terminate_child_process()
         self.start_child_process()
 
 
     def terminate_child_process(self):
         """Terminates the child process gracefully, with a fallback to a force kill."""
+        self._finish_resource_accounting()
         if self.child_process and self.child_process.is_alive():
-            logger.info(f"Terminating child process PID: {self.child_process.pid}...")
+            logger.info("Terminating child process PID: %s...", self.child_process.pid)
             # Send SIGTERM first for graceful shutdown
             self.child_process.terminate()
             try:
@@ -407,41 +676,94 @@ class MainOrchestrator:
                     self.child_process.kill() # Force kill
                     self.child_process.join(timeout=5)
             except Exception as e:
-                logger.error(f"Error during child process termination: {e}")
+                logger.error("Error during child process termination: %s", e)
         if self.child_process and not self.child_process.is_alive():
              logger.info("Child process terminated.")
         self.child_process = None
 
 
+    def start_metrics_server(self, port: int = METRICS_PORT):
+        """Serves orchestrator and (pushed) child metrics in Prometheus text format, if a port is configured."""
+        if self.metrics_server is None:
+            try:
+                self.metrics_server = start_metrics_server(port)
+            except OSError as e:
+                logger.error("Could not start the metrics endpoint on port %s: %s", port, e)
+
+    def stop_metrics_server(self):
+        if self.metrics_server is not None:
+            self.metrics_server.shutdown()
+            self.metrics_server.server_close()
+            self.metrics_server = None
+
+    def _drain_child_messages(self) -> List[str]:
+        """Handles the messages an exited child left in the queue and returns their types; stops if one
+        of them starts a new child."""
+        child = self.child_process
+        handled = []
+        while self.child_process is child:
+            try:
+                message = self.ipc_queue.get(timeout=0.2)
+            except QueueEmptyException:
+                break
+            self.handle_child_message(message)
+            handled.append(message.get("type"))
+        return handled
+
     def run(self):
         """
         The main run loop for the orchestrator.
         Orchestrates the evolutionary loop of parent selection, execution, and versioning.
         """
         logger.info("Main Orchestrator started. Press Ctrl+C to exit.")
+        self.start_metrics_server()
+        if self.prescreen_worker:
+            self.prescreen_worker.start() # Warm up imports and record the baseline while the first child runs
 
+        cycle_span = None
         try:
             while True: # Main evolutionary loop
+                CYCLES.inc()
+                cycle_span = TRACER.start_span("evolution_cycle", category="orchestrator")
                 selected_tag = self._select_parent_agent()
+                cycle_span.set(parent_tag=selected_tag)
                 self.start_child_process(tag_name=selected_tag)
 
-                # Wait for the child process to complete or fail
-                while self.child_process and self.child_process.is_alive():
-                    try:
-                        message = self.ipc_queue.get(timeout=1.0)
-                        self.handle_child_message(message)
-                    except QueueEmptyException:
-                        pass
-                    time.sleep(0.1)
+                while True:
+                    # Wait for the child process to complete or fail
+                    while self.child_process and self.child_process.is_alive():
+                        try:
+                            message = self.ipc_queue.get(timeout=1.0)
+                            self.handle_child_message(message)
+                        except QueueEmptyException:
+                            pass
+                        IPC_QUEUE_DEPTH.set(queue_depth(self.ipc_queue))
+                        self._check_child_resources()
+                        time.sleep(0.1)
+                    # A child stopped at an early rung reports and exits at once; its last messages
+                    # belong to this cycle's agent, not to the parent selected next.
+                    finished_child = self.child_process
+                    drained = self._drain_child_messages()
+                    if self.child_process is finished_child:
+                        break
+                    # A drained message started a new child (e.g. after a self-modification): wait for it too.
 
                 # Post-run checks
-                if self.child_process: # If it was started
+                self._finish_resource_accounting()
+                if self.child_stop_reason:
+                    logger.warning("Child process was stopped: %s", self.child_stop_reason)
+                    self.child_stop_reason = None
+                    self.handle_child_failure()
+                elif self.child_process: # If it was started
                     exit_code = self.child_process.exitcode
-                    if exit_code != 0 and self.ipc_queue.empty():
-                        logger.warning(f"Child process exited unexpectedly with code: {exit_code}.")
+                    # A drained critical error already went through the failure handling.
+                    if exit_code != 0 and "critical_error" not in drained:
+                        logger.warning("Child process exited unexpectedly with code: %s.", exit_code)
                         self.handle_child_failure()
                     else:
                         logger.info("Child process finished its run.")
+                TRACER.end_span(cycle_span)
+                cycle_span = None
                 
                 # Optional: Add a delay between evolutionary cycles
                 time.sleep(5)
@@ -452,23 +774,378 @@ class MainOrchestrator:
         except KeyboardInterrupt:
             logger.info("Ctrl+C received. Shutting down Main Orchestrator...")
         finally:
+            if cycle_span is not None:
+                TRACER.end_span(cycle_span)
             self.terminate_child_process()
+            if self.prescreen_worker:
+                self.prescreen_worker.close()
+            self.stop_metrics_server()
             logger.info("Main Orchestrator shut down.")
 
 
+class _StageProcess:
+    """A child process running one pipeline stage in its own worktree, with its own queues."""
+
+    def __init__(self, mode: str, workdir: Path, cached_evaluation: Optional[dict] = None, objective: Optional[str] = None):
+        self.ipc_queue: multiprocessing.Queue = multiprocessing.Queue()
+        self.control_queue: multiprocessing.Queue = multiprocessing.Queue()
+        self.process = multiprocessing.Process(
+            target=child_process_target,
+            args=(self.ipc_queue, self.control_queue, cached_evaluation, mode, str(workdir), objective),
+            name=f"{mode}-stage",
+        )
+        self.process.start()
+        self.monitor = ResourceMonitor(self.process.pid)
+        logger.info("Started %s stage in %s (PID %s).", mode, workdir, self.process.pid)
+
+    def is_alive(self) -> bool:
+        return self.process.is_alive()
+
+    def messages(self, timeout: float = 0.0) -> List[dict]:
+        drained = []
+        while True:
+            try:
+                drained.append(self.ipc_queue.get(timeout=timeout) if timeout else self.ipc_queue.get_nowait())
+            except QueueEmptyException:
+                return drained
+
+    def stop(self):
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=10)
+            if self.process.is_alive():
+                self.process.kill()
+                self.process.join(timeout=5)
+
+
+class PipelinedEvolution:
+    """Runs mutation and evaluation as concurrent stages joined by a bounded queue of candidates.
+
+    The mutation stage checks a selected parent out in its own git worktree and runs only the
+    child's ADK loop there; each self-modification is committed to a `candidates/<timestamp>`
+    branch and queued once it passes the pre-screen, which runs in a worktree of its own. The
+    evaluation stage checks queued candidates out in a second worktree,
+    archives them as agent-archive tags and scores them offline. Mutation waits while the queue is
+    full, so neither stage runs more than one child at a time.
+    """
+
+    def __init__(self, orchestrator: MainOrchestrator, queue_size: int = PIPELINE_QUEUE_SIZE,
+                 worktree_dir: Path = PIPELINE_WORKTREE_DIR):
+        self.orchestrator = orchestrator
+        self.candidates: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.worktree_dir = worktree_dir
+        self.mutation: Optional[_StageProcess] = None
+        self.mutation_parent: Optional[str] = None
+        self.evaluation: Optional[_StageProcess] = None
+        self.evaluation_tag: Optional[str] = None
+        self.evaluation_key: Optional[str] = None
+        self.evaluated = 0
+        self.prescreen_worker = PrescreenWorker(root=str(worktree_dir / "prescreen")) if orchestrator.prescreen_worker else None
+
+    def _recover_candidates(self):
+        """Re-queues candidate branches left unevaluated by a previous run."""
+        repo = self.orchestrator.repo
+        if not repo:
+            return
+        for head in sorted(repo.heads, key=lambda h: h.name):
+            if head.name.startswith("candidates/") and not self.candidates.full():
+                record = AgentRecord.from_message(head.commit.message)
+                self.candidates.put_nowait({"name": head.name.split("/", 1)[1], "branch": head.name,
+                                            "commit": head.commit.hexsha, "parent": record.parent})
+                logger.info("Recovered unevaluated candidate %s.", head.name)
+
+    def _start_mutation(self):
+        parent = self.orchestrator._select_parent_agent()
+        path = self.worktree_dir / "mutate"
+        if not git_worktree_checkout(path, parent or "HEAD"):
+            return
+        self.mutation_parent = parent
+        self.mutation = _StageProcess("mutate", path)
+        CYCLES.inc()
+
+    def _handle_mutation_message(self, message: dict):
+        msg_type = message.get("type")
+        # The usage belongs to the parent version that ran the ADK loop.
+        self.orchestrator._record_usage(self.mutation_parent, message.get("usage"))
+        if msg_type == "modification_complete":
+            name = time.strftime('%Y%m%d-%H%M%S')
+            record = AgentRecord(description=f"Agent self-modification: {message.get('file_path')}", parent=self.mutation_parent)
+            commit = git_commit_worktree(self.worktree_dir / "mutate", [SYSTEM_AGENTS_FILE, KNOWLEDGE_FILE], record.to_message())
+            if not commit or not self.orchestrator.repo or not self._prescreen_candidate(commit):
+                return
+            branch = f"candidates/{name}"
+            self.orchestrator.repo.create_head(branch, commit)
+            self.candidates.put_nowait({"name": name, "branch": branch, "commit": commit, "parent": self.mutation_parent})
+            logger.info("Queued candidate %s from parent %s (%s waiting).", branch, self.mutation_parent or 'HEAD', self.candidates.qsize())
+        elif msg_type == "critical_error":
+            logger.error("Mutation stage from %s failed: %s", self.mutation_parent or 'HEAD', message.get('message'))
+        elif msg_type == "metrics":
+            METRICS.merge(message.get("metrics") or {})
+        elif msg_type == "task_outcome":
+            logger.info("Mutation stage from %s finished without a modification.", self.mutation_parent or 'HEAD')
+
+    def _prescreen_candidate(self, commit: str) -> bool:
+        """Screens a committed mutation against its parent, so a broken one never takes an evaluation slot.
+
+        The worker imports the candidate from its own worktree. Its baseline is taken on the parent
+        screened against when the worker (re)starts.
+        """
+        if not self.prescreen_worker:
+            return True
+        parent_ref = self.mutation_parent or "HEAD"
+        old_source = git_show_file(parent_ref, SYSTEM_AGENTS_FILE)
+        new_source = git_show_file(commit, SYSTEM_AGENTS_FILE)
+        if old_source is None or new_source is None:
+            return True
+        path = self.worktree_dir / "prescreen"
+        if not self.prescreen_worker.running and git_worktree_checkout(path, parent_ref):
+            self.prescreen_worker.start(wait=True)
+        if not git_worktree_checkout(path, commit):
+            logger.warning("Could not check out candidate %s for the pre-screen; queueing it unscreened.", commit)
+            return True
+        result = self.prescreen_worker.screen(old_source, new_source)
+        if result.passed:
+            return True
+        logger.warning("Pre-screen rejected the mutation of %s: %s", parent_ref, result.summary())
+        ROLLBACKS.inc(reason="prescreen")
+        return False
+
+    def _start_evaluation(self):
+        candidate = self.candidates.get_nowait()
+        path = self.worktree_dir / "evaluate"
+        if not git_worktree_checkout(path, candidate["commit"]):
+            candidate["checkout_failures"] = candidate.get("checkout_failures", 0) + 1
+            if candidate["checkout_failures"] < PIPELINE_CHECKOUT_ATTEMPTS:
+                logger.warning("Could not check out candidate %s (attempt %s/%s). Re-queueing it.",
+                               candidate["branch"], candidate["checkout_failures"], PIPELINE_CHECKOUT_ATTEMPTS)
+                self.candidates.put_nowait(candidate)
+                return
+            logger.error("Could not check out candidate %s after %s attempts. Dropping it and its branch.",
+                         candidate["branch"], PIPELINE_CHECKOUT_ATTEMPTS)
+            try:
+                if self.orchestrator.repo:
+                    self.orchestrator.repo.delete_head(candidate["branch"], force=True)
+            except GitCommandError as e:
+                logger.error("Error deleting branch %s: %s", candidate["branch"], e)
+            return
+        tag_name = f"agent-archive-{candidate['name']}"
+        record = AgentRecord(description=f"Agent self-modification: {SYSTEM_AGENTS_FILE}", parent=candidate["parent"])
+        if git_tag_commit(tag_name, record.to_message(), ref=candidate["commit"]):
+            self.orchestrator.archive.add(tag_name, parent=candidate["parent"])
+            # The tag now keeps the commit reachable.
+            self.orchestrator.repo.delete_head(candidate["branch"], force=True)
+        self.evaluation_tag = tag_name
+        self.evaluation_key = evaluation_key(path / SYSTEM_AGENTS_FILE, path / KNOWLEDGE_FILE)
+        self.evaluation = _StageProcess("evaluate", path, self.orchestrator.eval_cache.get(self.evaluation_key))
+
+    def _handle_evaluation_message(self, message: dict):
+        msg_type = message.get("type")
+        if msg_type == "evaluation_progress":
+            promote = self.orchestrator._decide_promotion(self.evaluation_tag, message)
+            self.evaluation.control_queue.put({"type": "evaluation_decision", "continue": promote})
+        elif msg_type == "task_outcome" and message.get("status") == "offline_evaluation":
+            self.orchestrator._record_offline_evaluation(self.evaluation_tag, self.evaluation_key, message)
+        elif msg_type == "metrics":
+            METRICS.merge(message.get("metrics") or {})
+        elif msg_type == "critical_error":
+            logger.error("Evaluation of %s failed: %s", self.evaluation_tag, message.get('message'))
+            self.orchestrator._update_tag_record(self.evaluation_tag, failure_reason=str(message.get("message"))[:500])
+
+    def _check_stage(self, stage: _StageProcess, tag_name: Optional[str]) -> bool:
+        """Samples a stage's resources and enforces the wall-time limit; returns whether it is still running."""
+        stage.monitor.sample()
+        if stage.monitor.over_wall_limit():
+            logger.error("Pipeline stage exceeded the wall-time limit of %ss. Terminating it.", CHILD_WALL_LIMIT_S)
+            if tag_name:
+                self.orchestrator._update_tag_record(tag_name, failure_reason=f"Exceeded wall-time limit of {CHILD_WALL_LIMIT_S}s.")
+            stage.stop()
+        alive = stage.is_alive()
+        if not alive:
+            self.orchestrator._record_resources(tag_name, stage.monitor.finish())
+        return alive
+
+    def step(self):
+        """Advances both stages: handles pending messages, retires finished children, starts new ones."""
+        if self.mutation:
+            alive = self._check_stage(self.mutation, self.mutation_parent)
+            for message in self.mutation.messages(timeout=0.0 if alive else 0.5):
+                self._handle_mutation_message(message)
+            if not alive:
+                self.mutation = None
+        if self.mutation is None and not self.candidates.full():
+            self._start_mutation()
+
+        if self.evaluation:
+            alive = self._check_stage(self.evaluation, self.evaluation_tag)
+            for message in self.evaluation.messages(timeout=0.0 if alive else 0.5):
+                self._handle_evaluation_message(message)
+            if not alive:
+                self.evaluation = None
+                self.evaluated += 1
+        if self.evaluation is None and not self.candidates.empty():
+            self._start_evaluation()
+        IPC_QUEUE_DEPTH.set(sum(queue_depth(stage.ipc_queue) for stage in (self.mutation, self.evaluation) if stage))
+
+    def run(self, max_candidates: Optional[int] = None):
+        """Runs the pipeline until interrupted or `max_candidates` candidates have been evaluated."""
+        logger.info("Pipelined evolution started (queue size %s). Press Ctrl+C to exit.", self.candidates.maxsize)
+        self.orchestrator.start_metrics_server()
+        self._recover_candidates()
+        try:
+            while max_candidates is None or self.evaluated < max_candidates:
+                self.step()
+                time.sleep(0.5)
+        except KeyboardInterrupt:
+            logger.info("Ctrl+C received. Shutting down the pipeline...")
+        finally:
+            for stage in (self.mutation, self.evaluation):
+                if stage:
+                    stage.stop()
+            if self.prescreen_worker:
+                self.prescreen_worker.close()
+            self.orchestrator.stop_metrics_server()
+            logger.info("Pipelined evolution shut down.")
+
+
+class BatchEvaluation:
+    """Runs one agent version on every objective of a JSONL queue with a pool of child workers.
+
+    Each worker slot has its own git worktree, reset to the agent's commit before every job, so
+    jobs cannot see each other's files or self-modifications. Every attempt is appended to the
+    results file as it finishes; a restarted batch skips jobs that already have a final result
+    and runs the rest again (see batch_jobs.JobLedger).
+    """
+
+    def __init__(self, orchestrator: MainOrchestrator, jobs_path: str, results_path: str = BATCH_RESULTS_PATH,
+                 workers: int = BATCH_WORKERS, agent_ref: str = "HEAD", max_attempts: int = BATCH_MAX_ATTEMPTS,
+                 worktree_dir: Path = PIPELINE_WORKTREE_DIR):
+        self.orchestrator = orchestrator
+        self.jobs = load_jobs(jobs_path)
+        self.agent_ref = agent_ref
+        # Pin the version once, so jobs started later still run the same agent if the ref moves.
+        self.agent_commit = orchestrator.repo.commit(agent_ref).hexsha if orchestrator.repo else None
+        self.ledger = JobLedger(results_path, max_attempts, self.agent_commit)
+        self.pending = deque(self.ledger.pending(self.jobs))
+        self.workers = max(1, workers)
+        self.worktree_dir = worktree_dir
+        self.running: Dict[int, dict] = {}
+
+    def _start_job(self, slot: int, job: BatchJob):
+        path = self.worktree_dir / f"batch-{slot}"
+        run = {"job": job, "stage": None, "started_at": time.time(), "status": None, "error": None, "usage": {}, "output": None}
+        self.running[slot] = run
+        if not git_worktree_checkout(path, self.agent_commit or self.agent_ref):
+            run["status"], run["error"] = "failed", f"Could not check out {self.agent_ref} in {path}."
+            return
+        run["stage"] = _StageProcess("job", path, objective=job.objective)
+        logger.info("Started job %s on worker %s (attempt %s, %s pending).", job.job_id, slot, self.ledger.attempts(job.job_id) + 1, len(self.pending))
+
+    def _handle_job_message(self, run: dict, message: dict):
+        msg_type = message.get("type")
+        if msg_type == "task_outcome":
+            run["status"], run["output"] = "completed", message.get("output_summary")
+            run["usage"] = message.get("usage") or {}
+        elif msg_type == "modification_complete":
+            # The agent changed itself; the job ends here and the change is discarded with the worktree.
+            run["status"], run["usage"] = "modified", message.get("usage") or {}
+        elif msg_type == "critical_error":
+            run["status"], run["error"] = "failed", str(message.get("message"))[:500]
+        elif msg_type == "metrics":
+            METRICS.merge(message.get("metrics") or {})
+
+    def _finish_job(self, slot: int):
+        run = self.running.pop(slot)
+        job: BatchJob = run["job"]
+        figures = run["stage"].monitor.finish() if run["stage"] else {}
+        status = run["status"] or "failed"
+        result = JobResult(
+            job_id=job.job_id,
+            status=status,
+            attempt=self.ledger.attempts(job.job_id) + 1,
+            agent_ref=self.agent_ref,
+            agent_commit=self.agent_commit,
+            worker=slot,
+            started_at=run["started_at"],
+            wall_time_s=run["usage"].get("wall_time_s") or figures.get("wall_time_s", 0.0),
+            tokens=run["usage"].get("tokens", 0),
+            cpu_s=figures.get("cpu_s", 0.0),
+            peak_rss_mb=figures.get("peak_rss_mb", 0.0),
+            output_summary=run["output"],
+            error=run["error"] or (None if run["status"] else "Child exited without reporting an outcome."),
+        )
+        self.ledger.record(result)
+        BATCH_JOBS.inc(status=status)
+        logger.info("Job %s finished on worker %s: %s in %.1fs.", job.job_id, slot, status, result.wall_time_s)
+        if status not in FINAL_STATUSES and not self.ledger.is_done(job.job_id):
+            self.pending.append(job)
+
+    def step(self):
+        """Collects messages and results from the workers and starts pending jobs on free ones."""
+        for slot, run in list(self.running.items()):
+            stage = run["stage"]
+            if stage is None:
+                self._finish_job(slot)
+                continue
+            stage.monitor.sample()
+            if stage.monitor.over_wall_limit():
+                logger.error("Job %s exceeded the wall-time limit of %ss. Terminating it.", run["job"].job_id, CHILD_WALL_LIMIT_S)
+                run["status"], run["error"] = "timeout", f"Exceeded wall-time limit of {CHILD_WALL_LIMIT_S}s."
+                stage.stop()
+            alive = stage.is_alive()
+            for message in stage.messages(timeout=0.0 if alive else 0.5):
+                self._handle_job_message(run, message)
+            if not alive:
+                self._finish_job(slot)
+        for slot in range(self.workers):
+            if slot not in self.running and self.pending:
+                self._start_job(slot, self.pending.popleft())
+        IPC_QUEUE_DEPTH.set(sum(queue_depth(run["stage"].ipc_queue) for run in self.running.values() if run["stage"]))
+
+    def run(self) -> Dict[str, int]:
+        """Runs until every job is done or the batch is interrupted; returns job counts by status."""
+        logger.info("Batch of %s jobs (%s already done) on %s (%s) with %s workers. Results: %s",
+                    len(self.jobs), len(self.jobs) - len(self.pending), self.agent_ref, self.agent_commit, self.workers, self.ledger.path)
+        self.orchestrator.start_metrics_server()
+        try:
+            while self.pending or self.running:
+                self.step()
+                time.sleep(0.5)
+        except KeyboardInterrupt:
+            logger.info("Ctrl+C received. Stopping the batch; unfinished jobs run again on resume.")
+        finally:
+            for run in self.running.values():
+                if run["stage"]:
+                    run["stage"].stop()
+            self.orchestrator.stop_metrics_server()
+        summary = self.ledger.summary()
+        logger.info("Batch finished: %s", summary)
+        return summary
+
+
 if __name__ == "__main__":
     # Ensure the script is run with multiprocessing support in mind for freezing
     multiprocessing.freeze_support()
     
     # Check if system_agents.py exists
     if not SYSTEM_AGENTS_FILE.exists():
-        logger.critical(f"{SYSTEM_AGENTS_FILE} is missing. This file is essential for the child process.")
+        logger.critical("%s is missing. This file is essential for the child process.", SYSTEM_AGENTS_FILE)
         logger.critical("Please ensure system_agents.py is created, possibly by Roo or from a template.")
         sys.exit(1)
         
     parser = argparse.ArgumentParser(description="Main Orchestrator for the Darwin Gödel Machine")
     parser.add_argument("--run-once", action="store_true", help="Run the orchestrator for a single iteration and then exit.")
+    parser.add_argument("--selection-strategy", choices=SELECTION_STRATEGIES, default=PARENT_SELECTION_STRATEGY, help="Parent selection strategy over the agent archive.")
+    parser.add_argument("--pipeline", action="store_true", help="Overlap mutation and evaluation in separate worktrees.")
+    parser.add_argument("--batch", metavar="JOBS_JSONL", help="Run one agent version on every objective in a JSONL file, then exit.")
+    parser.add_argument("--batch-results", default=BATCH_RESULTS_PATH, help="JSONL file batch results are appended to (and resumed from).")
+    parser.add_argument("--batch-workers", type=int, default=BATCH_WORKERS, help="Concurrent child processes for --batch.")
+    parser.add_argument("--agent-ref", default="HEAD", help="Agent version (tag or commit) to run with --batch.")
     args = parser.parse_args()
     logger.info("Starting Main Orchestrator...")
-    orchestrator = MainOrchestrator(run_once=args.run_once)
-    orchestrator.run()
\ No newline at end of file
+    orchestrator = MainOrchestrator(run_once=args.run_once, selection_strategy=args.selection_strategy)
+    if args.batch:
+        BatchEvaluation(orchestrator, args.batch, args.batch_results, args.batch_workers, args.agent_ref).run()
+    elif args.pipeline:
+        PipelinedEvolution(orchestrator).run(max_candidates=1 if args.run_once else None)
+    else:
+        orchestrator.run()
\ No newline at end of file
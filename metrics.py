@@ -0,0 +1,230 @@
+import bisect
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+METRICS_PORT = int(os.getenv("METRICS_PORT", 0)) # 0 disables the HTTP endpoint
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PUSH_INTERVAL_S = float(os.getenv("METRICS_PUSH_INTERVAL_S", 5.0))
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def value(self, **labels) -> Any:
+        return self._values.get(self._key(labels))
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _render(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in sorted(self._values.items())]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+    _render = Counter._render
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            # [per-bucket counts..., sum, count]; buckets are made cumulative when rendered.
+            state = self._values.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            state[bisect.bisect_left(self.buckets, value)] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def _render(self) -> List[str]:
+        lines = []
+        for key, state in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', _format_value(bound)))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {state[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """A minimal Prometheus-style registry whose increments can be shipped between processes."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> Any:
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """The registry in the Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            with metric._lock:
+                lines.extend(metric._render())
+        return "\n".join(lines) + "\n"
+
+    def drain(self) -> Dict[str, List[Any]]:
+        """Returns counter and histogram increments since the last drain (and current gauges), then resets them."""
+        snapshot: Dict[str, List[Any]] = {}
+        for metric in self._metrics.values():
+            with metric._lock:
+                if metric._values:
+                    snapshot[metric.name] = [[list(key), value] for key, value in metric._values.items()]
+                if not isinstance(metric, Gauge):
+                    metric._values = {}
+        return snapshot
+
+    def merge(self, snapshot: Dict[str, List[Any]]) -> None:
+        """Adds a drained snapshot from another process (e.g. the child) into this registry."""
+        for name, samples in snapshot.items():
+            metric = self._metrics.get(name)
+            if metric is None:
+                continue
+            with metric._lock:
+                for key, value in samples:
+                    key = tuple(key)
+                    if isinstance(metric, Gauge):
+                        metric._values[key] = value
+                    elif isinstance(metric, Histogram):
+                        state = metric._values.setdefault(key, [0] * len(metric.buckets) + [0.0, 0])
+                        metric._values[key] = [a + b for a, b in zip(state, value)]
+                    else:
+                        metric._values[key] = metric._values.get(key, 0.0) + value
+
+
+REGISTRY = MetricsRegistry()
+
+# Orchestrator.
+CYCLES = REGISTRY.counter("dgm_cycles_total", "Evolution cycles started.")
+CANDIDATES_EVALUATED = REGISTRY.counter("dgm_candidates_evaluated_total", "Candidates scored by offline evaluation.")
+CHILD_RESTARTS = REGISTRY.counter("dgm_child_restarts_total", "Child restarts after a failure.")
+ROLLBACKS = REGISTRY.counter("dgm_rollbacks_total", "Rollbacks of system_agents.py to the last good commit.", ["reason"])
+BATCH_JOBS = REGISTRY.counter("dgm_batch_jobs_total", "Batch job attempts by outcome.", ["status"])
+IPC_QUEUE_DEPTH = REGISTRY.gauge("dgm_ipc_queue_depth", "Messages waiting in the child -> orchestrator queue.")
+# Child, pushed over IPC.
+LLM_CALLS = REGISTRY.counter("dgm_llm_calls_total", "LLM responses received.", ["agent"])
+LLM_LATENCY = REGISTRY.histogram("dgm_llm_latency_seconds", "Time from the previous event to an LLM response.", ["agent"])
+LLM_TOKENS = REGISTRY.counter("dgm_llm_tokens_total", "LLM tokens used.", ["agent", "kind"])
+TOOL_CALLS = REGISTRY.counter("dgm_tool_calls_total", "Tool calls requested by agents.", ["tool"])
+TOOL_LATENCY = REGISTRY.histogram("dgm_tool_latency_seconds", "Time from a tool call to its response.", ["tool"])
+TOOL_OUTPUT_BYTES = REGISTRY.counter("dgm_tool_output_bytes_total", "Tool result bytes before (raw) and after (returned) truncation.", ["tool", "stage"])
+TOOL_CACHE_REQUESTS = REGISTRY.counter("dgm_tool_cache_requests_total", "Cacheable tool calls by kind (read, compile, command) and result (hit, miss).", ["kind", "result"])
+STRUCTURED_OUTPUTS = REGISTRY.counter("dgm_structured_outputs_total", "Executor and learner responses by how they were parsed (direct, extracted, failed).", ["agent", "result"])
+MODEL_TIER_CALLS = REGISTRY.counter("dgm_model_tier_calls_total", "Agent calls by cascade model and outcome (accepted, rejected, error).", ["agent", "model", "outcome"])
+MODEL_TIER_LATENCY = REGISTRY.histogram("dgm_model_tier_latency_seconds", "Time an agent spent on one cascade model, including tool calls and retries.", ["agent", "model"])
+MODEL_TIER_TOKENS = REGISTRY.counter("dgm_model_tier_tokens_total", "LLM tokens used per cascade model.", ["agent", "model"])
+MODEL_TIER_COST = REGISTRY.counter("dgm_model_tier_cost_usd_total", "Estimated cost per cascade model, from MODEL_TIER_COSTS.", ["agent", "model"])
+ARTIFACT_BYTES = REGISTRY.counter("dgm_artifact_bytes_written_total", "Artifact bytes written to storage.")
+
+
+def observe_event_record(record: Dict[str, Any]) -> None:
+    """Updates the LLM and tool metrics from an event record (see event_trace.EventRecorder)."""
+    author = record.get("author") or "unknown"
+    tokens = record.get("tokens")
+    if tokens:
+        LLM_CALLS.inc(agent=author)
+        LLM_LATENCY.observe(record.get("latency_s") or 0.0, agent=author)
+        for kind in ("prompt", "output"):
+            if tokens.get(kind):
+                LLM_TOKENS.inc(tokens[kind], agent=author, kind=kind)
+    for tool in record.get("tool_calls", []):
+        TOOL_CALLS.inc(tool=tool)
+    for tool, latency in (record.get("tool_latency_s") or {}).items():
+        if latency is not None:
+            TOOL_LATENCY.observe(latency, tool=tool)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("Metrics request: " + format % args)
+
+
+def start_metrics_server(port: int = METRICS_PORT, host: str = METRICS_HOST,
+                         registry: MetricsRegistry = REGISTRY) -> Optional[ThreadingHTTPServer]:
+    """Serves the registry at http://host:port/metrics from a daemon thread; returns None if disabled."""
+    if port <= 0:
+        return None
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logger.info("Metrics endpoint at http://%s:%s/metrics", host, server.server_address[1])
+    return server
@@ -0,0 +1,110 @@
+import contextlib
+import contextvars
+import logging
+import os
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from metrics import MODEL_TIER_CALLS, MODEL_TIER_COST, MODEL_TIER_LATENCY, MODEL_TIER_TOKENS
+
+logger = logging.getLogger(__name__)
+
+# USD per million tokens by model, for the per-tier cost figures,
+# e.g. "gemini-1.5-flash-latest=0.35,gemini-1.5-pro-latest=3.5".
+MODEL_TIER_COSTS = os.getenv("MODEL_TIER_COSTS", "")
+
+_CURRENT_ATTEMPT: contextvars.ContextVar[Optional["TierAttempt"]] = contextvars.ContextVar("model_tier_attempt", default=None)
+
+
+def parse_cascade(spec: str) -> List[str]:
+    """Parses "model,model" (cheapest first) into a list of model names."""
+    return [model.strip() for model in spec.split(",") if model.strip()]
+
+
+def parse_costs(spec: str) -> Dict[str, float]:
+    """Parses "model=usd,model=usd" into a dict."""
+    costs = {}
+    for item in spec.split(","):
+        if item.strip():
+            model, _, value = item.partition("=")
+            costs[model.strip()] = float(value)
+    return costs
+
+
+class TierAttempt:
+    """One agent call on one model of its cascade: the tokens it used and whether its result passed."""
+
+    def __init__(self, agent: str, model: str, tier: int):
+        self.agent = agent
+        self.model = model
+        self.tier = tier
+        self.tokens = 0
+        self.outcome = "error" # Until the agent reports on the result
+        self.reason: Optional[str] = None
+        self.started = time.perf_counter()
+        self.latency_s = 0.0
+
+    def observe(self, event: Any) -> None:
+        usage_metadata = getattr(event, "usage_metadata", None)
+        if usage_metadata is not None:
+            self.tokens += getattr(usage_metadata, "total_token_count", None) or 0
+
+    def finish(self, rejection: Optional[str]) -> None:
+        """Marks the result accepted, or rejected with the validator's reason."""
+        self.outcome = "accepted" if rejection is None else "rejected"
+        self.reason = rejection
+
+
+class ModelCascade:
+    """Collects latency, token and cost figures per agent and cascade tier.
+
+    Agents run `attempt()` around each model call; LLM events seen while it is open are
+    attributed to that tier through a context variable, so concurrent sessions do not mix.
+    """
+
+    def __init__(self, costs: Optional[Dict[str, float]] = None):
+        self.costs = parse_costs(MODEL_TIER_COSTS) if costs is None else costs
+        self._stats: Dict[Tuple[str, str], Dict[str, float]] = {}
+
+    @contextlib.contextmanager
+    def attempt(self, agent: str, model: str, tier: int) -> Iterator[TierAttempt]:
+        attempt = TierAttempt(agent, model, tier)
+        previous = _CURRENT_ATTEMPT.get()
+        _CURRENT_ATTEMPT.set(attempt)
+        try:
+            yield attempt
+        finally:
+            # Not reset(token): agents yield inside the attempt, and an abandoned generator may be closed from another context.
+            _CURRENT_ATTEMPT.set(previous)
+            attempt.latency_s = time.perf_counter() - attempt.started
+            self._record(attempt)
+
+    def observe(self, event: Any) -> None:
+        """Attributes an LLM event's token usage to the attempt in progress, if any."""
+        attempt = _CURRENT_ATTEMPT.get()
+        if attempt is not None:
+            attempt.observe(event)
+
+    def _record(self, attempt: TierAttempt) -> None:
+        cost = attempt.tokens * self.costs.get(attempt.model, 0.0) / 1_000_000
+        stats = self._stats.setdefault((attempt.agent, attempt.model), {
+            "tier": attempt.tier, "calls": 0, "accepted": 0, "rejected": 0, "error": 0, "latency_s": 0.0, "tokens": 0, "cost_usd": 0.0})
+        stats["calls"] += 1
+        stats[attempt.outcome] += 1
+        stats["latency_s"] += attempt.latency_s
+        stats["tokens"] += attempt.tokens
+        stats["cost_usd"] += cost
+        MODEL_TIER_CALLS.inc(agent=attempt.agent, model=attempt.model, outcome=attempt.outcome)
+        MODEL_TIER_LATENCY.observe(attempt.latency_s, agent=attempt.agent, model=attempt.model)
+        MODEL_TIER_TOKENS.inc(attempt.tokens, agent=attempt.agent, model=attempt.model)
+        MODEL_TIER_COST.inc(cost, agent=attempt.agent, model=attempt.model)
+        if attempt.outcome == "rejected":
+            logger.warning("%s: %s (tier %s) result rejected: %s", attempt.agent, attempt.model, attempt.tier, attempt.reason)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Totals by "agent/model", with the mean latency per call."""
+        return {f"{agent}/{model}": dict(stats, mean_latency_s=round(stats["latency_s"] / stats["calls"], 3))
+                for (agent, model), stats in sorted(self._stats.items())}
+
+
+MODEL_CASCADE = ModelCascade()
@@ -0,0 +1,294 @@
+import ast
+import contextlib
+import hashlib
+import importlib
+import io
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from queue import Empty
+from typing import Dict, List, Optional, Set
+
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+PRESCREEN_ENABLED = os.getenv("PRESCREEN_ENABLED", "true").lower() in ("1", "true", "yes")
+PRESCREEN_TIMEOUT_S = float(os.getenv("PRESCREEN_TIMEOUT_S", 300))
+# Third-party modules imported once by the worker so each screen only pays for the project's own modules.
+PRESCREEN_WARM_MODULES = [m for m in os.getenv("PRESCREEN_WARM_MODULES", "pytest,google.adk.agents,google.adk.runners,google.genai.types").split(",") if m]
+
+MODULE_LEVEL = "<module>"
+
+
+class PrescreenResult(BaseModel):
+    """Outcome of screening a candidate before it is committed and reloaded."""
+    passed: bool
+    changed: List[str] = Field(default_factory=list)
+    selected_tests: List[str] = Field(default_factory=list)
+    import_error: Optional[str] = None
+    failures: List[str] = Field(default_factory=list)
+    duration_s: float = 0.0
+
+    def summary(self) -> str:
+        if self.passed:
+            return f"passed ({len(self.selected_tests)} tests, {self.duration_s:.1f}s)"
+        if self.import_error:
+            return f"import failed: {self.import_error}"
+        return f"{len(self.failures)} failing tests: {', '.join(self.failures[:10])}"
+
+
+def _digest(node: ast.AST) -> str:
+    return hashlib.sha1(ast.dump(node, include_attributes=False).encode("utf-8")).hexdigest()
+
+
+def module_symbols(source: str) -> Dict[str, str]:
+    """Maps each top-level function, class, method and assigned name to a digest of its AST.
+
+    Everything else at module level (imports, bare statements) is folded into MODULE_LEVEL.
+    """
+    symbols: Dict[str, str] = {}
+    other = []
+    for node in ast.parse(source).body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            symbols[node.name] = _digest(node)
+            if isinstance(node, ast.ClassDef):
+                for item in node.body:
+                    if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                        symbols[f"{node.name}.{item.name}"] = _digest(item)
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)) and all(
+                isinstance(t, ast.Name) for t in (node.targets if isinstance(node, ast.Assign) else [node.target])):
+            for target in (node.targets if isinstance(node, ast.Assign) else [node.target]):
+                symbols[target.id] = _digest(node)
+        else:
+            other.append(ast.dump(node, include_attributes=False))
+    symbols[MODULE_LEVEL] = hashlib.sha1("\n".join(other).encode("utf-8")).hexdigest()
+    return symbols
+
+
+def _referenced_names(node: ast.AST) -> Set[str]:
+    """Names, attributes and dotted string constants (as in mocker.patch('module.name')) used in a node."""
+    names: Set[str] = set()
+    for child in ast.walk(node):
+        if isinstance(child, ast.Name):
+            names.add(child.id)
+        elif isinstance(child, ast.Attribute):
+            names.add(child.attr)
+        elif isinstance(child, ast.Constant) and isinstance(child.value, str) and len(child.value) < 200:
+            names.update(part for part in child.value.split(".") if part.isidentifier())
+    return names
+
+
+def changed_symbols(old_source: str, new_source: str) -> Set[str]:
+    """Top-level symbols added, removed or modified, plus those in the new module that use them."""
+    try:
+        old, new = module_symbols(old_source), module_symbols(new_source)
+    except SyntaxError:
+        return {MODULE_LEVEL}
+    changed = {name for name in old.keys() | new.keys() if old.get(name) != new.get(name)}
+    # Propagate through the new module's own call graph: a caller of a changed function is affected too.
+    references = {}
+    for node in ast.parse(new_source).body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            references[node.name] = _referenced_names(node)
+    bare = {name.split(".")[-1] for name in changed}
+    grew = True
+    while grew:
+        grew = False
+        for name, refs in references.items():
+            if name not in changed and refs & bare:
+                changed.add(name)
+                bare.add(name)
+                grew = True
+    return changed
+
+
+def select_tests(changed: Set[str], tests_dir: Path = Path("tests"), module_name: str = "system_agents") -> List[str]:
+    """Selects the tests in `tests_dir` that exercise `changed` symbols of `module_name`.
+
+    Every test of a file importing the module is selected if module-level code changed.
+    """
+    if not changed:
+        return []
+    wanted = {part for name in changed for part in name.split(".")}
+    selected = []
+    for path in sorted(tests_dir.glob("test_*.py")):
+        source = path.read_text(encoding="utf-8")
+        if module_name not in source:
+            continue
+        try:
+            tree = ast.parse(source)
+        except SyntaxError:
+            selected.append(str(path))
+            continue
+        functions = {node.name: node for node in tree.body if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))}
+        for name, node in functions.items():
+            if not name.startswith("test_"):
+                continue
+            refs = _referenced_names(node)
+            # Fixtures requested by the test count as part of it.
+            for arg in node.args.args:
+                if arg.arg in functions:
+                    refs |= _referenced_names(functions[arg.arg])
+            if MODULE_LEVEL in changed or refs & wanted:
+                selected.append(f"{path}::{name}")
+    return selected
+
+
+class _FailureCollector:
+    """pytest plugin recording failed test and collection node ids."""
+
+    def __init__(self):
+        self.failures: List[str] = []
+
+    def pytest_runtest_logreport(self, report):
+        if report.failed and report.nodeid not in self.failures:
+            self.failures.append(report.nodeid)
+
+    def pytest_collectreport(self, report):
+        if report.failed:
+            self.failures.append(report.nodeid or "<collection>")
+
+
+def _purge_project_modules(root: Path) -> None:
+    """Drops modules loaded from the project so the candidate code is imported fresh."""
+    for name, module in list(sys.modules.items()):
+        module_file = getattr(module, "__file__", None)
+        if module_file and Path(module_file).resolve().is_relative_to(root) and "site-packages" not in module_file:
+            del sys.modules[name]
+
+
+def _run_request(root: Path, request: dict) -> dict:
+    import pytest
+    _purge_project_modules(root)
+    start_time = time.perf_counter()
+    import_error = None
+    if request.get("smoke_module"):
+        try:
+            importlib.import_module(request["smoke_module"])
+        except BaseException as e:
+            import_error = f"{type(e).__name__}: {e}"
+    collector = _FailureCollector()
+    if request.get("test_ids") and import_error is None:
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            pytest.main(["-q", "-p", "no:cacheprovider", *request["test_ids"]], plugins=[collector])
+    return {"import_error": import_error, "failures": collector.failures, "duration_s": time.perf_counter() - start_time}
+
+
+def _worker_main(root: str, warm_modules: List[str], requests, responses) -> None:
+    os.chdir(root)
+    sys.path.insert(0, root)
+    # A rewritten file can keep its size and mtime second, so never trust (or write) bytecode caches here.
+    sys.dont_write_bytecode = True
+    sys.pycache_prefix = tempfile.mkdtemp(prefix="prescreen-pycache-")
+    for module_name in warm_modules:
+        try:
+            importlib.import_module(module_name)
+        except ImportError as e:
+            logger.debug("Pre-screen worker could not pre-import %s: %s", module_name, e)
+    while True:
+        request = requests.get()
+        if request is None:
+            break
+        try:
+            responses.put(_run_request(Path(root).resolve(), request))
+        except BaseException as e:
+            responses.put({"import_error": None, "failures": [f"<worker error: {e}>"], "duration_s": 0.0})
+
+
+class PrescreenWorker:
+    """A long-lived pytest process with heavy dependencies already imported.
+
+    On start it runs the whole suite once against the known-good tree; tests failing there
+    are not held against candidates.
+    """
+
+    def __init__(self, root: str = ".", tests_dir: str = "tests", module_name: str = "system_agents",
+                 warm_modules: Optional[List[str]] = None, timeout_s: float = PRESCREEN_TIMEOUT_S):
+        self.root = str(Path(root).resolve())
+        self.tests_dir = Path(self.root) / tests_dir
+        self.module_name = module_name
+        self.warm_modules = PRESCREEN_WARM_MODULES if warm_modules is None else warm_modules
+        self.timeout_s = timeout_s
+        self.baseline_failures: Optional[Set[str]] = None
+        self._process: Optional[multiprocessing.Process] = None
+        self._requests = None
+        self._responses = None
+
+    @property
+    def running(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    def start(self, wait: bool = False) -> None:
+        """Starts the worker and queues the baseline run against the current tree.
+
+        Without `wait` this returns immediately; the baseline is collected on the first screen.
+        """
+        if self.running:
+            return
+        self._requests, self._responses = multiprocessing.Queue(), multiprocessing.Queue()
+        self._process = multiprocessing.Process(
+            target=_worker_main, args=(self.root, self.warm_modules, self._requests, self._responses), name="prescreen-worker")
+        self._process.start()
+        self.baseline_failures = None
+        self._requests.put({"test_ids": [str(self.tests_dir)], "smoke_module": None})
+        if wait:
+            self._ensure_baseline()
+
+    def _call(self, request: dict) -> dict:
+        self._requests.put(request)
+        try:
+            return self._responses.get(timeout=self.timeout_s)
+        except Empty:
+            logger.error("Pre-screen worker timed out after %ss; restarting it.", self.timeout_s)
+            self.close()
+            return {"import_error": None, "failures": ["<timeout>"], "duration_s": self.timeout_s}
+
+    def _ensure_baseline(self) -> None:
+        if self.baseline_failures is not None:
+            return
+        try:
+            baseline = self._responses.get(timeout=self.timeout_s)
+            self.baseline_failures = set(baseline["failures"])
+        except Empty:
+            self.baseline_failures = set()
+        logger.info("Pre-screen baseline: %s tests already failing on the known-good tree.", len(self.baseline_failures))
+
+    def screen(self, old_source: str, new_source: str) -> PrescreenResult:
+        """Runs the import smoke test and the tests selected for the changed symbols."""
+        start_time = time.perf_counter()
+        changed = changed_symbols(old_source, new_source)
+        if not changed:
+            return PrescreenResult(passed=True)
+        # Node ids relative to the root, matching what pytest reports from the worker.
+        selected = [Path(test_id).relative_to(self.root).as_posix()
+                    for test_id in select_tests(changed, self.tests_dir, self.module_name)]
+        self.start()
+        self._ensure_baseline()
+        response = self._call({"test_ids": selected, "smoke_module": self.module_name})
+        failures = [f for f in response["failures"] if f not in self.baseline_failures]
+        result = PrescreenResult(
+            passed=response["import_error"] is None and not failures,
+            changed=sorted(changed),
+            selected_tests=selected,
+            import_error=response["import_error"],
+            failures=failures,
+            duration_s=time.perf_counter() - start_time,
+        )
+        logger.info("Pre-screen of %s changed symbols: %s", len(changed), result.summary())
+        return result
+
+    def close(self) -> None:
+        if self._process is None:
+            return
+        if self._process.is_alive():
+            self._requests.put(None)
+            self._process.join(timeout=5)
+            if self._process.is_alive():
+                self._process.kill()
+                self._process.join(timeout=5)
+        self._process = None
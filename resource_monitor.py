@@ -0,0 +1,113 @@
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+try:
+    import resource
+except ImportError:  # Not available on Windows.
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# Caps applied in the child at start; 0 means unlimited.
+CHILD_CPU_LIMIT_S = int(os.getenv("CHILD_CPU_LIMIT_S", 0))
+CHILD_MEMORY_LIMIT_MB = int(os.getenv("CHILD_MEMORY_LIMIT_MB", 0)) # Address space (RLIMIT_AS), not RSS
+CHILD_NOFILE_LIMIT = int(os.getenv("CHILD_NOFILE_LIMIT", 0))
+# Enforced by the orchestrator, which terminates the child past this wall time.
+CHILD_WALL_LIMIT_S = float(os.getenv("CHILD_WALL_LIMIT_S", 0))
+
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def apply_limits(cpu_s: int = CHILD_CPU_LIMIT_S, memory_mb: int = CHILD_MEMORY_LIMIT_MB,
+                 nofile: int = CHILD_NOFILE_LIMIT) -> Dict[str, int]:
+    """Lowers this process's soft and hard limits with setrlimit; returns the limits applied."""
+    applied: Dict[str, int] = {}
+    if resource is None:
+        return applied
+    for name, limit, value in (("cpu_s", resource.RLIMIT_CPU, cpu_s),
+                               ("memory_bytes", resource.RLIMIT_AS, memory_mb * 1024 * 1024),
+                               ("nofile", resource.RLIMIT_NOFILE, nofile)):
+        if value <= 0:
+            continue
+        soft, hard = resource.getrlimit(limit)
+        if hard != resource.RLIM_INFINITY:
+            value = min(value, hard)
+        try:
+            resource.setrlimit(limit, (value, value))
+            applied[name] = value
+        except (ValueError, OSError) as e:
+            logger.warning("Could not apply %s limit %s: %s", name, value, e)
+    if applied:
+        logger.info("Applied resource limits: %s", applied)
+    return applied
+
+
+def read_proc_stats(pid: int, proc: Path = Path("/proc")) -> Optional[Dict[str, float]]:
+    """Reads CPU seconds (including reaped children), RSS and open file descriptors of a process."""
+    try:
+        stat = (proc / str(pid) / "stat").read_text()
+        # The command name may contain spaces, so split after its closing parenthesis.
+        fields = stat[stat.rindex(")") + 2:].split()
+        utime, stime, cutime, cstime = (int(v) for v in fields[11:15])
+        status = {}
+        for line in (proc / str(pid) / "status").read_text().splitlines():
+            key, _, value = line.partition(":")
+            status[key] = value.strip()
+        fds = len(os.listdir(proc / str(pid) / "fd"))
+    except (OSError, ValueError, IndexError):
+        return None
+    return {
+        "cpu_s": (utime + stime + cutime + cstime) / _CLOCK_TICKS,
+        "rss_mb": int(status.get("VmRSS", "0 kB").split()[0]) / 1024,
+        "peak_rss_mb": int(status.get("VmHWM", "0 kB").split()[0]) / 1024,
+        "fds": fds,
+    }
+
+
+class ResourceMonitor:
+    """Samples a child process from /proc and keeps its totals and peaks."""
+
+    def __init__(self, pid: int, proc: Path = Path("/proc")):
+        self.pid = pid
+        self.proc = proc
+        self.start_time = time.monotonic()
+        self.end_time: Optional[float] = None
+        self.cpu_s = 0.0
+        self.rss_mb = 0.0
+        self.peak_rss_mb = 0.0
+        self.max_fds = 0
+        self.samples = 0
+
+    @property
+    def wall_time_s(self) -> float:
+        return (self.end_time or time.monotonic()) - self.start_time
+
+    def sample(self) -> Optional[Dict[str, float]]:
+        """Takes one sample; returns None once the process is gone (the last sample is kept)."""
+        stats = read_proc_stats(self.pid, self.proc)
+        if stats is None:
+            return None
+        self.samples += 1
+        self.cpu_s = stats["cpu_s"]
+        self.rss_mb = stats["rss_mb"]
+        self.peak_rss_mb = max(self.peak_rss_mb, stats["peak_rss_mb"], stats["rss_mb"])
+        self.max_fds = max(self.max_fds, stats["fds"])
+        return stats
+
+    def over_wall_limit(self, limit_s: float = CHILD_WALL_LIMIT_S) -> bool:
+        return limit_s > 0 and self.wall_time_s > limit_s
+
+    def finish(self) -> Dict[str, float]:
+        """Stops the wall clock and returns the run's figures."""
+        if self.end_time is None:
+            self.sample()
+            self.end_time = time.monotonic()
+        return {
+            "cpu_s": round(self.cpu_s, 3),
+            "peak_rss_mb": round(self.peak_rss_mb, 1),
+            "max_fds": self.max_fds,
+            "wall_time_s": round(self.wall_time_s, 3),
+        }
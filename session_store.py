@@ -0,0 +1,307 @@
+import asyncio
+import importlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+from typing_extensions import override
+
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, Session
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+from google.adk.sessions.state import State
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS sessions (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    create_time REAL NOT NULL,
+    update_time REAL NOT NULL,
+    PRIMARY KEY (app_name, user_id, id)
+);
+CREATE TABLE IF NOT EXISTS session_state (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (app_name, user_id, session_id, key)
+);
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    event_json TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_events_session ON events (app_name, user_id, session_id, seq);
+"""
+
+SessionKey = Tuple[str, str, str]
+
+
+def _json_default(value: Any) -> Any:
+    """Encodes pydantic models (e.g. image Parts) so they survive a round trip."""
+    if isinstance(value, BaseModel):
+        cls = type(value)
+        return {"__model__": f"{cls.__module__}:{cls.__qualname__}", "json": value.model_dump_json(exclude_none=True)}
+    if isinstance(value, (set, tuple)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _json_object_hook(obj: Dict[str, Any]) -> Any:
+    """Restores pydantic models encoded by `_json_default`."""
+    if set(obj.keys()) == {"__model__", "json"}:
+        module_name, _, qualname = obj["__model__"].partition(":")
+        try:
+            target: Any = importlib.import_module(module_name)
+            for attr in qualname.split("."):
+                target = getattr(target, attr)
+            return target.model_validate_json(obj["json"])
+        except Exception as e:
+            logger.warning("Could not restore persisted model '%s': %s", obj['__model__'], e)
+    return obj
+
+
+def encode_state_value(value: Any) -> str:
+    """Serializes a single session state value."""
+    return json.dumps(value, default=_json_default, sort_keys=True)
+
+
+def decode_state_value(raw: str) -> Any:
+    """Deserializes a single session state value."""
+    return json.loads(raw, object_hook=_json_object_hook)
+
+
+class SqliteSessionService(BaseSessionService):
+    """A durable SQLite (WAL mode) session service.
+
+    State is stored one row per key, and each appended event only writes the keys
+    that changed since the last write. This also captures the direct
+    `context.session.state[...] = ...` assignments our agents make, which never
+    appear in an event's `state_delta`. Encoding the state and diffing it happen
+    in the worker thread, so the event loop only pays for a shallow copy.
+    """
+
+    def __init__(self, db_path: str = "adk_sessions.db"):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        if db_path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA_SQL)
+        # Encoded state as last written to disk, per session. Used to compute deltas.
+        self._persisted_state: Dict[SessionKey, Dict[str, str]] = {}
+        self.rows_written = 0
+        logger.info("SQLite session store initialized at: %s", db_path)
+
+    def close(self) -> None:
+        """Closes the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+    async def _run(self, func, *args):
+        """Runs a blocking database function in a worker thread."""
+        def locked():
+            with self._lock:
+                return func(*args)
+        return await asyncio.to_thread(locked)
+
+    @staticmethod
+    def _persistable_state(state: Dict[str, Any]) -> Dict[str, str]:
+        """Encodes every non-temporary state value."""
+        encoded = {}
+        for key, value in state.items():
+            if key.startswith(State.TEMP_PREFIX):
+                continue
+            try:
+                encoded[key] = encode_state_value(value)
+            except TypeError as e:
+                logger.warning("Skipping non-serializable state key '%s': %s", key, e)
+        return encoded
+
+    def _write_state_delta(self, key: SessionKey, encoded: Dict[str, str]) -> int:
+        """Writes only changed and removed keys. Must run inside a transaction."""
+        previous = self._persisted_state.get(key, {})
+        changed = [(k, v) for k, v in encoded.items() if previous.get(k) != v]
+        removed = [k for k in previous if k not in encoded]
+        if changed:
+            self._conn.executemany(
+                "INSERT INTO session_state (app_name, user_id, session_id, key, value) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (app_name, user_id, session_id, key) DO UPDATE SET value = excluded.value",
+                [(*key, k, v) for k, v in changed],
+            )
+        if removed:
+            self._conn.executemany(
+                "DELETE FROM session_state WHERE app_name = ? AND user_id = ? AND session_id = ? AND key = ?",
+                [(*key, k) for k in removed],
+            )
+        self._persisted_state[key] = encoded
+        return len(changed) + len(removed)
+
+    def _create_sync(self, key: SessionKey, state: Dict[str, Any], now: float) -> None:
+        app_name, user_id, session_id = key
+        encoded = self._persistable_state(state)
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.execute(
+                "INSERT INTO sessions (app_name, user_id, id, create_time, update_time) VALUES (?, ?, ?, ?, ?)",
+                (app_name, user_id, session_id, now, now),
+            )
+            self._persisted_state.pop(key, None)
+            self.rows_written += self._write_state_delta(key, encoded)
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            self._persisted_state.pop(key, None)
+            raise
+
+    @override
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        session_id = session_id.strip() if session_id and session_id.strip() else str(uuid.uuid4())
+        now = time.time()
+        state = dict(state or {})
+        key = (app_name, user_id, session_id)
+        try:
+            await self._run(self._create_sync, key, dict(state), now)
+        except sqlite3.IntegrityError:
+            raise ValueError(f"Session with id {session_id} already exists.")
+        logger.info("Created persistent session %s", session_id)
+        return Session(id=session_id, app_name=app_name, user_id=user_id, state=state, events=[], last_update_time=now)
+
+    def _get_sync(self, key: SessionKey, config: Optional[GetSessionConfig]) -> Optional[Tuple[float, Dict[str, str], List[str]]]:
+        row = self._conn.execute(
+            "SELECT update_time FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?", key
+        ).fetchone()
+        if row is None:
+            return None
+        state_rows = self._conn.execute(
+            "SELECT key, value FROM session_state WHERE app_name = ? AND user_id = ? AND session_id = ?", key
+        ).fetchall()
+
+        query = "SELECT event_json FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?"
+        params: List[Any] = list(key)
+        if config and config.after_timestamp is not None:
+            query += " AND timestamp >= ?"
+            params.append(config.after_timestamp)
+        query += " ORDER BY seq DESC"
+        if config and config.num_recent_events is not None:
+            query += " LIMIT ?"
+            params.append(config.num_recent_events)
+        event_rows = self._conn.execute(query, params).fetchall()
+        encoded = {k: v for k, v in state_rows}
+        self._persisted_state[key] = dict(encoded)
+        return row[0], encoded, [r[0] for r in reversed(event_rows)]
+
+    @override
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        result = await self._run(self._get_sync, (app_name, user_id, session_id), config)
+        if result is None:
+            return None
+        update_time, encoded_state, event_rows = result
+        state = {k: decode_state_value(v) for k, v in encoded_state.items()}
+        events = [Event.model_validate_json(raw) for raw in event_rows]
+        return Session(id=session_id, app_name=app_name, user_id=user_id, state=state, events=events, last_update_time=update_time)
+
+    def _list_sync(self, app_name: str, user_id: Optional[str]) -> List[Tuple[str, str, float]]:
+        query = "SELECT user_id, id, update_time FROM sessions WHERE app_name = ?"
+        params: List[Any] = [app_name]
+        if user_id is not None:
+            query += " AND user_id = ?"
+            params.append(user_id)
+        query += " ORDER BY update_time ASC"
+        return self._conn.execute(query, params).fetchall()
+
+    @override
+    async def list_sessions(self, *, app_name: str, user_id: Optional[str] = None) -> ListSessionsResponse:
+        rows = await self._run(self._list_sync, app_name, user_id)
+        return ListSessionsResponse(sessions=[
+            Session(id=sid, app_name=app_name, user_id=uid, state={}, events=[], last_update_time=ts)
+            for uid, sid, ts in rows
+        ])
+
+    def _delete_sync(self, key: SessionKey) -> None:
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.execute("DELETE FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?", key)
+            self._conn.execute("DELETE FROM session_state WHERE app_name = ? AND user_id = ? AND session_id = ?", key)
+            self._conn.execute("DELETE FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?", key)
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._persisted_state.pop(key, None)
+
+    @override
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        await self._run(self._delete_sync, (app_name, user_id, session_id))
+        logger.info("Deleted persistent session %s", session_id)
+
+    def _append_sync(self, key: SessionKey, state: Dict[str, Any], event_id: str, timestamp: float, event_json: str) -> int:
+        app_name, user_id, session_id = key
+        encoded = self._persistable_state(state)
+        previous = dict(self._persisted_state.get(key, {}))
+        self._conn.execute("BEGIN")
+        try:
+            written = self._write_state_delta(key, encoded)
+            self._conn.execute(
+                "INSERT INTO events (app_name, user_id, session_id, id, timestamp, event_json) VALUES (?, ?, ?, ?, ?, ?)",
+                (app_name, user_id, session_id, event_id, timestamp, event_json),
+            )
+            self._conn.execute(
+                "UPDATE sessions SET update_time = ? WHERE app_name = ? AND user_id = ? AND id = ?",
+                (timestamp, app_name, user_id, session_id),
+            )
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            self._persisted_state[key] = previous
+            raise
+        self.rows_written += written + 1
+        return written
+
+    @override
+    async def append_event(self, session: Session, event: Event) -> Event:
+        event = await super().append_event(session, event)
+        if event.partial:
+            return event
+        session.last_update_time = event.timestamp
+        key = (session.app_name, session.user_id, session.id)
+        # The runner waits for this append before the session's agents continue, so the
+        # values are not mutated while the worker encodes the copy.
+        written = await self._run(
+            self._append_sync,
+            key,
+            dict(session.state),
+            event.id,
+            event.timestamp,
+            event.model_dump_json(exclude_none=True),
+        )
+        logger.debug("Persisted event %s for session %s (%s state keys changed).", event.id, session.id, written)
+        return event
@@ -0,0 +1,91 @@
+import json
+import logging
+import os
+from typing import Any, List, Optional, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+from metrics import STRUCTURED_OUTPUTS
+
+logger = logging.getLogger(__name__)
+
+STRUCTURED_OUTPUT_ENABLED = os.getenv("STRUCTURED_OUTPUT_ENABLED", "true").lower() == "true" # Pass response schemas to the model
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+class JsonObjectScanner:
+    """Finds complete top-level JSON objects in text fed in chunks, skipping prose and code fences.
+
+    Braces inside strings are ignored, so an object is emitted as soon as its closing brace arrives;
+    nothing before the first `{` or between objects is kept.
+    """
+
+    def __init__(self):
+        self._buffer: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, chunk: str) -> List[str]:
+        objects = []
+        for char in chunk:
+            if self._depth == 0:
+                if char == "{":
+                    self._buffer = [char]
+                    self._depth = 1
+                continue
+            self._buffer.append(char)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    objects.append("".join(self._buffer))
+                    self._buffer = []
+        return objects
+
+
+def extract_json_objects(text: str) -> List[Any]:
+    """All top-level JSON objects in `text` that parse; raw newlines and tabs inside strings are accepted."""
+    objects = []
+    for candidate in JsonObjectScanner().feed(text):
+        try:
+            objects.append(json.loads(candidate, strict=False))
+        except json.JSONDecodeError:
+            continue
+    return objects
+
+
+def parse_structured_output(text: str, schema: Type[ModelT], agent: str) -> Optional[ModelT]:
+    """Validates an agent's response against its schema.
+
+    A response that is exactly the JSON object counts as "direct"; otherwise the last object in the
+    text that fits the schema is used ("extracted"). Returns None ("failed") when no object fits.
+    """
+    try:
+        result = schema.model_validate_json(text.strip())
+        STRUCTURED_OUTPUTS.inc(agent=agent, result="direct")
+        return result
+    except ValidationError:
+        pass
+    for candidate in reversed(extract_json_objects(text)):
+        try:
+            result = schema.model_validate(candidate)
+        except ValidationError:
+            continue
+        STRUCTURED_OUTPUTS.inc(agent=agent, result="extracted")
+        logger.debug("%s: Extracted the %s object from a response with surrounding text.", agent, schema.__name__)
+        return result
+    STRUCTURED_OUTPUTS.inc(agent=agent, result="failed")
+    logger.warning("%s: Response does not contain a valid %s object (first 200 chars): %s", agent, schema.__name__, text[:200])
+    return None
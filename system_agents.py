@@ -1,19 +1,17 @@
 import asyncio
+import contextvars
+import functools
 import json
 import logging
 import os
 import re
-import mimetypes
-import subprocess
+import threading
 import traceback
-import shutil
-from typing import Any, List, Optional, Tuple, AsyncGenerator, Callable
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, AsyncGenerator, Callable
 from typing_extensions import override
-import sys
 from pathlib import Path
-import aiofiles
-import aiofiles.os as aios
-from pydantic import BaseModel, Field, DirectoryPath
+from pydantic import BaseModel, field_validator
 from retry import retry
 
 from dotenv import load_dotenv
@@ -25,19 +23,35 @@ load_dotenv(dotenv_path=dotenv_path, override=True)
 
 from google.adk.agents import BaseAgent, LlmAgent
 from google.adk.tools import FunctionTool
-from google.adk.runners import Runner
 from google.adk.events import Event
-from google.adk.code_executors import UnsafeLocalCodeExecutor
-from google.adk.code_executors.code_execution_utils import CodeExecutionInput, CodeExecutionResult
 
 from google.genai import types as adk_types
 from google.genai import errors as google_genai_errors
 from google.adk.agents.invocation_context import InvocationContext
 
-from google.adk.sessions import InMemorySessionService, BaseSessionService, Session
 from google.adk.artifacts.base_artifact_service import BaseArtifactService
 
+# Runner, session services, code executors and the image pipeline are imported where they are used,
+# so evaluation-only children and tool tests do not pay for them.
+if TYPE_CHECKING:
+    from google.adk.agents.run_config import RunConfig
+    from google.adk.runners import Runner
+    from google.adk.sessions import BaseSessionService, Session
+
+from agent_tools import _execute_command_impl, _read_file_impl, _unsafe_execute_code_impl, _write_file_impl
+from arc_sim import OFFLINE_EVAL_EPISODES, OFFLINE_EVAL_POLICY
+from artifact_store import FileSystemArtifactService
+from eval_harness import SuccessiveHalvingEvaluator
+from event_trace import EVENT_TRACE_PATH, EventRecorder, EventTraceSink
+from metrics import METRICS_PUSH_INTERVAL_S, REGISTRY as METRICS, observe_event_record
+from model_cascade import MODEL_CASCADE, parse_cascade
+from structured_output import STRUCTURED_OUTPUT_ENABLED, parse_structured_output
+from tool_cache import TOOL_CACHE
+from tool_output import limit_output
+from tracing import traced
+
 logger = logging.getLogger(__name__)
+
 class RetryableError(IOError):
     """Custom exception for retryable errors."""
     pass
@@ -71,7 +85,9 @@ EXECUTOR_INSTRUCTION_V1 = """
 You are an autonomous ExecutorAgent.
 You will receive EITHER a structured text plan from the PlannerAgent ({planner_raw_output}) OR an Agent Specification Document ({agent_spec_document}).
 Consult 'knowledge.md' ({knowledge_md_excerpt}) for relevant strategies and code generation patterns.
-You have access to tools: `_read_file_impl`, `_write_file_impl`, `_execute_command_impl`, `_unsafe_execute_code_impl`.
+You have access to tools: `_read_file_impl`, `_write_file_impl`, `_execute_command_impl`, `_unsafe_execute_code_impl`, `_grid_observe_impl`, `_grid_diff_impl`, `_search_game_impl`.
+When playing a grid game, pass each observed frame (JSON grid) to `_grid_observe_impl` instead of reading it whole: it returns only the cells that changed since the previous frame.
+To move a player to a target on a grid, prefer `_search_game_impl` (local tree search over the frame) over choosing one action at a time; it returns the full action sequence.
 
 IF YOU RECEIVE A PLAN ({planner_raw_output}):
 1. Interpret the structured text plan to identify individual task items.
@@ -110,10 +126,9 @@ IF YOU RECEIVE AN AGENT SPECIFICATION DOCUMENT ({agent_spec_document}):
     b. Use `_write_file_impl` to write this to a temporary file.
     c. Use `_execute_command_impl` with 'python -m py_compile temp_system_agents.py' to validate the temporary file.
 7. Report success/failure of generation and proposed integration.
-   YOUR FINAL RESPONSE MUST be a JSON string containing:
-   - "generation_summary": A string summarizing the generation process and outcome.
-   - "proposed_system_agents_content": The complete proposed content for 'system_agents.py' if generation was successful.
-   - "validation_successful": A boolean indicating if syntax validation of the proposed changes passed.
+   YOUR FINAL RESPONSE MUST be a JSON string with the same two keys as above:
+   - "execution_summary": A string summarizing the generation process and outcome, including whether syntax validation of the proposed changes passed and the path of the temporary file holding them.
+   - "system_agents_modified_and_validated": Always false here, since the proposed changes are only written to the temporary file.
 
 Example JSON response if plan processed and system_agents.py was modified:
 {{
@@ -151,84 +166,114 @@ IMPORTANT: When you generate the content for 'knowledge.md', if that content inc
 Output your analysis, the 'Capability Gap Report' (if applicable), and the complete updated content for 'knowledge.md' (with necessary curly braces escaped). Your response should be a JSON object with the keys "analysis_summary", "capability_gap_report", and "updated_knowledge_md".
 """
 
-
-def _read_file_impl(path: str) -> str:
-    logger.debug(f"Tool `_read_file_impl`: Reading {path}")
-    try:
-        with open(path, "r", encoding="utf-8") as f: return f.read()
-    except Exception as e:
-        logger.error(f"Error reading {path}: {e}")
-        return f"Error reading {path}: {e}"
-
-def _write_file_impl(path: str, content: str) -> str:
-    logger.debug(f"Tool `_write_file_impl`: Writing to {path}")
-    try:
-        dir_name = os.path.dirname(path)
-        if dir_name:
-            os.makedirs(dir_name, exist_ok=True)
-        with open(path, "w", encoding="utf-8") as f: f.write(content)
-        return f"Successfully wrote to {path}."
-    except Exception as e:
-        logger.error(f"Error writing {path}: {e}")
-        return f"Error writing {path}: {e}"
-
-def _execute_command_impl(command: str) -> str:
-    logger.info(f"Executing command: {command}")
-    try:
-        result = subprocess.run(command, shell=True, capture_output=True, text=True, check=False)
-        if result.returncode != 0:
-            logger.warning(f"Command '{command}' failed with RC {result.returncode}.\nStdout: {result.stdout}\nStderr: {result.stderr}")
-        return f"Stdout:\n{result.stdout}\nStderr:\n{result.stderr}\nRC: {result.returncode}"
-    except Exception as e:
-        logger.error(f"Error executing {command}: {e}")
-        return f"Error executing {command}: {e}"
-
-def _unsafe_execute_code_impl(code: str, tool_context: Optional[InvocationContext] = None) -> str:
-    logger.debug(f"Tool `_unsafe_execute_code_impl`: Executing complete code block:\n{code}")
-    executor = UnsafeLocalCodeExecutor()
-    code_execution_input_obj = CodeExecutionInput(code=code)
-
-    if tool_context is None:
-        return "Error: tool_context (InvocationContext) was not provided to _unsafe_execute_code_impl by the FunctionTool wrapper."
-
-    try:
-        code_execution_result: CodeExecutionResult = executor.execute_code(
-            invocation_context=tool_context,
-            code_execution_input=code_execution_input_obj
+# Bounds on what each loop leaves behind in session state (and hence in prompts and logs).
+MAX_LEARNINGS = int(os.getenv("MAX_LEARNINGS", 20))
+MAX_STATE_TEXT_CHARS = int(os.getenv("MAX_STATE_TEXT_CHARS", 4000))
+ADK_CONCURRENT_SESSIONS = int(os.getenv("ADK_CONCURRENT_SESSIONS", 1)) # Sessions a child runs side by side on one Runner
+OBJECTIVE_IMAGE_ARTIFACT = "objective_image"
+SYSTEM_AGENTS_PATH = os.path.abspath(__file__)
+
+# Session whose agents run in the current task. ADK runs sync tools in a copy of the caller's
+# context, so the tools see it too.
+_CURRENT_SESSION: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("adk_session", default=None)
+# The one session of this child allowed to rewrite system_agents.py (see _guard_self_modification).
+_SELF_MODIFICATION: Dict[str, Optional[str]] = {"session": None}
+_SELF_MODIFICATION_LOCK = threading.Lock()
+
+def _guard_self_modification(write_file: Callable) -> Callable:
+    """Lets only one concurrent session of a child write system_agents.py.
+
+    The executor rewrites the whole file from what it read, so a second session writing it would
+    silently drop the first one's modification. The first session to write it holds it until the
+    child reloads, or until its loop ends without a validated modification.
+    """
+    @functools.wraps(write_file)
+    def wrapper(path: str, content: str) -> str:
+        session = _CURRENT_SESSION.get()
+        if session is not None and os.path.abspath(path) == SYSTEM_AGENTS_PATH:
+            with _SELF_MODIFICATION_LOCK:
+                owner = _SELF_MODIFICATION["session"] or session
+                _SELF_MODIFICATION["session"] = owner
+            if owner != session:
+                logger.warning("Session %s may not write %s: session %s is modifying it.", session, path, owner)
+                return (f"Error writing {path}: another session is already modifying it in this run. "
+                        "Do not modify system_agents.py in this loop; report it as not modified.")
+        return write_file(path, content)
+    return wrapper
+
+def _release_self_modification(session: str) -> None:
+    """Gives up `session`'s claim on system_agents.py, if it holds it."""
+    with _SELF_MODIFICATION_LOCK:
+        if _SELF_MODIFICATION["session"] == session:
+            _SELF_MODIFICATION["session"] = None
+
+def _session_scratch_files(instruction: str, session: str) -> str:
+    """Gives the scratch files named in the executor instruction per-session names, so that
+    concurrent sessions do not compile or run each other's drafts."""
+    if ADK_CONCURRENT_SESSIONS <= 1:
+        return instruction
+    suffix = re.sub(r"\W", "", session)[:12]
+    return (instruction.replace("temp_system_agents.py", f"temp_system_agents_{suffix}.py")
+            .replace("temp_code.py", f"temp_code_{suffix}.py"))
+
+def _record_elision(state: Any, field: str, amount: int) -> None:
+    """Adds to the per-field counter of items/characters dropped from session state."""
+    counts = dict(state.get("elided_counts", {}))
+    counts[field] = counts.get(field, 0) + amount
+    state["elided_counts"] = counts
+
+def _bounded_text(state: Any, field: str, text: str, limit: Optional[int] = None) -> str:
+    """Keeps the head and tail of `text` within `limit` characters, counting what was elided."""
+    limit = MAX_STATE_TEXT_CHARS if limit is None else limit
+    if text is None or len(text) <= limit:
+        return text
+    elided = len(text) - limit
+    head = limit // 2
+    tail = limit - head
+    _record_elision(state, field, elided)
+    return f"{text[:head]}\n...[{elided} chars elided]...\n{text[len(text) - tail:]}"
+
+def _append_learning(state: Any, learning: str) -> None:
+    """Appends to the `learnings` ring buffer, dropping the oldest entries beyond MAX_LEARNINGS."""
+    learnings = list(state.get("learnings", []))
+    learnings.append(_bounded_text(state, "learnings_chars", learning, MAX_STATE_TEXT_CHARS // 4))
+    overflow = len(learnings) - MAX_LEARNINGS
+    if overflow > 0:
+        learnings = learnings[overflow:]
+        _record_elision(state, "learnings", overflow)
+    state["learnings"] = learnings
+
+async def _store_objective_image(context: InvocationContext, image_part: adk_types.Part) -> None:
+    """Saves the objective image as an artifact and keeps only a reference in session state."""
+    if context.artifact_service is None:
+        context.session.state["objective_image"] = image_part
+        return
+    version = await context.artifact_service.save_artifact(
+        app_name=context.session.app_name,
+        user_id=context.session.user_id,
+        session_id=context.session.id,
+        filename=OBJECTIVE_IMAGE_ARTIFACT,
+        artifact=image_part,
+    )
+    context.session.state["objective_image_ref"] = {
+        "filename": OBJECTIVE_IMAGE_ARTIFACT,
+        "version": version,
+        "mime_type": image_part.inline_data.mime_type,
+    }
+
+async def _load_objective_image(context: InvocationContext) -> Optional[adk_types.Part]:
+    """Resolves the objective image from its artifact reference (or legacy inline state)."""
+    image_ref = context.session.state.get("objective_image_ref")
+    if image_ref and context.artifact_service is not None:
+        return await context.artifact_service.load_artifact(
+            app_name=context.session.app_name,
+            user_id=context.session.user_id,
+            session_id=context.session.id,
+            filename=image_ref["filename"],
+            version=image_ref.get("version"),
         )
-        
-        output_parts = []
-        if code_execution_result.stdout:
-            output_parts.append(f"Stdout:\n{code_execution_result.stdout}")
-        if code_execution_result.stderr:
-            output_parts.append(f"Stderr:\n{code_execution_result.stderr}")
-        
-        current_exit_code = getattr(code_execution_result, "exit_code", None)
-        if current_exit_code is not None:
-             output_parts.append(f"Exit Code: {current_exit_code}")
-        else:
-             output_parts.append("Exit Code: Unknown (not reported by executor)")
-
-
-        if code_execution_result.output_files:
-            output_parts.append("Output Files:")
-            for f_info in code_execution_result.output_files:
-                f_path = getattr(f_info, 'path', 'Unknown path')
-                f_size = getattr(f_info, 'size_bytes', 'Unknown size')
-                output_parts.append(f"  - Path: {f_path}, Size: {f_size} bytes")
-
-        if not output_parts or (len(output_parts) == 1 and "Exit Code:" in output_parts[0] and not code_execution_result.stdout and not code_execution_result.stderr):
-            exit_code_str = f"Exit Code: {current_exit_code}" if current_exit_code is not None else "Exit Code: Unknown"
-            output = f"Code executed ({exit_code_str}). No textual output (stdout/stderr)."
-        else:
-            output = "\n".join(output_parts)
-            
-        logger.info(f"Code execution result (first 500 chars): {output[:500]}...")
-        return output.strip()
+    return context.session.state.get("objective_image")
 
-    except Exception as e:
-        logger.error(f"Tool `_unsafe_execute_code_impl`: Error executing code: {e}\n{traceback.format_exc()}")
-        return f"Error executing code: {e}"
 
 execute_local_code_declaration = adk_types.FunctionDeclaration(
     name="_unsafe_execute_code_impl",
@@ -259,220 +304,69 @@ class CustomFunctionTool(FunctionTool):
         return self._declaration
 
 execute_local_code_tool = CustomFunctionTool(
-    func=_unsafe_execute_code_impl,
+    func=traced(category="tool")(limit_output(TOOL_CACHE.wrap(_unsafe_execute_code_impl))),
     declaration=execute_local_code_declaration
 )
 
-class FileSystemArtifactService(BaseArtifactService, BaseModel):
-  """A file system-based implementation of the artifact service."""
-
-  base_storage_path: DirectoryPath = Field(default=Path("adk_artifacts"))
-
-  def model_post_init(self, __context: Any) -> None:
-    """Ensure the base storage path exists after Pydantic initialization."""
-    os.makedirs(self.base_storage_path, exist_ok=True)
-    logger.info(f"File artifact storage initialized at: {os.path.abspath(self.base_storage_path)}")
-
-  def _file_has_user_namespace(self, filename: str) -> bool:
-    """Checks if the filename has a user namespace."""
-    return filename.startswith("user:")
-
-  def _get_artifact_base_dir(
-      self, app_name: str, user_id: str, session_id: str, filename: str
-  ) -> str:
-    """Constructs the base directory path for a given artifact (up to the filename)."""
-    if self._file_has_user_namespace(filename):
-      return os.path.join(self.base_storage_path, app_name, user_id, "user", filename)
-    return os.path.join(self.base_storage_path, app_name, user_id, session_id, filename)
-
-  def _get_version_path(self, artifact_base_dir: str, version: int) -> str:
-    """Constructs the path to a specific version of an artifact."""
-    return os.path.join(artifact_base_dir, str(version))
-
-  async def _ensure_dir_exists(self, dir_path: str) -> None:
-    """Asynchronously ensures a directory exists."""
-    if not await aios.path.exists(dir_path):
-      await aios.makedirs(dir_path, exist_ok=True)
-
-  @override
-  async def save_artifact(
-      self,
-      *,
-      app_name: str,
-      user_id: str,
-      session_id: str,
-      filename: str,
-      artifact: adk_types.Part,
-  ) -> int:
-    artifact_base_dir = self._get_artifact_base_dir(app_name, user_id, session_id, filename)
-    await self._ensure_dir_exists(artifact_base_dir)
-
-    current_versions = []
-    if await aios.path.isdir(artifact_base_dir):
-        entries = await aios.listdir(artifact_base_dir)
-        for entry in entries:
-            if await aios.path.isdir(os.path.join(artifact_base_dir, entry)) and entry.isdigit():
-                current_versions.append(int(entry))
-    
-    new_version = 0
-    if current_versions:
-        new_version = max(current_versions) + 1
-    
-    version_path = self._get_version_path(artifact_base_dir, new_version)
-    await self._ensure_dir_exists(version_path)
-
-    data_file_path = os.path.join(version_path, "data.bin")
-    mimetype_file_path = os.path.join(version_path, "mimetype.txt")
-
-    try:
-      async with aiofiles.open(data_file_path, "wb") as f:
-        if artifact.inline_data and artifact.inline_data.data:
-          await f.write(artifact.inline_data.data)
-        else:
-          await f.write(b'')
-      
-      async with aiofiles.open(mimetype_file_path, "w", encoding="utf-8") as f:
-        if artifact.inline_data and artifact.inline_data.mime_type:
-          await f.write(artifact.inline_data.mime_type)
-        else:
-          await f.write("application/octet-stream")
-
-      logger.info(f"Saved artifact '{filename}' (version {new_version}) to {version_path}")
-      return new_version
-    except Exception as e:
-      logger.error(f"Error saving artifact {filename} version {new_version}: {e}")
-      if await aios.path.exists(version_path):
-          await asyncio.to_thread(shutil.rmtree, version_path)
-      raise
-
-  @override
-  async def load_artifact(
-      self,
-      *,
-      app_name: str,
-      user_id: str,
-      session_id: str,
-      filename: str,
-      version: Optional[int] = None,
-  ) -> Optional[adk_types.Part]:
-    artifact_base_dir = self._get_artifact_base_dir(app_name, user_id, session_id, filename)
-
-    if not await aios.path.isdir(artifact_base_dir):
-      logger.debug(f"Artifact base directory not found for '{filename}': {artifact_base_dir}")
-      return None
-
-    target_version = version
-    if target_version is None:
-      versions = await self.list_versions(app_name=app_name, user_id=user_id, session_id=session_id, filename=filename)
-      if not versions:
-        logger.debug(f"No versions found for artifact '{filename}' at {artifact_base_dir}")
-        return None
-      target_version = max(versions)
-    
-    version_path = self._get_version_path(artifact_base_dir, target_version)
-    if not await aios.path.isdir(version_path):
-      logger.debug(f"Version {target_version} not found for artifact '{filename}' at {version_path}")
-      return None
-
-    data_file_path = os.path.join(version_path, "data.bin")
-    mimetype_file_path = os.path.join(version_path, "mimetype.txt")
-
-    if not await aios.path.exists(data_file_path) or \
-       not await aios.path.exists(mimetype_file_path):
-      logger.warning(f"Data or mimetype file missing for artifact '{filename}' version {target_version} at {version_path}")
-      return None
-
+def _compile_error(path: str) -> Optional[str]:
     try:
-      async with aiofiles.open(data_file_path, "rb") as f:
-        data_bytes = await f.read()
-      
-      async with aiofiles.open(mimetype_file_path, "r", encoding="utf-8") as f:
-        mime_type_str = await f.read()
-      
-      logger.info(f"Loaded artifact '{filename}' (version {target_version}) from {version_path}")
-      return adk_types.Part(inline_data=adk_types.Blob(mime_type=mime_type_str, data=data_bytes))
-    except Exception as e:
-      logger.error(f"Error loading artifact {filename} version {target_version}: {e}")
-      return None
-
-  @override
-  async def list_artifact_keys(
-      self, *, app_name: str, user_id: str, session_id: str
-  ) -> List[str]:
-    filenames = set()
-    
-    session_scope_path = os.path.join(self.base_storage_path, app_name, user_id, session_id)
-    user_scope_path = os.path.join(self.base_storage_path, app_name, user_id, "user")
-
-    async def scan_path(path_to_scan: str, is_user_scope: bool):
-        if await aios.path.isdir(path_to_scan):
-            try:
-                for item_name in await aios.listdir(path_to_scan):
-                    item_path = os.path.join(path_to_scan, item_name)
-                    if await aios.path.isdir(item_path):
-                        filenames.add(item_name)
-            except FileNotFoundError:
-                logger.debug(f"Directory not found during scan: {path_to_scan}")
-            except Exception as e:
-                logger.error(f"Error listing artifact keys in {path_to_scan}: {e}")
-    
-    await scan_path(session_scope_path, is_user_scope=False)
-    await scan_path(user_scope_path, is_user_scope=True)
-        
-    return sorted(list(filenames))
-
-  @override
-  async def delete_artifact(
-      self, *, app_name: str, user_id: str, session_id: str, filename: str
-  ) -> None:
-    artifact_base_dir = self._get_artifact_base_dir(app_name, user_id, session_id, filename)
-    if await aios.path.isdir(artifact_base_dir):
-      try:
-        await asyncio.to_thread(shutil.rmtree, artifact_base_dir)
-        logger.info(f"Deleted artifact '{filename}' from {artifact_base_dir}")
-      except Exception as e:
-        logger.error(f"Error deleting artifact {filename}: {e}")
-        raise
-    else:
-      logger.debug(f"Artifact '{filename}' not found for deletion at {artifact_base_dir}")
-
-  @override
-  async def list_versions(
-      self, *, app_name: str, user_id: str, session_id: str, filename: str
-  ) -> List[int]:
-    artifact_base_dir = self._get_artifact_base_dir(app_name, user_id, session_id, filename)
-    versions = []
-    if await aios.path.isdir(artifact_base_dir):
-      try:
-        for entry in await aios.listdir(artifact_base_dir):
-          if entry.isdigit() and await aios.path.isdir(os.path.join(artifact_base_dir, entry)):
-            versions.append(int(entry))
-      except FileNotFoundError:
-         logger.debug(f"Artifact base directory not found while listing versions: {artifact_base_dir}")
-         return []
-      except Exception as e:
-        logger.error(f"Error listing versions for artifact {filename}: {e}")
-        return []
-    return sorted(versions)
-
+        compile(Path(path).read_text(encoding="utf-8"), path, "exec")
+    except (OSError, SyntaxError, ValueError) as e:
+        return str(e)
+    return None
+
+def _plan_rejection(plan: str) -> Optional[str]:
+    """Why a plan cannot be handed to the executor, or None if it can."""
+    plan = plan.strip()
+    if not plan:
+        return "empty plan"
+    if plan.startswith("1. CRITICAL"):
+        return "planning failed"
+    if not re.search(r"^\s*\d+[.)]\s", plan, re.MULTILINE):
+        return "plan has no numbered steps"
+    return None
+
+def _executor_rejection(output: Optional["ExecutorOutput"]) -> Optional[str]:
+    """Why an executor response is unusable: it does not fit the schema, or claims a change that does not compile."""
+    if output is None:
+        return "response does not match the ExecutorOutput schema"
+    if output.system_agents_modified_and_validated:
+        error = _compile_error("system_agents.py")
+        if error:
+            return f"system_agents.py does not compile: {error}"
+    return None
+
+def _escalate(agent: LlmAgent, tier: int) -> bool:
+    """Whether a rejected result can be retried on the next model of the agent's cascade."""
+    if tier + 1 >= len(agent.model_cascade):
+        return False
+    logger.info("%s: Escalating from %s to %s.", agent.name, agent.model_cascade[tier], agent.model_cascade[tier + 1])
+    return True
 
 class PlannerAgent(LlmAgent):
     instruction_template: str = PLANNER_INSTRUCTION_V1
+    model_cascade: List[str] = [] # Models to try in order; a later one only runs when the previous result is rejected
 
     def __init__(self, name: str = "PlannerAgent", tools: Optional[List[Any]] = None,
                  model_name_env_var: str = "PLANNER_LLM_MODEL",
-                 default_model_name: str = "gemini-1.5-pro-latest"): # A sensible default
+                 default_model_name: str = "gemini-1.5-pro-latest", # A sensible default
+                 cascade_env_var: str = "PLANNER_LLM_CASCADE"):
         super().__init__(name=name)
         self.instruction = self.instruction_template # Will be formatted in _run_async_impl
         self.tools = tools or []
         self.model = os.getenv(model_name_env_var, default_model_name)
-        logger.info(f"'{self.name}' initialized with model '{self.model}'.")
+        # Cheapest first, e.g. "gemini-1.5-flash-latest,gemini-1.5-pro-latest"; by default just the model above.
+        self.model_cascade = parse_cascade(os.getenv(cascade_env_var, "")) or [self.model]
+        self.model = self.model_cascade[0]
+        logger.info("'%s' initialized with model '%s'.", self.name, self.model)
 
     @retry(Exception, tries=3, delay=2, backoff=2)
+    @traced(category="llm")
     async def _invoke_llm_with_retry(self, context: InvocationContext) -> List[str]:
         final_response_text_parts = []
         try:
             async for event in super()._run_async_impl(context):
+                MODEL_CASCADE.observe(event)
                 if event.error_code:
                     error_message = f"PlannerAgent LLM call failed with error code: {event.error_code}."
                     logger.error(error_message)
@@ -492,17 +386,18 @@ class PlannerAgent(LlmAgent):
             if _is_retryable(e):
                 raise  # Re-raise to trigger retry
             else:
-                logger.error(f"{self.name} encountered a non-retryable exception: {e}")
+                logger.error("%s encountered a non-retryable exception: %s", self.name, e)
                 return [f"1. CRITICAL: Planning phase failed due to an exception. Error: {e}."]
 
 
+    @traced(category="agent")
     async def _run_async_impl(self, context: InvocationContext) -> AsyncGenerator[Event, None]:
-        logger.info(f"'{self.name}' is starting its run.")
+        logger.info("'%s' is starting its run.", self.name)
         objective_from_state = context.session.state.get("objective", "Not specified")
         knowledge_from_state = context.session.state.get("knowledge", "None available")
         
-        logger.info(f"'{self.name}' received objective: '{objective_from_state}'")
-        logger.info(f"'{self.name}' received knowledge (first 200 chars): '{knowledge_from_state[:200]}...'")
+        logger.info("'%s' received objective: '%s'", self.name, objective_from_state)
+        logger.info("'%s' received knowledge (first 200 chars): '%s...'", self.name, knowledge_from_state[:200])
         
         objective = objective_from_state
         knowledge = knowledge_from_state
@@ -512,58 +407,92 @@ class PlannerAgent(LlmAgent):
         
         original_instruction = self.instruction
         self.instruction = instruction
-        logger.debug(f"{self.name}: Instruction: {self.instruction[:200]}...")
+        logger.debug("%s: Instruction: %s...", self.name, self.instruction[:200])
         
         final_response_text_parts = []
         try:
-            final_response_text_parts = await self._invoke_llm_with_retry(context)
+            for tier, model in enumerate(self.model_cascade):
+                self.model = model
+                with MODEL_CASCADE.attempt(self.name, model, tier) as attempt:
+                    final_response_text_parts = await self._invoke_llm_with_retry(context)
+                    attempt.finish(_plan_rejection("".join(final_response_text_parts)))
+                if attempt.outcome == "accepted" or not _escalate(self, tier):
+                    break
         except Exception as e:
-            logger.error(f"{self.name} failed after multiple retries: {e}")
+            logger.error("%s failed after multiple retries: %s", self.name, e)
             final_response_text_parts = [f"1. CRITICAL: Planning phase failed after multiple retries. Error: {e}."]
             # The exception will be caught by the orchestrator, so we just yield the event.
             yield Event(author=self.name, content=adk_types.Content(parts=[adk_types.Part(text="".join(final_response_text_parts))]))
             raise
         finally:
             self.instruction = original_instruction
+            self.model = self.model_cascade[0]
 
         final_response_str = "".join(final_response_text_parts).strip()
-        logger.info(f"'{self.name}' generated plan (first 500 chars): {final_response_str[:500]}...")
+        logger.info("'%s' generated plan (first 500 chars): %s...", self.name, final_response_str[:500])
 
         context.session.state["planner_raw_output"] = final_response_str
-        context.session.state["planner_outcome"] = {"raw_output": final_response_str}
-        context.session.state.setdefault("learnings", []).append(f"{self.name}: Planning phase completed, raw output stored.")
+        context.session.state["planner_outcome"] = {"raw_output": _bounded_text(context.session.state, "planner_outcome", final_response_str)}
+        _append_learning(context.session.state, f"{self.name}: Planning phase completed, raw output stored.")
         yield Event(author=self.name, content=adk_types.Content(parts=[adk_types.Part(text=final_response_str)]))
 
+class ExecutorOutput(BaseModel):
+    """The executor's final response, also given to the model as its response schema."""
+    execution_summary: str
+    system_agents_modified_and_validated: bool = False
+
+class LearnerOutput(BaseModel):
+    """The learner's final response, also given to the model as its response schema."""
+    analysis_summary: str
+    capability_gap_report: Optional[str] = None
+    updated_knowledge_md: str = ""
+
+    @field_validator("capability_gap_report", mode="before")
+    @classmethod
+    def _report_as_text(cls, value: Any) -> Any:
+        # Without the schema the model sometimes writes the report as an object.
+        return json.dumps(value) if isinstance(value, (dict, list)) else value
+
 class ExecutorAgent(LlmAgent):
     instruction_template: str = EXECUTOR_INSTRUCTION_V1
+    model_cascade: List[str] = [] # Models to try in order; a later one only runs when the previous result is rejected
 
     def __init__(self, name: str = "ExecutorAgent", tools: Optional[List[Any]] = None,
                  model_name_env_var: str = "EXECUTOR_LLM_MODEL",
-                 default_model_name: str = "gemini-1.5-pro-latest"):
+                 default_model_name: str = "gemini-1.5-pro-latest",
+                 cascade_env_var: str = "EXECUTOR_LLM_CASCADE"):
         super().__init__(name=name)
         self.instruction = self.instruction_template # Will be formatted in _run_async_impl
         self.tools = tools or []
         self.model = os.getenv(model_name_env_var, default_model_name)
-        logger.info(f"'{self.name}' initialized with model '{self.model}'.")
+        # Cheapest first, e.g. "gemini-1.5-flash-latest,gemini-1.5-pro-latest"; by default just the model above.
+        self.model_cascade = parse_cascade(os.getenv(cascade_env_var, "")) or [self.model]
+        self.model = self.model_cascade[0]
+        if STRUCTURED_OUTPUT_ENABLED:
+            self.output_schema = ExecutorOutput # ADK enforces it on the final answer, after any tool calls
+        logger.info("'%s' initialized with model '%s'.", self.name, self.model)
 
     @retry(Exception, tries=3, delay=2, backoff=2)
+    @traced(category="llm")
     async def _invoke_llm_with_retry(self, context: InvocationContext) -> AsyncGenerator[Event, None]:
         try:
             async for event in super()._run_async_impl(context):
+                MODEL_CASCADE.observe(event)
                 yield event
         except Exception as e:
             if _is_retryable(e):
                 raise
             else:
-                logger.error(f"{self.name} encountered a non-retryable exception: {e}")
+                logger.error("%s encountered a non-retryable exception: %s", self.name, e)
                 yield Event(author=self.name, content=adk_types.Content(parts=[adk_types.Part(text=json.dumps({
                     "execution_summary": f"ExecutorAgent failed due to an exception. Error: {e}",
                     "system_agents_modified_and_validated": False
                 }))]))
 
 
+    @traced(category="agent")
     async def _run_async_impl(self, context: InvocationContext) -> AsyncGenerator[Event, None]:
-        logger.info(f"'{self.name}' is starting its run.")
+        logger.info("'%s' is starting its run.", self.name)
         planner_raw_output = context.session.state.get("planner_raw_output", "")
         agent_spec_document_dict = context.session.state.get("agent_spec_document")
 
@@ -576,7 +505,7 @@ class ExecutorAgent(LlmAgent):
             yield Event(author=self.name, content=adk_types.Content(parts=[adk_types.Part(text=json.dumps(no_task_outcome))]))
             return
 
-        knowledge_content = _read_file_impl("knowledge.md")
+        knowledge_content = TOOL_CACHE.read_file(_read_file_impl, "knowledge.md")
         knowledge_excerpt = (knowledge_content[:1000] + "...") if len(knowledge_content) > 1000 else knowledge_content
         
         current_planner_output_for_prompt = planner_raw_output if planner_raw_output else "N/A - Agent Generation Task"
@@ -585,27 +514,37 @@ class ExecutorAgent(LlmAgent):
         instruction = self.instruction_template.replace("{planner_raw_output}", current_planner_output_for_prompt)
         instruction = instruction.replace("{agent_spec_document}", current_agent_spec_for_prompt)
         instruction = instruction.replace("{knowledge_md_excerpt}", knowledge_excerpt)
+        instruction = _session_scratch_files(instruction, context.session.id)
         
         original_instruction = self.instruction
         self.instruction = instruction
-        logger.debug(f"{self.name}: Instruction (first 500 chars): {self.instruction[:500]}...")
+        logger.debug("%s: Instruction (first 500 chars): %s...", self.name, self.instruction[:500])
 
         llm_final_response_str = ""
-        final_response_text_parts = []
+        parsed_output = None
         try:
-            async for event in self._invoke_llm_with_retry(context):
-                current_text_part = None
-                if event.content and event.content.parts:
-                    for part in event.content.parts:
-                        if part.text:
-                            current_text_part = part.text
-                            break
-                if current_text_part:
-                    final_response_text_parts.append(current_text_part)
-                yield event
-            llm_final_response_str = "".join(final_response_text_parts).strip()
+            # Events of a rejected tier stay in the session, so the next model sees what was tried.
+            for tier, model in enumerate(self.model_cascade):
+                self.model = model
+                final_response_text_parts = []
+                with MODEL_CASCADE.attempt(self.name, model, tier) as attempt:
+                    async for event in self._invoke_llm_with_retry(context):
+                        current_text_part = None
+                        if event.content and event.content.parts:
+                            for part in event.content.parts:
+                                if part.text:
+                                    current_text_part = part.text
+                                    break
+                        if current_text_part:
+                            final_response_text_parts.append(current_text_part)
+                        yield event
+                    llm_final_response_str = "".join(final_response_text_parts).strip()
+                    parsed_output = parse_structured_output(llm_final_response_str, ExecutorOutput, self.name)
+                    attempt.finish(_executor_rejection(parsed_output))
+                if attempt.outcome == "accepted" or not _escalate(self, tier):
+                    break
         except Exception as e:
-            logger.error(f"{self.name} failed after multiple retries: {e}")
+            logger.error("%s failed after multiple retries: %s", self.name, e)
             llm_final_response_str = json.dumps({
                 "execution_summary": f"ExecutorAgent failed after multiple retries. Error: {e}",
                 "system_agents_modified_and_validated": False
@@ -614,64 +553,60 @@ class ExecutorAgent(LlmAgent):
             raise
         finally:
             self.instruction = original_instruction
+            self.model = self.model_cascade[0]
 
-        logger.info(f"'{self.name}' final response (first 500 chars): {llm_final_response_str[:500]}...")
+        logger.info("'%s' final response (first 500 chars): %s...", self.name, llm_final_response_str[:500])
 
         execution_summary = f"LLM Raw Output: {llm_final_response_str}"
         any_system_agents_modified_and_validated = False
-        try:
-            processed_llm_response_str = llm_final_response_str.strip()
-            if processed_llm_response_str.startswith("```json"):
-                processed_llm_response_str = processed_llm_response_str[7:]
-            if processed_llm_response_str.startswith("```"):
-                processed_llm_response_str = processed_llm_response_str[3:]
-            if processed_llm_response_str.endswith("```"):
-                processed_llm_response_str = processed_llm_response_str[:-3]
-            processed_llm_response_str = processed_llm_response_str.strip()
-
-            if processed_llm_response_str.startswith("{") and processed_llm_response_str.endswith("}"):
-                parsed_llm_json_output = json.loads(processed_llm_response_str)
-                execution_summary = parsed_llm_json_output.get("execution_summary", execution_summary)
-                any_system_agents_modified_and_validated = parsed_llm_json_output.get("system_agents_modified_and_validated", False)
-        except json.JSONDecodeError as e:
-            logger.error(f"{self.name}: Failed to parse LLM JSON response: {e}. Original raw response: {llm_final_response_str}.")
-            execution_summary = f"Error parsing LLM JSON response. Raw: {llm_final_response_str}"
+        if parsed_output is not None:
+            execution_summary = parsed_output.execution_summary
+            any_system_agents_modified_and_validated = parsed_output.system_agents_modified_and_validated
         
         if agent_spec_document_dict:
              context.session.state.pop("agent_spec_document", None)
 
         final_structured_outcome = {
-            "execution_summary": execution_summary,
+            "execution_summary": _bounded_text(context.session.state, "execution_summary", execution_summary),
             "system_agents_modified_and_validated": any_system_agents_modified_and_validated
         }
         context.session.state["executor_outcome"] = final_structured_outcome
         
         yield Event(author=self.name, content=adk_types.Content(parts=[adk_types.Part(text=llm_final_response_str)]))
-        logger.info(f"'{self.name}' finished execution. Outcome: {final_structured_outcome}")
+        logger.info("'%s' finished execution. Outcome: %s", self.name, final_structured_outcome)
 
 
 class LearningAgent(LlmAgent):
     instruction_template: str = LEARNING_INSTRUCTION_V1
+    model_cascade: List[str] = [] # Models to try in order; a later one only runs when the previous result is rejected
 
     def __init__(self, name: str = "LearningAgent", tools: Optional[List[Any]] = None,
                  model_name_env_var: str = "LEARNING_LLM_MODEL",
-                 default_model_name: str = "gemini-1.5-flash-latest"):
+                 default_model_name: str = "gemini-1.5-flash-latest",
+                 cascade_env_var: str = "LEARNING_LLM_CASCADE"):
         super().__init__(name=name)
         self.instruction = self.instruction_template # Will be formatted in _run_async_impl
         self.tools = tools or []
         self.model = os.getenv(model_name_env_var, default_model_name)
-        logger.info(f"'{self.name}' initialized with model '{self.model}'.")
+        # Cheapest first, e.g. "gemini-1.5-flash-latest,gemini-1.5-pro-latest"; by default just the model above.
+        self.model_cascade = parse_cascade(os.getenv(cascade_env_var, "")) or [self.model]
+        self.model = self.model_cascade[0]
+        if STRUCTURED_OUTPUT_ENABLED:
+            self.output_schema = LearnerOutput
+        logger.info("'%s' initialized with model '%s'.", self.name, self.model)
 
     @retry(Exception, tries=3, delay=2, backoff=2)
+    @traced(category="llm")
     async def _invoke_llm_with_retry(self, context: InvocationContext) -> AsyncGenerator[Event, None]:
         try:
             async for event in super()._run_async_impl(context):
+                MODEL_CASCADE.observe(event)
                 yield event
         except Exception as e:
             if _is_retryable(e):
                 raise
             else:
-                logger.error(f"{self.name} encountered a non-retryable exception: {e}")
+                logger.error("%s encountered a non-retryable exception: %s", self.name, e)
                 yield Event(author=self.name, content=adk_types.Content(parts=[adk_types.Part(text=json.dumps({
                     "analysis_summary": f"LearningAgent failed due to an exception. Error: {e}",
                     "capability_gap_report": None,
@@ -679,45 +614,57 @@ class LearningAgent(LlmAgent):
                 }))]))
 
 
+    @traced(category="agent")
     async def _run_async_impl(self, context: InvocationContext) -> AsyncGenerator[Event, None]:
-        logger.info(f"'{self.name}' is starting its run.")
+        logger.info("'%s' is starting its run.", self.name)
         executor_outcome = context.session.state.get("executor_outcome", {"log": ["No executor outcome available."]})
         fail_log = context.session.state.get("failure_log_summary", "No failure log summary available.")
         learnings = context.session.state.get("learnings", [])
         
         try:
-            k_content = _read_file_impl("knowledge.md")
+            k_content = TOOL_CACHE.read_file(_read_file_impl, "knowledge.md")
             k_summary = (k_content[:1000] + "...") if len(k_content) > 1000 else k_content
         except Exception as e:
-            logger.error(f"{self.name}: Exception reading knowledge.md: {e}")
+            logger.error("%s: Exception reading knowledge.md: %s", self.name, e)
             k_summary = f"Error reading knowledge.md: {e}"
         
         execution_id = context.session.id if context.session else "unknown_session"
         instruction = self.instruction_template.replace("{execution_outcomes_summary_json}", json.dumps(executor_outcome))
         instruction = instruction.replace("{failure_log_summary}", json.dumps(fail_log))
+        elided_counts = context.session.state.get("elided_counts")
+        if elided_counts:
+            learnings = learnings + [f"(Older/oversized state was elided to bound memory: {json.dumps(elided_counts)})"]
         instruction = instruction.replace("{learnings_list_json}", json.dumps(learnings))
         instruction = instruction.replace("{current_knowledge}", k_summary)
         instruction = instruction.replace("{execution_id}", execution_id)
         
         original_instruction = self.instruction
         self.instruction = instruction
-        logger.debug(f"{self.name}: Instruction: {self.instruction[:200]}...")
+        logger.debug("%s: Instruction: %s...", self.name, self.instruction[:200])
         
-        final_response_text_parts = []
+        parsed_output = None
         try:
-            async for event in self._invoke_llm_with_retry(context):
-                current_text_part = None
-                if event.content and event.content.parts:
-                    for part in event.content.parts:
-                        if part.text:
-                            current_text_part = part.text
-                            break
-                if current_text_part:
-                    final_response_text_parts.append(current_text_part)
-                yield event
-            final_response_str = "".join(final_response_text_parts).strip()
+            for tier, model in enumerate(self.model_cascade):
+                self.model = model
+                final_response_text_parts = []
+                with MODEL_CASCADE.attempt(self.name, model, tier) as attempt:
+                    async for event in self._invoke_llm_with_retry(context):
+                        current_text_part = None
+                        if event.content and event.content.parts:
+                            for part in event.content.parts:
+                                if part.text:
+                                    current_text_part = part.text
+                                    break
+                        if current_text_part:
+                            final_response_text_parts.append(current_text_part)
+                        yield event
+                    final_response_str = "".join(final_response_text_parts).strip()
+                    parsed_output = parse_structured_output(final_response_str, LearnerOutput, self.name)
+                    attempt.finish(None if parsed_output is not None else "response does not match the LearnerOutput schema")
+                if attempt.outcome == "accepted" or not _escalate(self, tier):
+                    break
         except Exception as e:
-            logger.error(f"{self.name} failed after multiple retries: {e}")
+            logger.error("%s failed after multiple retries: %s", self.name, e)
             final_response_str = json.dumps({
                 "analysis_summary": f"LearningAgent failed after multiple retries. Error: {e}",
                 "capability_gap_report": None,
@@ -727,45 +674,33 @@ class LearningAgent(LlmAgent):
             raise
         finally:
             self.instruction = original_instruction
+            self.model = self.model_cascade[0]
 
-        logger.info(f"'{self.name}' final response (first 500 chars): {final_response_str[:500]}...")
+        logger.info("'%s' final response (first 500 chars): %s...", self.name, final_response_str[:500])
 
         new_k_content_from_llm, cap_gap_report, analysis_sum = "", None, f"LLM Raw Response: {final_response_str}"
-        try:
-            processed_final_response_str = final_response_str.strip()
-            if processed_final_response_str.startswith("```json"):
-                processed_final_response_str = processed_final_response_str[7:]
-            if processed_final_response_str.startswith("```"):
-                processed_final_response_str = processed_final_response_str[3:]
-            if processed_final_response_str.endswith("```"):
-                processed_final_response_str = processed_final_response_str[:-3]
-            processed_final_response_str = processed_final_response_str.strip()
-
-            if processed_final_response_str.startswith("{") and processed_final_response_str.endswith("}"):
-                parsed_llm_output = json.loads(processed_final_response_str)
-                analysis_sum = parsed_llm_output.get("analysis_summary", analysis_sum)
-                cap_gap_report = parsed_llm_output.get("capability_gap_report")
-                new_k_content_from_llm = parsed_llm_output.get("updated_knowledge_md", "").strip()
-            else:
-                logger.warning(f"{self.name}: LLM output was not JSON. Treating as analysis summary.")
-                analysis_sum = processed_final_response_str
+        if parsed_output is not None:
+            analysis_sum = parsed_output.analysis_summary
+            cap_gap_report = parsed_output.capability_gap_report
+            new_k_content_from_llm = parsed_output.updated_knowledge_md.strip()
+        else:
+            logger.warning("%s: LLM output was not JSON. Treating as analysis summary.", self.name)
+            analysis_sum = final_response_str
 
-            if new_k_content_from_llm:
-                k_status = _write_file_impl("knowledge.md", new_k_content_from_llm)
-                logger.info(f"Knowledge file update status: {k_status}")
-            else:
-                k_status = "No update to knowledge.md from LLM."
-        except json.JSONDecodeError as e:
-            logger.error(f"{self.name}: Error parsing LLM JSON response: {e}. LLM Response: {final_response_str}")
-            k_status = f"Error parsing LLM response, knowledge.md not updated. Error: {e}"
+        if new_k_content_from_llm:
+            k_status = TOOL_CACHE.write_file(_write_file_impl, "knowledge.md", new_k_content_from_llm)
+            logger.info("Knowledge file update status: %s", k_status)
+        else:
+            k_status = "No update to knowledge.md from LLM."
         
+        analysis_sum = _bounded_text(context.session.state, "analysis_summary", analysis_sum)
         outcome = {"analysis_summary": analysis_sum, "knowledge_update_status": k_status, "capability_gap_report": cap_gap_report}
         context.session.state["learning_outcome"] = outcome
         if cap_gap_report:
             context.session.state["capability_gap_report"] = cap_gap_report
         
         yield Event(author=self.name, content=adk_types.Content(parts=[adk_types.Part(text=json.dumps(outcome))]))
-        logger.info(f"'{self.name}' finished learning. Outcome: {outcome}")
+        logger.info("'%s' finished learning. Outcome: %s", self.name, outcome)
 
 
 class TopLevelOrchestratorAgent(BaseAgent):
@@ -788,41 +723,56 @@ class TopLevelOrchestratorAgent(BaseAgent):
         if hasattr(super(), 'model_post_init'):
              super().model_post_init(__context)
         
-        # Initialize internal loop count here
-        self._internal_loop_count = 0
+        # Loops completed per session: one agent tree serves every concurrent session of the Runner.
+        self._loop_counts: Dict[str, int] = {}
+        # Learners read, extend and rewrite knowledge.md, so concurrent sessions take turns.
+        self._learner_lock = asyncio.Lock()
 
         logger.debug(
-            f"{self.__class__.__name__} initialized: "
-            f"name='{self.name}', max_loops={self.max_loops}, "
-            f"planner type={type(self.planner)}, executor type={type(self.executor)}, "
-            f"learner type={type(self.learner)}, "
-            f"init_objective is set: {self.init_objective is not None}, "
-            f"init_knowledge is set: {self.init_knowledge is not None}"
+            "%s initialized: name='%s', max_loops=%s, planner type=%s, executor type=%s, learner type=%s, "
+            "init_objective is set: %s, init_knowledge is set: %s",
+            self.__class__.__name__, self.name, self.max_loops, type(self.planner), type(self.executor),
+            type(self.learner), self.init_objective is not None, self.init_knowledge is not None
         )
         if self.init_objective is not None:
-            logger.info(f"Orchestrator initialized with objective (first 100 chars): {str(self.init_objective)[:100]}...")
+            logger.info("Orchestrator initialized with objective (first 100 chars): %s...", str(self.init_objective)[:100])
         else:
             logger.info("Orchestrator initialized without a specific objective.")
         
         if self.init_knowledge is not None:
-            logger.info(f"Orchestrator initialized with knowledge (first 100 chars): {str(self.init_knowledge)[:100]}...")
+            logger.info("Orchestrator initialized with knowledge (first 100 chars): %s...", str(self.init_knowledge)[:100])
         else:
             logger.info("Orchestrator initialized with an empty knowledge base.")
         
+    @traced(category="agent")
     async def _run_async_impl(self, context: InvocationContext) -> AsyncGenerator[Event, None]:
-        logger.info(f"Orchestrator run started for session: {context.session.id}")
+        logger.info("Orchestrator run started for session: %s", context.session.id)
         
-        # Internal loop counter for the orchestrator instance
-        if not hasattr(self, '_internal_loop_count'):
-            self._internal_loop_count = 0
+        # Internal loop counter of this session
+        if not hasattr(self, '_loop_counts'):
+            self._loop_counts = {}
+            self._learner_lock = asyncio.Lock()
+        internal_loop_count = self._loop_counts.get(context.session.id, 0)
+        # The sub-agents set their formatted instruction on themselves for each call, so every
+        # invocation runs its own shallow copies of them.
+        planner, executor, learner = self.planner.model_copy(), self.executor.model_copy(), self.learner.model_copy()
+        _CURRENT_SESSION.set(context.session.id)
 
         # current_loop_val is fetched from session state (should be 0 on first pass, set by run_adk_loop)
-        # However, we will primarily rely on self._internal_loop_count for the orchestrator's own logic.
+        # However, we will primarily rely on the internal loop count for the orchestrator's own logic.
         # The session state 'current_loop' will be set by this orchestrator for other agents.
-        if self._internal_loop_count == 0:
+        if internal_loop_count == 0 and context.session.state.get("current_loop", 0) > 0:
+            # Resuming a persisted session (e.g. after a reload): keep its state and
+            # continue counting loops from where the previous child stopped.
+            internal_loop_count = self._loop_counts[context.session.id] = context.session.state["current_loop"]
+            logger.info("Orchestrator: Resuming session %s at loop %s.", context.session.id, internal_loop_count + 1)
+            if self.init_knowledge is not None:
+                context.session.state["knowledge"] = self.init_knowledge
+        elif internal_loop_count == 0:
             logger.info("Orchestrator: First run. Initializing session state.")
             
-            initial_message = getattr(context, 'new_message', None)
+            # The runner passes the request as `user_content`; each concurrent session has its own.
+            initial_message = getattr(context, 'user_content', None) or getattr(context, 'new_message', None)
 
             # Process the initial message which may be multimodal
             text_parts = []
@@ -834,7 +784,7 @@ class TopLevelOrchestratorAgent(BaseAgent):
                     elif part.inline_data and 'image' in part.inline_data.mime_type:
                         if not image_part: # Store the first image found
                             image_part = part
-                            logger.info(f"Found image in user request (type: {part.inline_data.mime_type}).")
+                            logger.info("Found image in user request (type: %s).", part.inline_data.mime_type)
 
             # The objective is the combined text from all text parts.
             objective_text = " ".join(text_parts).strip()
@@ -842,54 +792,57 @@ class TopLevelOrchestratorAgent(BaseAgent):
             # Set objective from message parts if not already in state.
             if "objective" not in context.session.state and objective_text:
                 context.session.state["objective"] = objective_text
-                logger.info(f"Objective set from user request: {objective_text[:100]}...")
+                logger.info("Objective set from user request: %s...", objective_text[:100])
             # Fallback to init_objective only if no objective is in state and no text was in the message.
             elif "objective" not in context.session.state and self.init_objective:
                 context.session.state["objective"] = self.init_objective
-                logger.info(f"Objective set from initial configuration: {str(self.init_objective)[:100]}...")
+                logger.info("Objective set from initial configuration: %s...", str(self.init_objective)[:100])
 
             if image_part:
-                context.session.state["objective_image"] = image_part
+                await _store_objective_image(context, image_part)
 
             # Knowledge is still loaded from init_knowledge, as it's not part of the user request.
             if self.init_knowledge is not None:
                 context.session.state["knowledge"] = self.init_knowledge
-                logger.info(f"Knowledge base loaded: {str(self.init_knowledge)[:100]}...")
+                logger.info("Knowledge base loaded: %s...", str(self.init_knowledge)[:100])
             
             context.session.state["learnings"] = [] # Initialize learnings list
             context.session.state["current_loop"] = 0 # Explicitly set session's loop counter for this run
             context.session.state["execution_id"] = context.session.id # Explicitly set execution_id
         
-        logger.debug(f"{self.name}: Session state before critical checks: {dict(context.session.state)}")
+        if logger.isEnabledFor(logging.DEBUG): # Copying the whole state is only worth it when it is logged.
+            logger.debug("%s: Session state before critical checks: %s", self.name, context.session.state.to_dict())
 
         # CRITICAL CHECKS (now after attempting to load from new_message)
         if "objective" not in context.session.state:
-            logger.critical(f"{self.name}: CRITICAL - 'objective' is missing.")
+            logger.critical("%s: CRITICAL - 'objective' is missing.", self.name)
             yield Event(author=self.name, content=adk_types.Content(parts=[adk_types.Part(text=json.dumps({"status": "error", "message": "Critical state 'objective' missing."}))]))
             return
         if "knowledge" not in context.session.state:
-            logger.critical(f"{self.name}: CRITICAL - 'knowledge' is missing.")
+            logger.critical("%s: CRITICAL - 'knowledge' is missing.", self.name)
             yield Event(author=self.name, content=adk_types.Content(parts=[adk_types.Part(text=json.dumps({"status": "error", "message": "Critical state 'knowledge' missing."}))]))
             return
         
         # Use the session's current_loop, which was initialized by this agent on its first run.
         current_loop_from_session = context.session.state.get("current_loop", 0)
-        logger.info(f"Starting loop {current_loop_from_session + 1}/{self.max_loops}.")
+        logger.info("Starting loop %s/%s.", current_loop_from_session + 1, self.max_loops)
 
-        if self._internal_loop_count >= self.max_loops:
-            logger.warning(f"{self.name}: Maximum loop count ({self.max_loops}) reached.")
-            outcome = {"status": "max_loops_reached", "loops_completed": self._internal_loop_count}
+        if internal_loop_count >= self.max_loops:
+            logger.warning("%s: Maximum loop count (%s) reached.", self.name, self.max_loops)
+            outcome = {"status": "max_loops_reached", "loops_completed": internal_loop_count}
+            context.session.state["overall_loop_outcome"] = outcome
             yield Event(author=self.name, content=adk_types.Content(parts=[adk_types.Part(text=json.dumps(outcome))]))
             return
 
         # Run core agent sequence
-        logger.debug(f"{self.name}: Session state in Orchestrator before calling PlannerAgent: {dict(context.session.state)}")
+        if logger.isEnabledFor(logging.DEBUG): # Copying the whole state is only worth it when it is logged.
+            logger.debug("%s: Session state in Orchestrator before calling PlannerAgent: %s", self.name, context.session.state.to_dict())
 
         # Construct the message for the planner from session state
         planner_message_parts = []
         planner_message_parts.append(adk_types.Part(text="Follow your instructions. Analyze any provided images to inform your plan."))
 
-        objective_image = context.session.state.get("objective_image")
+        objective_image = await _load_objective_image(context)
         if objective_image:
             planner_message_parts.append(objective_image)
             logger.info("Passing image to PlannerAgent for analysis.")
@@ -906,7 +859,7 @@ class TopLevelOrchestratorAgent(BaseAgent):
         # The planner will now create its own context from this updated parent,
         # inheriting the new message with the image.
         try:
-            async for event in self.planner.run_async(parent_context=planner_context):
+            async for event in planner.run_async(parent_context=planner_context):
                 yield event
         except KeyError as e:
             # This makes the system resilient to missing context variables in prompts.
@@ -914,47 +867,66 @@ class TopLevelOrchestratorAgent(BaseAgent):
             logger.error(error_msg)
             # Store a failure message for the Executor and a learning for the Learner.
             context.session.state["planner_raw_output"] = f"1. CRITICAL: Planning failed due to KeyError: {e}."
-            context.session.state.setdefault("learnings", []).append(error_msg)
+            _append_learning(context.session.state, error_msg)
 
         # Subsequent agents run with the original orchestrator context.
-        async for event in self.executor.run_async(parent_context=context): yield event
-        async for event in self.learner.run_async(parent_context=context): yield event
+        async for event in executor.run_async(parent_context=context): yield event
+        async with self._learner_lock:
+            async for event in learner.run_async(parent_context=context): yield event
         
         # Conditionally run architect agent
         
-        self._internal_loop_count += 1
+        internal_loop_count = self._loop_counts[context.session.id] = internal_loop_count + 1
         # Update the session's loop counter to reflect the completion of this orchestrator pass
-        context.session.state["current_loop"] = self._internal_loop_count
+        context.session.state["current_loop"] = internal_loop_count
         
         executor_outcome = context.session.state.get("executor_outcome", {})
         loop_final_status = "completed_loop"
         if executor_outcome.get("system_agents_modified_and_validated"):
             logger.info("System files were modified. Requesting application reload.")
             loop_final_status = "reload_requested"
+        else:
+            _release_self_modification(context.session.id)
         
         final_loop_outcome = {
             "status": loop_final_status,
             "details": executor_outcome,
-            "loop_number": self._internal_loop_count # Report based on internal count
+            "loop_number": internal_loop_count # Report based on internal count
         }
         context.session.state["overall_loop_outcome"] = final_loop_outcome
         yield Event(author=self.name, content=adk_types.Content(parts=[adk_types.Part(text=json.dumps(final_loop_outcome))]))
-        logger.info(f"Loop {self._internal_loop_count} finished with status: {loop_final_status}.")
+        logger.info("Loop %s finished with status: %s.", internal_loop_count, loop_final_status)
 
 def get_adk_runner_and_services(
     initial_objective: str,
     initial_knowledge: str
-) -> Tuple[Runner, BaseSessionService, BaseArtifactService, TopLevelOrchestratorAgent]:
+) -> Tuple["Runner", "BaseSessionService", BaseArtifactService, TopLevelOrchestratorAgent]:
+    from google.adk.runners import Runner
+    from google.adk.sessions import InMemorySessionService
+    from arc_grid import _grid_diff_impl, _grid_observe_impl
+    from game_search import _search_game_impl
+    from session_store import SqliteSessionService
     logger.info("Initializing ADK services and agents.")
-    session_service: BaseSessionService = InMemorySessionService()
+    session_db_path = os.getenv("SESSION_DB_PATH", "adk_sessions.db")
+    session_service: BaseSessionService
+    if session_db_path:
+        # Persist sessions so a reloaded child can resume instead of starting cold.
+        session_service = SqliteSessionService(db_path=session_db_path)
+    else:
+        session_service = InMemorySessionService()
     # Instantiate FileSystemArtifactService instead of InMemoryArtifactService
     # You can specify a base_storage_path if needed, e.g., FileSystemArtifactService(base_storage_path="my_custom_artifacts_dir")
     # Using default "adk_artifacts" for now.
     artifact_service: BaseArtifactService = FileSystemArtifactService()
-    logger.info(f"Using file system for artifact storage at {os.path.abspath(artifact_service.base_storage_path)}")
+    logger.info("Using file system for artifact storage at %s", os.path.abspath(artifact_service.base_storage_path))
     
     # Define common tools for agents that use them
-    file_io_command_tools = [_read_file_impl, _write_file_impl, _execute_command_impl]
+    # Tool functions run in spans so a loop's trace shows where tool time goes, and their
+    # results are cut to a byte budget before they reach the model (tool_output.py). Reads,
+    # compile checks and declared-pure commands are memoized; writes invalidate them (tool_cache.py).
+    def trace_tool(func: Callable) -> Callable:
+        return traced(category="tool")(limit_output(TOOL_CACHE.wrap(func)))
+    file_io_command_tools = [trace_tool(_read_file_impl), trace_tool(_guard_self_modification(_write_file_impl)), trace_tool(_execute_command_impl)]
     
     planner_agent_tools = file_io_command_tools + [execute_local_code_tool]
     
@@ -963,7 +935,7 @@ def get_adk_runner_and_services(
 
     # Instantiate agents
     planner = PlannerAgent(tools=planner_agent_tools)
-    executor_tools = file_io_command_tools + [execute_local_code_tool]
+    executor_tools = file_io_command_tools + [execute_local_code_tool, trace_tool(_grid_observe_impl), trace_tool(_grid_diff_impl), trace_tool(_search_game_impl)]
     executor = ExecutorAgent(tools=executor_tools)
     learner = LearningAgent(tools=learning_agent_tools)
     sub_agents = [planner, executor, learner]
@@ -986,123 +958,333 @@ def get_adk_runner_and_services(
     logger.info("ADK services and agents initialized successfully.")
     return adk_runner, session_service, artifact_service, top_level_agent
 
-async def run_adk_loop(
-    adk_runner: Runner,
-    session_service: BaseSessionService,
-    initial_objective: str,
-    initial_knowledge_content: str,
-    ipc_q: Optional[Any] = None
-):
-    logger.info("Starting new ADK execution loop.")
-    user_id = "system_user_main_loop"
-    
-    session_object: Optional[Session] = None
+async def find_resumable_session(
+    session_service: "BaseSessionService",
+    app_name: str,
+    user_id: str,
+    objective: Optional[str] = None
+) -> Optional["Session"]:
+    """Returns the most recent session whose last loop ended with a reload request, if any.
+
+    Given an `objective`, a session started for a different one (input.md was edited) is not resumed.
+    """
     try:
-        session_object = await session_service.create_session(user_id=user_id, app_name=adk_runner.app_name)
-        logger.info(f"Created new session with ID: {session_object.id}")
+        sessions = (await session_service.list_sessions(app_name=app_name, user_id=user_id)).sessions
     except Exception as e:
-        logger.critical(f"Failed to create ADK session: {e}", exc_info=True)
-        if ipc_q: ipc_q.put({'type': 'critical_error', 'message': f'Session creation failed: {e}'})
-        return {"status": "error", "message": "Session creation failed"}
-
-    if not session_object:
-        logger.critical("Session object is None after creation, cannot proceed.")
-        if ipc_q: ipc_q.put({'type': 'critical_error', 'message': 'Session object None after creation'})
-        return {"status": "error", "message": "Session object None after creation"}
-        
-    # The initial message passed to the runner can be multimodal.
-    # We will parse the objective for image paths and construct the message accordingly.
+        logger.warning("Could not list sessions for resumption: %s", e)
+        return None
+    if not sessions:
+        return None
+    latest = max(sessions, key=lambda s: s.last_update_time)
+    session = await session_service.get_session(app_name=app_name, user_id=user_id, session_id=latest.id)
+    if not session or session.state.get("overall_loop_outcome", {}).get("status") != "reload_requested":
+        return None
+    if objective is not None and session.state.get("objective") != objective:
+        logger.info("Not resuming session %s: its objective differs from the current one.", session.id)
+        return None
+    return session
+
+def push_metrics(ipc_q: Optional[Any]) -> None:
+    """Sends the metrics gathered since the last push to the orchestrator, which serves them."""
+    if not ipc_q:
+        return
+    snapshot = METRICS.drain()
+    if snapshot:
+        ipc_q.put({'type': 'metrics', 'metrics': snapshot})
+
+async def _build_runner_message(objective: str) -> adk_types.Content:
+    """The initial message passed to the runner can be multimodal: image paths in the objective are attached as images."""
     message_parts = []
-    objective_text_without_paths = initial_objective
+    objective_text_without_paths = objective
     
     # Regex to find file paths that look like images
     image_path_pattern = r'([\'"]?[\w\./\\-]+\.(?:png|jpg|jpeg|gif|webp)[\'"]?)'
-    image_paths = re.findall(image_path_pattern, initial_objective)
+    image_paths = re.findall(image_path_pattern, objective)
 
     if image_paths:
-        logger.info(f"Found image paths in objective: {image_paths}")
-        for image_path in image_paths:
-            # Clean up path from quotes
-            clean_path = image_path.strip('\'"')
+        logger.info("Found image paths in objective: %s", image_paths)
+        clean_paths = {image_path: image_path.strip('\'"') for image_path in image_paths}
+        existing_paths = []
+        for clean_path in dict.fromkeys(clean_paths.values()):
             if os.path.exists(clean_path):
-                try:
-                    with open(clean_path, "rb") as f:
-                        image_data = f.read()
-                    mime_type, _ = mimetypes.guess_type(clean_path)
-                    if mime_type and 'image' in mime_type:
-                        message_parts.append(adk_types.Part(inline_data=adk_types.Blob(mime_type=mime_type, data=image_data)))
-                        logger.info(f"Loaded image '{clean_path}' ({mime_type}).")
-                        # Remove the path from the objective text to avoid redundancy
-                        objective_text_without_paths = objective_text_without_paths.replace(image_path, "").strip()
-                    else:
-                        logger.warning(f"Could not determine image MIME type for '{clean_path}'.")
-                except Exception as e:
-                    logger.error(f"Failed to read image file '{clean_path}': {e}")
+                existing_paths.append(clean_path)
             else:
-                logger.warning(f"Image path '{clean_path}' found in objective but does not exist.")
+                logger.warning("Image path '%s' found in objective but does not exist.", clean_path)
+        from image_pipeline import ImagePipeline
+        loaded_images = await ImagePipeline().load_many(existing_paths)
+        attached_paths = set()
+        for image_path, clean_path in clean_paths.items():
+            if clean_path not in loaded_images:
+                continue
+            image_part = loaded_images[clean_path]
+            if image_part is not None and clean_path not in attached_paths:
+                attached_paths.add(clean_path)
+                message_parts.append(image_part)
+                logger.info("Loaded image '%s' (%s).", clean_path, image_part.inline_data.mime_type)
+            # Remove the path from the objective text to avoid redundancy
+            objective_text_without_paths = objective_text_without_paths.replace(image_path, "").strip()
 
     # Always include the (potentially modified) text part
     message_parts.append(adk_types.Part(text=objective_text_without_paths))
-    initial_runner_message = adk_types.Content(parts=message_parts)
+    return adk_types.Content(parts=message_parts)
+
+def session_objectives(objective: str, count: int) -> List[str]:
+    """The same objective for `count` sessions, each with its own seed so their attempts diverge."""
+    if count <= 1:
+        return [objective]
+    return [f"{objective}\n\n(Parallel session {index + 1} of {count}; seed {index}.)" for index in range(count)]
+
+def session_user_id(index: int) -> str:
+    """User id of the `index`-th concurrent session; each slot resumes only its own sessions."""
+    return "system_user_main_loop" if index == 0 else f"system_user_main_loop-{index}"
+
+@traced(category="session")
+async def run_session(
+    adk_runner: "Runner",
+    session_service: "BaseSessionService",
+    objective: str,
+    user_id: str = "system_user_main_loop",
+    ipc_q: Optional[Any] = None,
+    trace_sink: Optional[EventTraceSink] = None,
+    metrics_push: Optional[dict] = None,
+    run_config: Optional["RunConfig"] = None
+) -> dict:
+    """Runs one session to completion on the runner and returns its outcome; reporting is left to the caller."""
+    result = {"session_id": None, "user_id": user_id, "status": "error", "output": None, "events": 0,
+              "usage": {"tokens": 0, "wall_time_s": 0.0}}
+    session_object: Optional[Session] = None
+    initial_runner_message = await _build_runner_message(objective)
+    # The orchestrator stores the message's text as the session objective.
+    objective_text = " ".join(part.text for part in initial_runner_message.parts if part.text).strip()
+    try:
+        session_object = await find_resumable_session(session_service, adk_runner.app_name, user_id, objective_text)
+        if session_object:
+            logger.info("Resuming session %s after reload (loop %s).", session_object.id, session_object.state.get('current_loop', 0))
+        else:
+            session_object = await session_service.create_session(user_id=user_id, app_name=adk_runner.app_name)
+            logger.info("Created new session with ID: %s", session_object.id)
+    except Exception as e:
+        logger.critical("Failed to create ADK session: %s", e, exc_info=True)
+        result.update(message=f'Session creation failed: {e}', details=None)
+        return result
+
+    if not session_object:
+        logger.critical("Session object is None after creation, cannot proceed.")
+        result.update(message='Session object None after creation', details=None)
+        return result
+    result["session_id"] = session_object.id
 
-    final_events_summary = []
+    token_count = 0
+    run_start_time = time.perf_counter()
     last_event_data_str = None
+    event_recorder = EventRecorder()
+    metrics_push = metrics_push if metrics_push is not None else {"last": time.monotonic()}
     
     try:
-        logger.info(f"Invoking ADK runner for session {session_object.id}.")
+        logger.info("Invoking ADK runner for session %s.", session_object.id)
         # Pass the initial_runner_message, which now contains full objective and knowledge.
         # TopLevelOrchestratorAgent will use this to bootstrap its session state if needed.
-        async for event in adk_runner.run_async(user_id=session_object.user_id, session_id=session_object.id, new_message=initial_runner_message):
-            event_type = getattr(event, 'type', str(type(event)))
-            event_data = getattr(event, 'data', str(event))
-            logger.debug(f"ADK Event Received: Type='{event_type}', Data='{str(event_data)[:200]}...'")
-            final_events_summary.append({"type": event_type, "data_preview": str(event_data)[:100]})
+        async for event in adk_runner.run_async(user_id=session_object.user_id, session_id=session_object.id, new_message=initial_runner_message,
+                                              run_config=run_config):
+            event_record = event_recorder.record(event, session_id=session_object.id)
+            if trace_sink:
+                trace_sink.write(event_record)
+            observe_event_record(event_record)
+            if time.monotonic() - metrics_push["last"] >= METRICS_PUSH_INTERVAL_S:
+                push_metrics(ipc_q)
+                metrics_push["last"] = time.monotonic()
+            usage_metadata = getattr(event, 'usage_metadata', None)
+            if usage_metadata is not None:
+                token_count += getattr(usage_metadata, 'total_token_count', None) or 0
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("ADK Event Received: Author='%s', Data='%s...'", getattr(event, 'author', None), str(event)[:200])
+            event_data = getattr(event, 'data', None) or getattr(event, 'content', None)
             if isinstance(event_data, str):
                 last_event_data_str = event_data
             elif isinstance(event_data, adk_types.Content):
                 if event_data.parts and event_data.parts[0].text:
                     last_event_data_str = event_data.parts[0].text
 
-        logger.info(f"ADK runner finished for session {session_object.id}. Events: {len(final_events_summary)}.")
+        logger.info("ADK runner finished for session %s. Events: %s. Tool cache: %s. Model tiers: %s.",
+                    session_object.id, event_recorder.event_count, TOOL_CACHE.stats(), MODEL_CASCADE.stats())
         
-        # Use the session_object directly. Its state should have been updated by the runner.
+        # Session services may hand the runner a copy, so re-read the final state.
+        refreshed_session = await session_service.get_session(
+            app_name=adk_runner.app_name, user_id=session_object.user_id, session_id=session_object.id
+        )
+        if refreshed_session:
+            session_object = refreshed_session
         reload_requested = False
         if session_object.state:
             final_session_state = session_object.state
             reload_requested = final_session_state.get("overall_loop_outcome", {}).get("status") == "reload_requested"
         else:
-            logger.warning(f"Session state is empty for session ID {session_object.id} after run.")
-            
-        if ipc_q:
-            if reload_requested:
-                logger.info("ADK loop finished. System components will be reloaded.")
-                ipc_q.put({'type': 'modification_complete', 'status': 'success_reload_requested'})
-            else:
-                logger.info("ADK loop completed normally.")
-                # Try to parse last_event_data_str if it's JSON, otherwise pass as string
-                summary_output = last_event_data_str
-                try:
-                    if last_event_data_str:
-                        summary_output = json.loads(last_event_data_str) # To send structured data if possible
-                except json.JSONDecodeError:
-                    logger.debug("Last event data was not valid JSON, sending as string.")
-                ipc_q.put({'type': 'task_outcome', 'status': 'completed_normally', 'output_summary': summary_output or "No specific final event data."})
-        
-        return last_event_data_str
-
+            logger.warning("Session state is empty for session ID %s after run.", session_object.id)
+        result["status"] = "reload_requested" if reload_requested else "completed"
+        result["output"] = last_event_data_str
     except Exception as e:
-        session_id_for_error = session_object.id if session_object else "unknown"
-        logger.critical(f"Critical error during ADK runner execution (session {session_id_for_error}): {e}", exc_info=True)
-        if ipc_q: ipc_q.put({'type': 'critical_error', 'message': f'ADK run failed: {e}', 'details': traceback.format_exc()})
+        logger.critical("Critical error during ADK runner execution (session %s): %s", session_object.id, e, exc_info=True)
+        result.update(message=f'ADK run failed: {e}', details=traceback.format_exc())
+    result["events"] = event_recorder.event_count
+    result["usage"] = {'tokens': token_count, 'wall_time_s': time.perf_counter() - run_start_time}
+    return result
+
+def _parse_output_summary(output: Optional[str]) -> Any:
+    """Sends structured data if the last event was JSON, otherwise the string."""
+    try:
+        if output:
+            return json.loads(output)
+    except json.JSONDecodeError:
+        logger.debug("Last event data was not valid JSON, sending as string.")
+    return output
+
+def report_session_outcomes(ipc_q: Optional[Any], results: List[dict], wall_time_s: float) -> None:
+    """Sends one message for all sessions of a run: a reload if any session asked for one, a critical
+    error if every session failed, otherwise the task outcome (per session when there are several)."""
+    push_metrics(ipc_q)
+    if not ipc_q:
+        return
+    usage = {'tokens': sum(r["usage"]["tokens"] for r in results), 'wall_time_s': wall_time_s}
+    sessions = [{key: r.get(key) for key in ("session_id", "status", "events", "usage", "message")} for r in results]
+    failed = [r for r in results if r["status"] == "error"]
+    if len(failed) == len(results):
+        ipc_q.put({'type': 'critical_error', 'message': failed[0]["message"], 'details': failed[0].get("details"),
+                   **({'sessions': sessions} if len(results) > 1 else {})})
+    elif any(r["status"] == "reload_requested" for r in results):
+        logger.info("ADK loop finished. System components will be reloaded.")
+        ipc_q.put({'type': 'modification_complete', 'status': 'success_reload_requested', 'usage': usage,
+                   **({'sessions': sessions} if len(results) > 1 else {})})
+    else:
+        logger.info("ADK loop completed normally.")
+        if len(results) == 1:
+            summary_output = _parse_output_summary(results[0]["output"])
+            ipc_q.put({'type': 'task_outcome', 'status': 'completed_normally', 'output_summary': summary_output or "No specific final event data.", 'usage': usage})
+        else:
+            summary_output = {"sessions": [dict(session, output=_parse_output_summary(r["output"])) for session, r in zip(sessions, results)]}
+            ipc_q.put({'type': 'task_outcome', 'status': 'completed_normally', 'output_summary': summary_output, 'usage': usage, 'sessions': sessions})
+
+@traced(category="child")
+async def run_adk_sessions(
+    adk_runner: "Runner",
+    session_service: "BaseSessionService",
+    objectives: List[str],
+    ipc_q: Optional[Any] = None
+) -> List[dict]:
+    """Runs one session per objective concurrently on the same runner, agents and artifact service.
+
+    The loop is almost entirely spent waiting on the model, so K sessions take about as long as one.
+    Each session has its own state, user id and event recorder; the outcomes are reported together.
+    The tools are synchronous, so with more than one session ADK runs them on a tool thread pool;
+    inline, one session's command or code run would block the event loop for all the others.
+    """
+    logger.info("Starting %s concurrent ADK session(s).", len(objectives))
+    run_config = None
+    if len(objectives) > 1:
+        from google.adk.agents.run_config import RunConfig, ToolThreadPoolConfig
+        run_config = RunConfig(tool_thread_pool_config=ToolThreadPoolConfig(max_workers=len(objectives)))
+    trace_sink = EventTraceSink() if EVENT_TRACE_PATH else None
+    metrics_push = {"last": time.monotonic()}
+    start_time = time.perf_counter()
+    try:
+        results = await asyncio.gather(*(
+            run_session(adk_runner, session_service, objective, session_user_id(index), ipc_q, trace_sink, metrics_push, run_config)
+            for index, objective in enumerate(objectives)))
+    finally:
+        if trace_sink:
+            trace_sink.close()
+    report_session_outcomes(ipc_q, results, time.perf_counter() - start_time)
+    return results
+
+@traced(category="child")
+async def run_adk_loop(
+    adk_runner: "Runner",
+    session_service: "BaseSessionService",
+    initial_objective: str,
+    initial_knowledge_content: str,
+    ipc_q: Optional[Any] = None
+):
+    logger.info("Starting new ADK execution loop.")
+    result = (await run_adk_sessions(adk_runner, session_service, [initial_objective], ipc_q))[0]
+    if result["status"] == "error":
         # Do not re-raise here if ipc_q is handling it, to allow graceful shutdown if possible.
-        # If no ipc_q, re-raising might be appropriate depending on desired behavior.
-        return {"status": "error", "message": f"ADK run failed: {e}"} # Return error status
-
-async def child_process_main(ipc_q: Optional[Any] = None):
-    logger.info("Child Process: Main execution started.")
+        return {"status": "error", "message": result["message"]} # Return error status
+    return result["output"]
+
+def arc_policy(observation: dict, rng: Any) -> str:
+    """Game-playing policy scored offline on the local grid-world simulator (see arc_sim.py).
+
+    This is the candidate's fast fitness signal; self-modifications may improve it. It starts as
+    a memoryless baseline: step towards the goal when the way is open, otherwise move at random.
+    It gets stuck behind walls, so it clears only part of the levels and leaves room to improve
+    (e.g. with path planning or the `_search_game_impl` tool's search).
+    """
+    cells = observation["frame"][-1]
+    height, width = len(cells), len(cells[0])
+    player = goal = None
+    for r, row in enumerate(cells):
+        for c, value in enumerate(row):
+            if value == 3:
+                player = (r, c)
+            elif value == 4:
+                goal = (r, c)
+    moves = {"ACTION1": (-1, 0), "ACTION2": (1, 0), "ACTION3": (0, -1), "ACTION4": (0, 1)}
+    if player is None or goal is None:
+        return rng.choice(list(moves))
+    open_moves = [action for action, (dr, dc) in moves.items()
+                  if 0 <= player[0] + dr < height and 0 <= player[1] + dc < width and cells[player[0] + dr][player[1] + dc] != 5]
+    closer = [action for action in open_moves
+              if abs(player[0] + moves[action][0] - goal[0]) + abs(player[1] + moves[action][1] - goal[1])
+              < abs(player[0] - goal[0]) + abs(player[1] - goal[1])]
+    return rng.choice(closer or open_moves or list(moves))
+
+@traced(category="child")
+async def run_offline_evaluation(ipc_q: Optional[Any] = None, control_q: Optional[Any] = None,
+                                 cached_evaluation: Optional[dict] = None) -> Optional[dict]:
+    """Scores the current candidate on simulated episodes, in rungs the orchestrator can stop early, and reports the result.
+
+    A `cached_evaluation` from an equivalent, already-scored candidate is reported instead of re-running.
+    """
+    if OFFLINE_EVAL_EPISODES <= 0:
+        return None
+    if cached_evaluation:
+        summary = {**cached_evaluation, 'cached': True}
+        logger.info("Reusing cached offline evaluation: mean score %.3f.", summary['mean_score'])
+        if ipc_q:
+            ipc_q.put({'type': 'task_outcome', 'status': 'offline_evaluation', 'score': summary['mean_score'],
+                       'task_scores': summary.get('task_scores', {}), 'output_summary': summary})
+        return summary
+    evaluator = SuccessiveHalvingEvaluator(ipc_q=ipc_q, control_q=control_q)
+    logger.info("Running offline evaluation: %s episodes of %s in rungs %s.", OFFLINE_EVAL_EPISODES, OFFLINE_EVAL_POLICY, evaluator.rungs)
+    try:
+        summary = await asyncio.to_thread(evaluator.run)
+    except Exception as e:
+        logger.error("Offline evaluation failed: %s", e, exc_info=True)
+        return None
+    if ipc_q:
+        ipc_q.put({'type': 'task_outcome', 'status': 'offline_evaluation', 'score': summary['mean_score'],
+                   'task_scores': summary['task_scores'], 'output_summary': summary})
+    return summary
+
+async def child_process_main(ipc_q: Optional[Any] = None, control_q: Optional[Any] = None,
+                             cached_evaluation: Optional[dict] = None, mode: str = "full",
+                             objective: Optional[str] = None):
+    """Runs the child: offline evaluation, then the ADK loop.
+
+    `mode` "evaluate" runs only the evaluation and "mutate" only the ADK loop, for the pipelined orchestrator.
+    "job" runs only the ADK loop on `objective` (instead of input.md), for batch runs.
+    """
+    logger.info("Child Process: Main execution started (mode: %s).", mode)
+    if mode not in ("mutate", "job"):
+        evaluation = await run_offline_evaluation(ipc_q, control_q, cached_evaluation)
+        if evaluation and evaluation['early_stopped']:
+            logger.info("Child Process: Candidate stopped at an early evaluation rung; skipping the ADK loop.")
+            return
+    if mode == "evaluate":
+        return
     
     # Read initial objective and knowledge from files
-    objective = _read_file_impl("input.md").strip()
+    if objective is None:
+        objective = _read_file_impl("input.md").strip()
     if not objective or "Error reading" in objective:
         logger.warning("input.md not found or empty/error. Using default objective.")
         objective = "Perform a default system check and report status."
@@ -1120,24 +1302,33 @@ async def child_process_main(ipc_q: Optional[Any] = None):
     )
     
     try:
-        await run_adk_loop(
-            adk_runner_instance,
-            session_service_instance,
-            objective,
-            knowledge,
-            ipc_q
-        )
+        if ADK_CONCURRENT_SESSIONS > 1:
+            await run_adk_sessions(
+                adk_runner_instance,
+                session_service_instance,
+                session_objectives(objective, ADK_CONCURRENT_SESSIONS),
+                ipc_q
+            )
+        else:
+            await run_adk_loop(
+                adk_runner_instance,
+                session_service_instance,
+                objective,
+                knowledge,
+                ipc_q
+            )
         logger.info("Child Process: ADK loop completed.")
     except Exception as e:
         # This catch is a fallback; run_adk_loop should ideally handle its errors and inform ipc_q.
-        logger.critical(f"Child Process: Unhandled exception from run_adk_loop: {e}", exc_info=True)
+        logger.critical("Child Process: Unhandled exception from run_adk_loop: %s", e, exc_info=True)
         if ipc_q: ipc_q.put({'type': 'critical_error', 'message': f'Child process main error: {e}', 'details': traceback.format_exc()})
 
 if __name__ == "__main__":
     # This block is for direct execution, often for testing.
     # Ensure basic logging is configured if run this way.
     if not logging.getLogger().hasHandlers(): # Check if root logger is already configured
-        logging.basicConfig(level=os.getenv("LOGGING_LEVEL", "INFO").upper())
+        from log_config import configure_logging
+        configure_logging(level=os.getenv("LOGGING_LEVEL", "INFO").upper())
 
     logger.info("Executing system_agents.py directly (intended for testing or standalone run).")
     
@@ -0,0 +1,49 @@
+import random
+from collections import Counter
+import pytest
+from agent_archive import AgentArchive, FenwickTree
+
+def test_fenwick_tree_prefix_sums_and_find():
+    """Test prefix sums, growth past the initial capacity and weighted lookup."""
+    tree = FenwickTree(capacity=2)
+    for i, value in enumerate([1.0, 0.0, 2.0, 3.0, 4.0]):
+        tree.set(i, value)
+
+    assert tree.prefix_sum(2) == 3.0
+    assert tree.total() == 10.0
+    assert tree.find(0.5) == 0
+    assert tree.find(1.0) == 2
+    assert tree.find(9.9) == 4
+    tree.set(4, 0.0)
+    assert tree.total() == 6.0
+
+def test_dgm_weight_penalises_children():
+    """Test that the DGM weight follows the score sigmoid divided by 1 + children."""
+    archive = AgentArchive(strategy="dgm")
+    archive.add("root", score=0.5)
+    assert archive.weight("root") == pytest.approx(0.5)
+
+    archive.add("child-a", parent="root")
+    archive.add("child-b", parent="root")
+
+    assert archive.weight("root") == pytest.approx(0.5 / 3)
+    assert archive.lineage("child-b") == ["root", "child-b"]
+
+def test_sample_follows_weights():
+    """Test that sampling frequencies track the archive weights."""
+    archive = AgentArchive(strategy="dgm")
+    archive.add("strong", score=0.9)
+    archive.add("weak", score=0.1)
+    rng = random.Random(0)
+
+    counts = Counter(archive.sample(rng) for _ in range(2000))
+
+    assert counts["strong"] > 0.9 * 2000
+    archive.update_score("weak", 0.9)
+    counts = Counter(archive.sample(rng) for _ in range(2000))
+    assert 800 < counts["weak"] < 1200
+
+def test_unknown_strategy_is_rejected():
+    """Test that an unknown selection strategy raises a ValueError."""
+    with pytest.raises(ValueError):
+        AgentArchive(strategy="greedy")
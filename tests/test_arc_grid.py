@@ -0,0 +1,73 @@
+import json
+import numpy as np
+import pytest
+import arc_grid
+from arc_grid import GridFrame, format_diff, _grid_observe_impl, _grid_diff_impl
+
+@pytest.fixture(autouse=True)
+def reset_frames():
+    """Fixture to isolate the per-stream frame memory between tests."""
+    arc_grid._last_frames.clear()
+    yield
+    arc_grid._last_frames.clear()
+
+def test_text_encoding_round_trip():
+    """Test that the hex text encoding is lossless."""
+    frame = GridFrame(np.array([[0, 15, 3], [10, 10, 1]]))
+
+    assert frame.to_text() == "0f3\naa1"
+    assert GridFrame.from_text(frame.to_text()) == frame
+
+def test_rle_collapses_runs_and_repeated_rows():
+    """Test run-length encoding of a mostly uniform board."""
+    cells = np.zeros((4, 8), dtype=np.uint8)
+    cells[3, 2:5] = 7
+
+    assert GridFrame(cells).to_rle() == "8x0\n(same x2)\n2x0 3x7 3x0"
+
+def test_format_diff_lists_only_changed_cells():
+    """Test that a diff reports changed cells grouped by row."""
+    previous = GridFrame(np.zeros((64, 64), dtype=np.uint8))
+    cells = previous.cells.copy()
+    cells[5, 3] = 4
+    cells[5, 9] = 2
+    cells[40, 1] = 12
+
+    output = format_diff(previous, GridFrame(cells))
+
+    assert output.splitlines() == [
+        "DIFF 3 cells changed (c<col>:<old>-><new>):",
+        "r5: c3:0->4 c9:0->2",
+        "r40: c1:0->c",
+    ]
+    assert len(output) < len(GridFrame(cells).to_text()) / 50
+
+def test_format_diff_falls_back_to_full_frame():
+    """Test that large changes and shape changes produce a full frame."""
+    previous = GridFrame(np.zeros((4, 4), dtype=np.uint8))
+
+    assert format_diff(previous, GridFrame(np.ones((4, 4), dtype=np.uint8))).startswith("FRAME 4x4")
+    assert format_diff(previous, GridFrame(np.zeros((2, 2), dtype=np.uint8))).startswith("FRAME 2x2")
+    assert format_diff(previous, previous) == "NO CHANGE"
+
+def test_grid_observe_impl_streams_diffs():
+    """Test that the observe tool returns a full frame first and diffs afterwards."""
+    first = [[0, 0], [0, 0]]
+    second = [[0, 0], [0, 9]]
+
+    assert _grid_observe_impl(json.dumps({"frame": [first]})).startswith("FRAME 2x2")
+    assert _grid_observe_impl(json.dumps({"frame": [second]})) == "DIFF 1 cells changed (c<col>:<old>-><new>):\nr1: c1:0->9"
+    assert _grid_observe_impl(json.dumps(second), stream="other").startswith("FRAME")
+
+def test_grid_tools_report_invalid_frames():
+    """Test that malformed frames return an error string instead of raising."""
+    assert "Error parsing frame" in _grid_observe_impl("not json")
+    assert "Error parsing frame" in _grid_diff_impl("[[1, 2]]", "[[99, 2]]")
+
+def test_grid_frame_rejects_values_the_cast_would_alter():
+    """Test that out-of-range, non-integer and empty grids are rejected instead of wrapped or truncated."""
+    for frame_json in ("[[271, 3]]", "[[-1, 3]]", "[[3.9, 2]]", "[[]]", "[]"):
+        with pytest.raises(ValueError):
+            GridFrame.from_json(frame_json)
+        assert "Error parsing frame" in _grid_observe_impl(frame_json, stream="invalid")
+    assert GridFrame.from_json("[[15, 3]]").cells.tolist() == [[15, 3]]
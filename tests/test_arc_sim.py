@@ -0,0 +1,66 @@
+from arc_sim import GridWorldGame, GAME_OVER, NOT_FINISHED, WIN, run_batch, run_episode
+
+def test_game_is_deterministic_per_seed():
+    """Test that the same seed produces the same levels."""
+    first = GridWorldGame(seed=7)
+    second = GridWorldGame(seed=7)
+
+    assert first.observation() == second.observation()
+    assert first.observation()["frame"] != GridWorldGame(seed=8).observation()["frame"]
+
+def test_walls_block_movement_and_actions_run_out():
+    """Test that the game ends in GAME_OVER once the action budget is spent."""
+    game = GridWorldGame(seed=1, max_actions=3)
+    for _ in range(3):
+        observation = game.step("ACTION5")
+
+    assert observation["state"] == GAME_OVER
+    assert observation["action_counter"] == 3
+    assert game.step("ACTION1")["action_counter"] == 3
+
+def test_clone_is_independent():
+    """Test that stepping a clone leaves the original untouched."""
+    game = GridWorldGame(seed=3)
+    clone = game.clone()
+    for action in clone.available_actions:
+        clone.step(action)
+
+    assert game.action_counter == 0
+    assert game.state == NOT_FINISHED
+    assert clone.action_counter == 4
+
+def test_greedy_policy_wins_every_level():
+    """Test that the shortest-path baseline clears all levels."""
+    episode = run_episode("arc_sim:greedy_policy", seed=5)
+
+    assert episode["state"] == WIN
+    assert episode["score"] == 1.0
+    assert episode["error"] is None
+
+def test_scored_policy_leaves_room_to_improve():
+    """Test that the candidate's own policy scores below the shortest-path oracle, so fitness can rank candidates."""
+    candidate = run_batch("system_agents:arc_policy", seeds=list(range(32)), workers=1)
+    oracle = run_batch("arc_sim:greedy_policy", seeds=list(range(32)), workers=1)
+
+    assert oracle["mean_score"] == 1.0
+    assert 0.0 < candidate["mean_score"] < oracle["mean_score"]
+    assert candidate["errors"] == 0
+
+def test_run_batch_aggregates_across_process_pool():
+    """Test that batched episodes across workers are aggregated."""
+    summary = run_batch("arc_sim:random_policy", seeds=list(range(6)), workers=2, max_actions=20)
+
+    assert summary["episodes"] == 6
+    assert 0.0 <= summary["mean_score"] <= 1.0
+    assert summary["mean_actions"] <= 20
+    assert summary["errors"] == 0
+
+def _crashing_policy(observation, rng):
+    raise RuntimeError("boom")
+
+def test_run_episode_reports_policy_errors():
+    """Test that a crashing policy ends the episode with an error instead of raising."""
+    episode = run_episode("tests.test_arc_sim:_crashing_policy", seed=0)
+
+    assert episode["error"] is not None
+    assert episode["score"] == 0.0
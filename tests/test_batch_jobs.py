@@ -0,0 +1,51 @@
+import pytest
+
+from batch_jobs import JobLedger, JobResult, load_jobs
+
+def _jobs_with_ids(tmp_path, ids):
+    path = tmp_path / "jobs.jsonl"
+    path.write_text("".join(f'{{"id": "{job_id}", "objective": "x"}}\n' for job_id in ids))
+    return load_jobs(str(path))
+
+def test_load_jobs_accepts_objectives_and_backlog_lines(tmp_path):
+    """Test that jobs come from objective lines or title/body lines, with ids kept, numbered or rejected when repeated."""
+    path = tmp_path / "jobs.jsonl"
+    path.write_text('{"id": "g1", "objective": "Play game 1", "seed": 7}\n\n'
+                    '{"request_id": "user-001", "title": "Speed up", "body": "Make it fast."}\n'
+                    '{"objective": "Play game 3"}\n')
+
+    jobs = load_jobs(str(path))
+
+    assert [job.job_id for job in jobs] == ["g1", "user-001", "line-4"]
+    assert jobs[0].metadata == {"seed": 7}
+    assert jobs[1].objective == "Speed up\n\nMake it fast."
+    path.write_text('{"id": "g1", "objective": "a"}\n{"id": "g1", "objective": "b"}\n')
+    with pytest.raises(ValueError):
+        load_jobs(str(path))
+
+def test_ledger_resumes_from_results_file(tmp_path):
+    """Test that a reopened ledger treats final and exhausted jobs as done and the rest as pending."""
+    path = tmp_path / "results.jsonl"
+    ledger = JobLedger(str(path), max_attempts=2)
+    ledger.record(JobResult(job_id="a", status="completed"))
+    ledger.record(JobResult(job_id="b", status="failed"))
+    ledger.record(JobResult(job_id="c", status="timeout"))
+    ledger.record(JobResult(job_id="c", status="failed", attempt=2))
+    with open(path, "a") as f:
+        f.write('{"job_id": "d", "status"\n')  # Torn write from a crash.
+
+    resumed = JobLedger(str(path), max_attempts=2)
+    jobs = _jobs_with_ids(tmp_path, ["a", "b", "c", "d"])
+
+    assert [job.job_id for job in resumed.pending(jobs)] == ["b", "d"]
+    assert resumed.attempts("b") == 1
+    assert resumed.summary() == {"completed": 1, "failed": 2}
+
+def test_ledger_refuses_results_of_another_agent_commit(tmp_path):
+    """Test that a results file is only resumed with the agent commit that produced it."""
+    path = tmp_path / "results.jsonl"
+    JobLedger(str(path), agent_commit="abc").record(JobResult(job_id="a", status="completed", agent_commit="abc"))
+
+    assert JobLedger(str(path), agent_commit="abc").is_done("a")
+    with pytest.raises(ValueError, match="abc"):
+        JobLedger(str(path), agent_commit="def")
@@ -0,0 +1,36 @@
+import asyncio
+
+from benchmarks import bench_artifacts, bench_parent_selection, compare_results, measure
+
+def test_measure_awaits_coroutines():
+    """Test that measure runs plain calls and awaits coroutines returned by the callable."""
+    calls = []
+
+    async def work():
+        await asyncio.sleep(0)
+        calls.append("async")
+
+    result = measure(lambda: work(), repeats=3, number=2)
+    measure(lambda: calls.append("sync"), repeats=1)
+
+    assert calls == ["async"] * 6 + ["sync"]
+    assert result["repeats"] == 3 and result["min_s"] <= result["median_s"]
+
+def test_compare_results_flags_only_real_regressions():
+    """Test that slowdowns count as regressions only above both the threshold and the noise floor."""
+    baseline = {"results": {"slow": {"median_s": 0.010}, "noisy": {"median_s": 0.00001}, "fast": {"median_s": 0.010}}}
+    current = {"results": {"slow": {"median_s": 0.015}, "noisy": {"median_s": 0.00002}, "fast": {"median_s": 0.011}, "new": {"median_s": 1.0}}}
+
+    rows = {row["name"]: row for row in compare_results(baseline, current, threshold_pct=20, noise_floor_ms=0.05)}
+
+    assert set(rows) == {"slow", "noisy", "fast"}
+    assert [name for name, row in rows.items() if row["regression"]] == ["slow"]
+    assert round(rows["slow"]["change_pct"]) == 50
+
+def test_artifact_and_parent_selection_benchmarks_run():
+    """Test that the artifact and parent-selection benchmarks run against small scratch stores."""
+    results = {**bench_artifacts(sizes=(10,), repeats=1), **bench_parent_selection(sizes=(10,), repeats=1)}
+
+    assert set(results) == {"artifacts.save.10", "artifacts.load_latest.10", "artifacts.list_versions.10",
+                            "parent_selection.cold.10", "parent_selection.warm.10"}
+    assert all(result["median_s"] > 0 for result in results.values())
@@ -0,0 +1,60 @@
+from eval_cache import EvaluationCache, evaluation_key, normalized_code_hash, text_fingerprint
+
+SOURCE = '''import os
+import json
+
+def tool(path):
+    """Reads a file."""
+    return os.path.exists(path)
+'''
+
+def test_code_hash_ignores_formatting_comments_and_import_order():
+    """Test that cosmetic edits keep the hash while behavioural ones change it."""
+    cosmetic = '''import json
+import os
+# A comment.
+
+def tool( path ):
+    """Reads a file."""
+
+    return os.path.exists(path)  # trailing comment
+'''
+    assert normalized_code_hash(cosmetic) == normalized_code_hash(SOURCE)
+    assert normalized_code_hash(SOURCE.replace("Reads a file.", "Deletes a file.")) != normalized_code_hash(SOURCE)
+    assert normalized_code_hash(SOURCE.replace("exists", "isfile")) != normalized_code_hash(SOURCE)
+    assert normalized_code_hash("def broken(:") != normalized_code_hash("def broken( :")
+
+def test_text_fingerprint_ignores_trailing_whitespace_and_blank_runs():
+    """Test that the knowledge fingerprint only tracks meaningful edits."""
+    assert text_fingerprint("# Learnings\n\n\n- a  \n") == text_fingerprint("# Learnings\n\n- a")
+    assert text_fingerprint("# Learnings\n- a") != text_fingerprint("# Learnings\n- b")
+
+def test_cache_persists_between_instances(tmp_path):
+    """Test that stored evaluations are found again by a new cache instance."""
+    code, knowledge = tmp_path / "system_agents.py", tmp_path / "knowledge.md"
+    code.write_text(SOURCE)
+    knowledge.write_text("# Learnings")
+    key = evaluation_key(code, knowledge)
+    cache = EvaluationCache(str(tmp_path / "cache.json"))
+    assert cache.get(key) is None
+    cache.put(key, {"mean_score": 0.5}, tag_name="agent-archive-1")
+
+    code.write_text("# reformatted\n" + SOURCE)
+    reloaded = EvaluationCache(str(tmp_path / "cache.json"))
+
+    assert reloaded.get(evaluation_key(code, knowledge)) == {"mean_score": 0.5}
+    assert (cache.misses, reloaded.hits) == (1, 1)
+
+def test_key_tracks_the_evaluation_sources(tmp_path):
+    """Test that changing the simulator or the evaluation harness next to the code changes the key."""
+    code, knowledge = tmp_path / "system_agents.py", tmp_path / "knowledge.md"
+    code.write_text(SOURCE)
+    knowledge.write_text("# Learnings")
+    (tmp_path / "arc_sim.py").write_text("def greedy_policy(): pass\n")
+    key = evaluation_key(code, knowledge)
+
+    (tmp_path / "arc_sim.py").write_text("def greedy_policy(): return 1\n")
+    assert evaluation_key(code, knowledge) != key
+    key = evaluation_key(code, knowledge)
+    (tmp_path / "eval_harness.py").write_text("RUNGS = 2\n")
+    assert evaluation_key(code, knowledge) != key
@@ -0,0 +1,48 @@
+import queue
+from eval_harness import SuccessiveHalvingEvaluator, parse_rungs, promotion_threshold, wait_for_decision
+
+def _fake_batch(policy_spec, seeds, workers=1):
+    """Scores each seed as seed / 10 so partial scores are predictable."""
+    return {"task_scores": {f"gridworld-{s}": s / 10 for s in seeds}, "wall_time_s": 0.1, "errors": 0}
+
+def test_parse_rungs_is_cumulative_and_capped():
+    """Test that rung sizes are sorted, deduplicated and capped at the suite size."""
+    assert parse_rungs("32, 8,8,500", total=64) == [8, 32, 64]
+    assert parse_rungs("", total=16) == [16]
+    assert parse_rungs("4", total=0) == []
+
+def test_promotion_threshold_uses_archive_percentile():
+    """Test that the threshold is the requested percentile of archive scores."""
+    assert promotion_threshold([], 50) is None
+    assert promotion_threshold([0.2, 0.4, 0.6], 50) == 0.4
+
+def test_evaluator_stops_when_orchestrator_aborts():
+    """Test that an abort decision stops the evaluation after the current rung."""
+    ipc_q, control_q = queue.Queue(), queue.Queue()
+    control_q.put({"type": "evaluation_decision", "continue": False})
+    evaluator = SuccessiveHalvingEvaluator("p:f", rungs=[2, 4, 8], ipc_q=ipc_q, control_q=control_q, batch_fn=_fake_batch)
+
+    summary = evaluator.run()
+
+    assert summary["early_stopped"]
+    assert summary["episodes"] == 2
+    assert summary["rungs_completed"] == 1
+    assert ipc_q.get_nowait() == {"type": "evaluation_progress", "rung": 1, "rungs": 3, "episodes": 2, "score": 0.05}
+
+def test_evaluator_runs_all_rungs_when_promoted():
+    """Test that promoted candidates are scored on every task, reusing earlier rungs."""
+    control_q = queue.Queue()
+    for _ in range(2):
+        control_q.put({"type": "evaluation_decision", "continue": True})
+    evaluator = SuccessiveHalvingEvaluator("p:f", rungs=[2, 4, 8], control_q=control_q, batch_fn=_fake_batch)
+
+    summary = evaluator.run()
+
+    assert not summary["early_stopped"]
+    assert summary["episodes"] == 8
+    assert summary["mean_score"] == sum(range(8)) / 80
+
+def test_wait_for_decision_continues_on_timeout():
+    """Test that a missing decision does not stall the child."""
+    assert wait_for_decision(queue.Queue(), timeout_s=0.01)
+    assert wait_for_decision(None)
@@ -0,0 +1,78 @@
+import pytest
+from google.adk.events import Event
+from google.genai import types as adk_types
+from event_trace import EventTraceSink, read_trace, summarize_latency, trace_files
+
+def _call_event(name, call_id):
+    call = adk_types.FunctionCall(id=call_id, name=name, args={"path": "knowledge.md"})
+    return Event(author="ExecutorAgent", content=adk_types.Content(parts=[adk_types.Part(function_call=call)]))
+
+def _response_event(name, call_id):
+    response = adk_types.FunctionResponse(id=call_id, name=name, response={"output": "ok"})
+    return Event(author="ExecutorAgent", content=adk_types.Content(parts=[adk_types.Part(function_response=response)]))
+
+def test_sink_records_tool_calls_and_tokens(tmp_path):
+    """Test that events are streamed with tool, payload and token fields."""
+    path = tmp_path / "events.jsonl"
+    sink = EventTraceSink(path=str(path), compress=False)
+    text_event = Event(
+        author="PlannerAgent",
+        content=adk_types.Content(parts=[adk_types.Part(text="1. Plan")]),
+        usage_metadata=adk_types.GenerateContentResponseUsageMetadata(prompt_token_count=10, candidates_token_count=5, total_token_count=15),
+    )
+    sink.record_event(text_event, session_id="s1")
+    sink.record_event(_call_event("_read_file_impl", "c1"))
+    sink.record_event(_response_event("_read_file_impl", "c1"))
+    sink.close()
+
+    records = list(read_trace(str(path)))
+
+    assert [r["seq"] for r in records] == [1, 2, 3]
+    assert records[0]["author"] == "PlannerAgent"
+    assert records[0]["tokens"]["total"] == 15
+    assert records[0]["payload_bytes"] == len("1. Plan")
+    assert records[1]["tool_calls"] == ["_read_file_impl"]
+    assert records[2]["tool_latency_s"]["_read_file_impl"] >= 0
+
+def test_sink_serializes_on_the_writer_thread(tmp_path):
+    """Test that records are turned into JSON by the writer thread, not by the caller."""
+    import threading
+
+    class ThreadName:
+        def __str__(self):
+            return threading.current_thread().name
+
+    path = tmp_path / "events.jsonl"
+    sink = EventTraceSink(path=str(path), compress=False)
+    sink.write({"seq": 1, "thread": ThreadName()})
+    sink.close()
+
+    assert next(read_trace(str(path)))["thread"] != threading.current_thread().name
+
+def test_summarize_latency_breakdowns():
+    """Test per-agent and per-tool aggregation."""
+    records = [
+        {"author": "PlannerAgent", "latency_s": 2.0, "tokens": {"total": 100}},
+        {"author": "ExecutorAgent", "latency_s": 1.0, "tool_latency_s": {"_execute_command_impl": 0.5}},
+        {"author": "ExecutorAgent", "latency_s": 3.0, "tool_latency_s": {"_execute_command_impl": 1.5}},
+    ]
+
+    summary = summarize_latency(iter(records))
+
+    assert summary["agents"]["PlannerAgent"]["tokens"] == 100
+    assert summary["agents"]["ExecutorAgent"]["count"] == 2
+    assert summary["agents"]["ExecutorAgent"]["total_s"] == pytest.approx(4.0)
+    assert summary["tools"]["_execute_command_impl"]["mean_s"] == pytest.approx(1.0)
+    assert summary["tools"]["_execute_command_impl"]["max_s"] == pytest.approx(1.5)
+
+def test_rotation_compresses_and_reader_follows_backups(tmp_path):
+    """Test that rotated files are gzipped and still read back in order."""
+    path = tmp_path / "events.jsonl"
+    sink = EventTraceSink(path=str(path), max_bytes=400, backup_count=10, compress=True)
+    for _ in range(20):
+        sink.record_event(Event(author="PlannerAgent", content=adk_types.Content(parts=[adk_types.Part(text="x" * 50)])))
+    sink.close()
+
+    files = trace_files(str(path))
+    assert any(f.name.endswith(".gz") for f in files)
+    assert [r["seq"] for r in read_trace(str(path))] == list(range(1, 21))
@@ -0,0 +1,73 @@
+import json
+import pytest
+from arc_sim import GridWorldGame
+from game_search import TranspositionTable, manhattan_heuristic, search, _search_game_impl
+
+def _replay(game, actions):
+    replay = game.clone()
+    for action in actions:
+        replay.apply_action(action)
+    return replay
+
+@pytest.mark.parametrize("strategy", ["bfs", "best_first", "mcts"])
+def test_search_clears_level(strategy):
+    """Test that every strategy finds an action sequence that clears the level."""
+    game = GridWorldGame(seed=2, size=12)
+
+    result = search(game, strategy=strategy, heuristic=manhattan_heuristic, max_nodes=20000)
+
+    assert result.solved
+    assert _replay(game, result.actions).score == 1
+    assert game.action_counter == 0
+
+def test_bfs_finds_shortest_path_and_uses_transpositions():
+    """Test that BFS returns an optimal path and skips revisited states."""
+    game = GridWorldGame(seed=4, size=12)
+    optimal = search(game, strategy="bfs", max_nodes=20000)
+    best_first = search(game, strategy="best_first", heuristic=manhattan_heuristic, max_nodes=20000)
+
+    assert len(best_first.actions) == len(optimal.actions)
+    assert optimal.transposition_hits > 0
+
+def test_search_respects_node_budget():
+    """Test that the node budget stops an unsolvable search."""
+    result = search(GridWorldGame(seed=4, size=32), strategy="bfs", max_nodes=3)
+
+    assert not result.solved
+    assert result.stop_reason == "node_budget"
+    assert result.nodes_expanded == 3
+
+def test_heuristic_is_called_in_batches():
+    """Test that best-first scores many children per heuristic call."""
+    calls = []
+    def counting_heuristic(games):
+        calls.append(len(games))
+        return manhattan_heuristic(games)
+
+    result = search(GridWorldGame(seed=2, size=16), strategy="best_first", heuristic=counting_heuristic, max_nodes=20000, batch_size=8)
+
+    assert result.solved
+    assert max(calls) > 4
+
+def test_transposition_table_counts_hits():
+    """Test that revisits at equal or greater depth are rejected."""
+    table = TranspositionTable()
+
+    assert table.visit("a", 3)
+    assert not table.visit("a", 4)
+    assert table.visit("a", 1)
+    assert table.hits == 1
+
+def test_search_game_tool_plans_on_frame():
+    """Test the Executor tool on a frame with custom colours."""
+    frame = [
+        [1, 0, 0],
+        [9, 9, 0],
+        [2, 0, 0],
+    ]
+
+    result = json.loads(_search_game_impl(json.dumps(frame), strategy="bfs", player_color=1, goal_color=2, wall_colors="9"))
+
+    assert result["solved"]
+    assert result["actions"] == ["ACTION4", "ACTION4", "ACTION2", "ACTION2", "ACTION3", "ACTION3"]
+    assert "Error" in _search_game_impl("[[0, 0]]")
@@ -0,0 +1,51 @@
+import io
+import pytest
+from PIL import Image
+from image_pipeline import ImagePipeline
+
+@pytest.fixture
+def large_png(tmp_path):
+    """Fixture to create a 2000x1000 PNG file."""
+    path = tmp_path / "board.png"
+    Image.new("RGB", (2000, 1000), color=(10, 200, 30)).save(path)
+    return path
+
+@pytest.mark.asyncio
+async def test_load_downsamples_to_max_dim(tmp_path, large_png):
+    """Test that images larger than max_dim are resized and re-encoded."""
+    pipeline = ImagePipeline(cache_dir=str(tmp_path / "cache"), max_dim=256)
+
+    digest, part = await pipeline.load(str(large_png))
+
+    with Image.open(io.BytesIO(part.inline_data.data)) as img:
+        assert img.size == (256, 128)
+    assert part.inline_data.mime_type == "image/png"
+    assert pipeline.stats["misses"] == 1
+
+@pytest.mark.asyncio
+async def test_processed_bytes_are_cached_across_instances(tmp_path, large_png):
+    """Test that a second pipeline reuses the on-disk cache without reprocessing."""
+    cache_dir = str(tmp_path / "cache")
+    first_digest, first_part = await ImagePipeline(cache_dir=cache_dir, max_dim=256).load(str(large_png))
+
+    second = ImagePipeline(cache_dir=cache_dir, max_dim=256)
+    second_digest, second_part = await second.load(str(large_png))
+
+    assert second.stats == {"hits": 1, "misses": 0, "bytes_in": 0, "bytes_out": 0}
+    assert second_digest == first_digest
+    assert second_part.inline_data.data == first_part.inline_data.data
+
+@pytest.mark.asyncio
+async def test_load_many_deduplicates_identical_images(tmp_path, large_png):
+    """Test that the same content under two paths is attached only once."""
+    copy_path = tmp_path / "board_copy.png"
+    copy_path.write_bytes(large_png.read_bytes())
+    text_path = tmp_path / "notes.txt"
+    text_path.write_text("not an image")
+    pipeline = ImagePipeline(cache_dir=str(tmp_path / "cache"), max_dim=256)
+
+    parts = await pipeline.load_many([str(large_png), str(copy_path), str(text_path)])
+
+    assert parts[str(large_png)] is not None
+    assert parts[str(copy_path)] is None
+    assert str(text_path) not in parts
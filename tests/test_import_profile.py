@@ -0,0 +1,30 @@
+from import_profile import compare, parse_importtime, profile_import
+
+SAMPLE = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     _io
+import time:       900 |       1500 |   json.decoder
+import time:      2000 |       3500 | json
+"""
+
+def test_parse_importtime():
+    """Test that -X importtime lines are parsed with depth, self and cumulative times."""
+    entries = parse_importtime(SAMPLE)
+
+    assert [e["module"] for e in entries] == ["_io", "json.decoder", "json"]
+    assert entries[2] == {"module": "json", "depth": 0, "self_us": 2000, "cumulative_us": 3500}
+    assert entries[0]["depth"] == 2
+
+def test_tools_import_without_adk():
+    """Test that the tool module loads without pulling in the ADK or genai packages."""
+    result = profile_import("agent_tools", repeats=1)
+
+    assert result["median_ms"] > 0
+    assert not any(name.startswith("google.") for name in result["slowest_self_ms"])
+    assert result["modules_imported"] < 300
+
+def test_compare_flags_regressions():
+    """Test that only modules slower than the allowed percentage are reported."""
+    previous = {"results": {"a": {"median_ms": 100.0}, "b": {"median_ms": 100.0}}}
+    current = {"results": {"a": {"median_ms": 130.0}, "b": {"median_ms": 105.0}, "c": {"median_ms": 1.0}}}
+
+    assert compare(previous, current, 20.0) == ["a: 100.0ms -> 130.0ms (+30%)"]
@@ -0,0 +1,50 @@
+import io
+import json
+import logging
+import sys
+
+import pytest
+
+from log_config import JsonFormatter, PayloadCapFilter, configure_logging, stop_logging
+
+@pytest.fixture
+def restore_logging():
+    root_logger = logging.getLogger()
+    level = root_logger.level
+    yield
+    configure_logging(level=logging.getLevelName(level))
+
+def test_json_formatter_includes_extras_and_exception():
+    """Test that JSON records carry the merged message, extra fields and the traceback."""
+    try:
+        raise ValueError("bad frame")
+    except ValueError:
+        record = logging.getLogger("dgm").makeRecord("dgm", logging.ERROR, __file__, 1, "cycle %s failed", (3,), None, extra={"tag": "agent-archive-1"})
+        record.exc_info = sys.exc_info()
+
+    entry = json.loads(JsonFormatter().format(record))
+
+    assert entry["message"] == "cycle 3 failed" and entry["level"] == "ERROR" and entry["tag"] == "agent-archive-1"
+    assert "ValueError: bad frame" in entry["exc"]
+
+def test_payload_cap_truncates_long_messages():
+    """Test that messages over the cap are cut with a marker and shorter ones are only merged."""
+    cap = PayloadCapFilter(max_chars=10)
+    long_record = logging.makeLogRecord({"msg": "state: %s", "args": ("x" * 100,)})
+    short_record = logging.makeLogRecord({"msg": "loop %s", "args": (2,)})
+
+    assert cap.filter(long_record) and cap.filter(short_record)
+    assert long_record.getMessage() == "state: xxx... [97 chars truncated]"
+    assert short_record.getMessage() == "loop 2" and short_record.args is None
+
+def test_queue_listener_writes_records(restore_logging):
+    """Test that records logged through the queue reach the stream once the listener is stopped."""
+    stream = io.StringIO()
+    configure_logging(level="INFO", fmt="json", use_queue=True, stream=stream)
+    logger = logging.getLogger("dgm.test")
+    logger.debug("hidden %s", "debug")
+    logger.info("visible %s", {"loop": 1})
+    stop_logging()
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [line["message"] for line in lines] == ["visible {'loop': 1}"]
@@ -1,11 +1,17 @@
 import pytest
+import queue
+from collections import deque
+from pathlib import Path
 from unittest.mock import MagicMock, patch
-from main_orchestrator import MainOrchestrator
+import json
+from agent_archive import AgentRecord
+from main_orchestrator import MainOrchestrator, git_load_tag_messages
 
 @pytest.fixture
 def orchestrator(mocker):
     """Fixture to create a MainOrchestrator instance with a mocked Git repo."""
     mocker.patch('main_orchestrator.get_git_repo')
+    mocker.patch('main_orchestrator.PrescreenWorker')
     return MainOrchestrator()
 
 def test_list_agent_tags(orchestrator, mocker):
@@ -39,7 +45,7 @@ def test_get_performance_from_tag(orchestrator, mocker):
 def test_select_parent_agent(orchestrator, mocker):
     """Test the weighted random selection of a parent agent."""
     mocker.patch.object(orchestrator, '_list_agent_tags', return_value=['tag1', 'tag2'])
-    mocker.patch.object(orchestrator, '_get_performance_from_tag', side_effect=[0.1, 0.9])
+    mocker.patch.object(orchestrator, '_load_agent_records', return_value={'tag1': AgentRecord(score=0.1), 'tag2': AgentRecord(score=0.9)})
     
     selected_tag = orchestrator._select_parent_agent()
     
@@ -60,4 +66,399 @@ def test_run_loop_orchestration(mock_sleep, orchestrator, mocker):
     
     orchestrator._select_parent_agent.assert_called_once()
     orchestrator.start_child_process.assert_called_once_with(tag_name='parent-tag')
-    orchestrator.terminate_child_process.assert_called_once()
\ No newline at end of file
+    orchestrator.terminate_child_process.assert_called_once()
+
+def test_offline_evaluation_score_is_recorded_in_tag(orchestrator, mocker):
+    """Test that an offline evaluation score updates the current agent's archive tag."""
+    orchestrator.current_agent_tag = 'agent-archive-20250722-100000'
+    mocker.patch('main_orchestrator.git_get_tag_message', return_value=AgentRecord(description="Agent self-modification: system_agents.py", parent="agent-archive-20250721-090000").to_message())
+    mock_update = mocker.patch('main_orchestrator.git_update_tag_message', return_value=True)
+
+    orchestrator.handle_child_message({"type": "task_outcome", "status": "offline_evaluation", "score": 0.75,
+                                       "task_scores": {"gridworld-0": 0.5, "gridworld-1": 1.0}, "output_summary": {"wall_time_s": 2.0}})
+
+    tag_name, message = mock_update.call_args[0]
+    record = json.loads(message)
+    assert tag_name == 'agent-archive-20250722-100000'
+    assert record["score"] == 0.75
+    assert record["task_scores"] == {"gridworld-0": 0.5, "gridworld-1": 1.0}
+    assert record["wall_time_s"] == 2.0
+    assert record["parent"] == "agent-archive-20250721-090000"
+
+@patch('main_orchestrator.time.sleep', return_value=None)
+def test_messages_left_by_an_exited_child_go_to_its_own_tag(mock_sleep, orchestrator, mocker):
+    """Test that an early-stopped child's last message is handled before the next parent is selected."""
+    orchestrator.run_once = True
+    orchestrator.ipc_queue = queue.Queue()
+    mocker.patch.object(orchestrator, '_select_parent_agent', return_value='agent-archive-20250722-100000')
+    mocker.patch.object(orchestrator, 'terminate_child_process')
+    mocker.patch('main_orchestrator.git_get_tag_message', return_value=AgentRecord().to_message())
+    mock_update = mocker.patch('main_orchestrator.git_update_tag_message', return_value=True)
+
+    def start_child(tag_name):
+        # The child exits at once, leaving its early-stopped evaluation in the queue.
+        orchestrator.current_agent_tag = tag_name
+        orchestrator.child_process = MagicMock(exitcode=0, **{"is_alive.return_value": False})
+        orchestrator.ipc_queue.put({"type": "task_outcome", "status": "offline_evaluation", "score": 0.25,
+                                    "task_scores": {}, "output_summary": {"early_stopped": True}})
+    mocker.patch.object(orchestrator, 'start_child_process', side_effect=start_child)
+
+    orchestrator.run()
+
+    assert orchestrator.ipc_queue.empty()
+    tag_name, message = mock_update.call_args[0]
+    assert tag_name == 'agent-archive-20250722-100000' and json.loads(message)["score"] == 0.25
+
+@patch('main_orchestrator.time.sleep', return_value=None)
+def test_crash_after_a_metrics_push_is_still_a_failure(mock_sleep, orchestrator, mocker):
+    """Test that a child exiting nonzero is handled as a failure even if it left a metrics message."""
+    orchestrator.run_once = True
+    orchestrator.ipc_queue = queue.Queue()
+    mocker.patch.object(orchestrator, '_select_parent_agent', return_value=None)
+    mocker.patch.object(orchestrator, 'terminate_child_process')
+    mock_failure = mocker.patch.object(orchestrator, 'handle_child_failure')
+
+    def start_child(tag_name):
+        orchestrator.child_process = MagicMock(exitcode=-9, **{"is_alive.return_value": False})
+        orchestrator.ipc_queue.put({"type": "metrics", "metrics": {}})
+    mocker.patch.object(orchestrator, 'start_child_process', side_effect=start_child)
+
+    orchestrator.run()
+
+    assert orchestrator.ipc_queue.empty()
+    mock_failure.assert_called_once()
+
+@patch('main_orchestrator.time.sleep', return_value=None)
+def test_wall_limit_kill_goes_through_failure_handling(mock_sleep, orchestrator, mocker):
+    """Test that a child terminated for its wall-time limit is handled as a failure, not as finished."""
+    orchestrator.run_once = True
+    orchestrator.ipc_queue = queue.Queue()
+    mocker.patch.object(orchestrator, '_select_parent_agent', return_value=None)
+    mock_failure = mocker.patch.object(orchestrator, 'handle_child_failure')
+
+    def start_child(tag_name):
+        orchestrator.child_process = MagicMock(exitcode=None, **{"is_alive.return_value": True})
+        orchestrator.resource_monitor = MagicMock(**{"sample.return_value": {}, "over_wall_limit.return_value": True,
+                                                     "finish.return_value": {"cpu_s": 1.0, "peak_rss_mb": 50.0, "max_fds": 8, "wall_time_s": 2.0}})
+    mocker.patch.object(orchestrator, 'start_child_process', side_effect=start_child)
+
+    orchestrator.run()
+
+    mock_failure.assert_called_once()
+    assert orchestrator.child_stop_reason is None
+
+def test_parent_is_recorded_and_used_for_selection(orchestrator, mocker):
+    """Test that new archive tags record their parent and join the selection tree."""
+    orchestrator.current_agent_tag = 'agent-archive-20250722-100000'
+    orchestrator.archive.add('agent-archive-20250722-100000', score=0.9)
+    mocker.patch('main_orchestrator.git_commit_files', return_value=True)
+    mocker.patch('main_orchestrator.git_get_current_commit_hash', return_value='abc')
+    mock_tag = mocker.patch('main_orchestrator.git_tag_commit', return_value=True)
+
+    orchestrator.handle_child_message({"type": "modification_complete", "file_path": "system_agents.py", "status": "success"})
+
+    new_tag, message = mock_tag.call_args[0]
+    assert AgentRecord.from_message(message).parent == 'agent-archive-20250722-100000'
+    assert orchestrator.archive.parents[new_tag] == 'agent-archive-20250722-100000'
+    assert orchestrator.archive.children['agent-archive-20250722-100000'] == [new_tag]
+    assert orchestrator.current_agent_tag == new_tag
+
+def test_critical_error_and_usage_are_recorded(orchestrator, mocker):
+    """Test that failure reasons and token costs are written to the running agent's tag."""
+    orchestrator.current_agent_tag = 'agent-archive-20250722-100000'
+    mocker.patch('main_orchestrator.TOKEN_COST_PER_MILLION', 2.0)
+    mocker.patch('main_orchestrator.git_get_tag_message', return_value=AgentRecord(tokens=500_000).to_message())
+    mock_update = mocker.patch('main_orchestrator.git_update_tag_message', return_value=True)
+    mocker.patch.object(orchestrator, 'handle_child_failure')
+
+    orchestrator.handle_child_message({"type": "critical_error", "message": "ADK run failed: boom"})
+    orchestrator._record_usage(orchestrator.current_agent_tag, {"tokens": 500_000, "wall_time_s": 3.5})
+
+    failure, usage = [AgentRecord.from_message(call.args[1]) for call in mock_update.call_args_list]
+    assert failure.failure_reason == "ADK run failed: boom"
+    assert usage.tokens == 1_000_000
+    assert usage.cost_usd == 2.0
+    assert usage.wall_time_s == 3.5
+
+def test_git_load_tag_messages_reads_all_tags(tmp_path, mocker):
+    """Test that tag messages are bulk-loaded from a real repository."""
+    import git
+    repo = git.Repo.init(tmp_path)
+    with repo.config_writer() as config:
+        config.set_value("user", "name", "t")
+        config.set_value("user", "email", "t@example.com")
+    (tmp_path / "f.txt").write_text("x")
+    repo.index.add(["f.txt"])
+    repo.index.commit("init", author=git.Actor("t", "t@example.com"), committer=git.Actor("t", "t@example.com"))
+    repo.create_tag("agent-archive-1", message=AgentRecord(score=0.5).to_message())
+    repo.create_tag("agent-archive-2", message="Agent self-modification: system_agents.py\nParent: agent-archive-1 Performance: 0.25")
+    repo.create_tag("other-tag", message="ignored")
+    mocker.patch('main_orchestrator.get_git_repo', return_value=repo)
+
+    messages = git_load_tag_messages()
+
+    assert set(messages) == {"agent-archive-1", "agent-archive-2"}
+    assert AgentRecord.from_message(messages["agent-archive-1"]).score == 0.5
+    legacy = AgentRecord.from_message(messages["agent-archive-2"])
+    assert (legacy.parent, legacy.score, legacy.description) == ("agent-archive-1", 0.25, "Agent self-modification: system_agents.py")
+
+def test_sync_archive_reads_only_new_tag_messages(orchestrator, mocker):
+    """Test that each parent selection only loads the metadata of tags added since the last one."""
+    tags = ['agent-archive-1', 'agent-archive-2']
+    mocker.patch.object(orchestrator, '_list_agent_tags', side_effect=lambda: list(tags))
+    load = mocker.patch('main_orchestrator.git_load_tag_messages',
+                        side_effect=lambda pattern, names=None: {tag: AgentRecord(score=0.5).to_message() for tag in (names or tags)})
+
+    orchestrator._sync_archive()
+    tags.append('agent-archive-3')
+    orchestrator._sync_archive()
+    orchestrator._sync_archive()
+
+    assert [call.args[1] for call in load.call_args_list] == [None, ['agent-archive-3']]
+    assert len(orchestrator.archive) == 3
+
+def test_evaluation_progress_below_archive_percentile_is_stopped(orchestrator):
+    """Test that a candidate scoring below the archive threshold is told to stop."""
+    orchestrator.current_agent_tag = 'agent-archive-3'
+    for tag, score in [('agent-archive-1', 0.6), ('agent-archive-2', 0.8)]:
+        orchestrator.archive.add(tag, score=score)
+    orchestrator.control_queue = MagicMock()
+
+    orchestrator.handle_child_message({"type": "evaluation_progress", "rung": 1, "rungs": 3, "episodes": 8, "score": 0.5})
+    orchestrator.handle_child_message({"type": "evaluation_progress", "rung": 2, "rungs": 3, "episodes": 32, "score": 0.9})
+
+    decisions = [call.args[0]["continue"] for call in orchestrator.control_queue.put.call_args_list]
+    assert decisions == [False, True]
+
+def test_cached_evaluation_is_passed_to_child(orchestrator, mocker, tmp_path):
+    """Test that a candidate equivalent to an evaluated one reuses its cached evaluation."""
+    from eval_cache import EvaluationCache
+    orchestrator.eval_cache = EvaluationCache(str(tmp_path / "cache.json"))
+    mocker.patch('main_orchestrator.evaluation_key', return_value='key')
+    mocker.patch('main_orchestrator.git_get_current_commit_hash', return_value='abc')
+    mock_process = mocker.patch('main_orchestrator.multiprocessing.Process')
+
+    orchestrator.start_child_process()
+    assert mock_process.call_args.kwargs['args'][2] is None
+    orchestrator.handle_child_message({"type": "task_outcome", "status": "offline_evaluation", "score": 0.5, "output_summary": {"mean_score": 0.5}})
+    orchestrator.child_process = None
+    orchestrator.start_child_process()
+
+    assert mock_process.call_args.kwargs['args'][2] == {"mean_score": 0.5}
+
+def test_early_stopped_evaluation_is_not_cached(orchestrator, tmp_path):
+    """Test that an early stop, which depended on the archive at the time, is not replayed from the cache."""
+    from eval_cache import EvaluationCache
+    orchestrator.eval_cache = EvaluationCache(str(tmp_path / "cache.json"))
+
+    orchestrator._record_offline_evaluation(None, "key", {"score": 0.25, "output_summary": {"mean_score": 0.25, "early_stopped": True}})
+    assert orchestrator.eval_cache.get("key") is None
+    orchestrator._record_offline_evaluation(None, "key", {"score": 0.5, "output_summary": {"mean_score": 0.5, "early_stopped": False}})
+    assert orchestrator.eval_cache.get("key")["mean_score"] == 0.5
+
+def test_prescreen_rejection_rolls_back_without_tagging(orchestrator, mocker, tmp_path):
+    """Test that a candidate failing the pre-screen is restored and not archived."""
+    from prescreen import PrescreenResult
+    knowledge = tmp_path / "knowledge.md"
+    knowledge.write_text("# Learnings")
+    mocker.patch('main_orchestrator.KNOWLEDGE_FILE', knowledge)
+    mocker.patch('main_orchestrator.git_show_file', return_value="def old(): pass")
+    mock_rollback = mocker.patch('main_orchestrator.git_rollback_files', return_value=True)
+    mock_commit = mocker.patch('main_orchestrator.git_commit_files', return_value=True)
+    mock_tag = mocker.patch('main_orchestrator.git_tag_commit')
+    orchestrator.last_good_commit_hash = 'abc'
+    orchestrator.prescreen_worker.screen.return_value = PrescreenResult(passed=False, changed=["old"], failures=["tests/test_tools.py::test_read"])
+
+    orchestrator.handle_child_message({"type": "modification_complete", "file_path": "system_agents.py", "status": "success"})
+
+    mock_rollback.assert_called_once()
+    assert mock_rollback.call_args[0][1] == 'abc'
+    assert mock_commit.call_args[0][0] == [knowledge]
+    mock_tag.assert_not_called()
+    assert "PRE-SCREEN REJECTION" in knowledge.read_text()
+
+class _FakeStage:
+    """Stands in for a pipeline stage child that already reported its messages and exited."""
+    started = []
+
+    def __init__(self, mode, workdir, cached_evaluation=None, objective=None):
+        self.mode = mode
+        self.ipc_queue = queue.Queue()
+        self.control_queue = MagicMock()
+        self.monitor = MagicMock(**{"over_wall_limit.return_value": False,
+                                    "finish.return_value": {"cpu_s": 1.0, "peak_rss_mb": 50.0, "max_fds": 8, "wall_time_s": 2.0}})
+        self._messages = {
+            "mutate": [{"type": "modification_complete", "file_path": "system_agents.py", "status": "success_reload_requested"}],
+            "evaluate": [{"type": "task_outcome", "status": "offline_evaluation", "score": 0.6, "output_summary": {}}],
+            "job": [] if objective == "crash" else [{"type": "task_outcome", "status": "completed_normally", "output_summary": objective,
+                                                     "usage": {"tokens": 10, "wall_time_s": 1.5}}],
+        }[mode]
+        _FakeStage.started.append(mode)
+
+    def is_alive(self):
+        return False
+
+    def messages(self, timeout=0.0):
+        messages, self._messages = self._messages, []
+        return messages
+
+    def stop(self):
+        pass
+
+def test_pipeline_moves_candidates_from_mutation_to_evaluation(orchestrator, mocker):
+    """Test that a mutation is queued as a candidate branch, then archived with its parent and scored."""
+    from main_orchestrator import PipelinedEvolution
+    _FakeStage.started = []
+    mocker.patch('main_orchestrator._StageProcess', _FakeStage)
+    mocker.patch('main_orchestrator.git_worktree_checkout', return_value=True)
+    mocker.patch('main_orchestrator.git_commit_worktree', return_value='c0ffee')
+    mocker.patch('main_orchestrator.evaluation_key', return_value='key')
+    mock_tag = mocker.patch('main_orchestrator.git_tag_commit', return_value=True)
+    mock_record = mocker.patch.object(orchestrator, '_record_offline_evaluation')
+    mocker.patch.object(orchestrator, '_select_parent_agent', return_value='agent-archive-1')
+    pipeline = PipelinedEvolution(orchestrator, queue_size=1)
+
+    pipeline.step()  # starts mutating
+    pipeline.step()  # mutation finishes -> candidate queued; queue full so no new mutation; evaluation starts
+    assert _FakeStage.started == ["mutate", "evaluate"]
+    pipeline.step()  # evaluation finishes; a new mutation starts
+
+    tag_name, message = mock_tag.call_args[0]
+    assert mock_tag.call_args.kwargs['ref'] == 'c0ffee'
+    assert AgentRecord.from_message(message).parent == 'agent-archive-1'
+    assert orchestrator.archive.parents[tag_name] == 'agent-archive-1'
+    mock_record.assert_called_once_with(tag_name, 'key', {"type": "task_outcome", "status": "offline_evaluation", "score": 0.6, "output_summary": {}})
+    assert pipeline.evaluated == 1
+    assert _FakeStage.started == ["mutate", "evaluate", "mutate"]
+
+def test_pipeline_does_not_queue_a_mutation_rejected_by_the_prescreen(orchestrator, mocker):
+    """Test that a mutation failing the pre-screen is neither branched nor queued for evaluation."""
+    from main_orchestrator import PipelinedEvolution
+    from prescreen import PrescreenResult
+    mocker.patch('main_orchestrator.git_commit_worktree', return_value='c0ffee')
+    mocker.patch('main_orchestrator.git_worktree_checkout', return_value=True)
+    mocker.patch('main_orchestrator.git_show_file', side_effect=lambda ref, path: f"def f(): return '{ref}'")
+    pipeline = PipelinedEvolution(orchestrator, queue_size=1)
+    pipeline.mutation_parent = 'agent-archive-1'
+    pipeline.prescreen_worker.screen.return_value = PrescreenResult(passed=False, import_error="SyntaxError")
+
+    pipeline._handle_mutation_message({"type": "modification_complete", "file_path": "system_agents.py"})
+
+    assert pipeline.prescreen_worker.screen.call_args[0] == ("def f(): return 'agent-archive-1'", "def f(): return 'c0ffee'")
+    assert pipeline.candidates.empty()
+    orchestrator.repo.create_head.assert_not_called()
+
+def test_pipeline_requeues_a_candidate_that_fails_to_check_out(orchestrator, mocker):
+    """Test that a candidate whose checkout fails is retried, then dropped with its branch."""
+    from main_orchestrator import PIPELINE_CHECKOUT_ATTEMPTS, PipelinedEvolution
+    mocker.patch('main_orchestrator._StageProcess', _FakeStage)
+    checkout = mocker.patch('main_orchestrator.git_worktree_checkout', return_value=False)
+    orchestrator.repo = MagicMock()
+    pipeline = PipelinedEvolution(orchestrator, queue_size=1)
+    pipeline.candidates.put_nowait({"name": "1", "branch": "candidates/1", "commit": "c0ffee", "parent": None})
+
+    pipeline._start_evaluation()
+    assert pipeline.candidates.qsize() == 1 and pipeline.evaluation is None
+    for _ in range(PIPELINE_CHECKOUT_ATTEMPTS - 1):
+        pipeline._start_evaluation()
+
+    assert checkout.call_count == PIPELINE_CHECKOUT_ATTEMPTS
+    assert pipeline.candidates.empty()
+    orchestrator.repo.delete_head.assert_called_once_with("candidates/1", force=True)
+
+def test_batch_runs_jobs_on_workers_and_retries_crashes(orchestrator, tmp_path, mocker):
+    """Test that batch jobs run on one pinned agent version, crashed jobs are retried and results are appended."""
+    from main_orchestrator import BatchEvaluation
+    _FakeStage.started = []
+    mocker.patch('main_orchestrator._StageProcess', _FakeStage)
+    checkout = mocker.patch('main_orchestrator.git_worktree_checkout', return_value=True)
+    orchestrator.repo = MagicMock(**{"commit.return_value.hexsha": "abc123"})
+    jobs = tmp_path / "jobs.jsonl"
+    jobs.write_text('{"id": "a", "objective": "solve a"}\n{"id": "b", "objective": "crash"}\n{"id": "c", "objective": "solve c"}\n')
+    results = tmp_path / "results.jsonl"
+    batch = BatchEvaluation(orchestrator, str(jobs), str(results), workers=2, max_attempts=2)
+
+    batch.step()  # a and b start
+    assert _FakeStage.started == ["job", "job"]
+    for _ in range(4):
+        batch.step()
+
+    lines = [json.loads(line) for line in results.read_text().splitlines()]
+    assert [(r["job_id"], r["status"]) for r in lines] == [("a", "completed"), ("b", "failed"), ("c", "completed"), ("b", "failed")]
+    assert lines[0]["tokens"] == 10 and lines[0]["agent_commit"] == "abc123" and lines[0]["output_summary"] == "solve a"
+    assert all(call.args[1] == "abc123" for call in checkout.call_args_list)
+    assert not batch.pending and not batch.running
+    assert BatchEvaluation(orchestrator, str(jobs), str(results)).pending == deque()
+
+def test_worktree_checkout_and_commit(tmp_path, mocker):
+    """Test that candidates are committed in a separate worktree without touching the main checkout."""
+    import git
+    from main_orchestrator import git_commit_worktree, git_worktree_checkout
+    repo = git.Repo.init(tmp_path / "repo")
+    with repo.config_writer() as config:
+        config.set_value("user", "name", "t")
+        config.set_value("user", "email", "t@example.com")
+    (tmp_path / "repo" / "system_agents.py").write_text("v1")
+    repo.index.add(["system_agents.py"])
+    base = repo.index.commit("init").hexsha
+    mocker.patch('main_orchestrator.get_git_repo', return_value=repo)
+    worktree = tmp_path / "wt"
+
+    assert git_worktree_checkout(worktree, base)
+    (worktree / "system_agents.py").write_text("v2")
+    commit = git_commit_worktree(worktree, [Path("system_agents.py"), Path("knowledge.md")], "candidate")
+    (worktree / "scratch.txt").write_text("x")
+    assert git_worktree_checkout(worktree, base)
+
+    assert repo.commit(commit).parents[0].hexsha == base
+    assert (tmp_path / "repo" / "system_agents.py").read_text() == "v1"
+    assert (worktree / "system_agents.py").read_text() == "v1"
+    assert not (worktree / "scratch.txt").exists()
+
+def test_child_resources_are_recorded_in_tag(orchestrator, mocker):
+    """Test that a finished child's CPU, peak RSS and FDs are accumulated in its agent's tag."""
+    orchestrator.current_agent_tag = 'agent-archive-1'
+    mocker.patch('main_orchestrator.git_get_tag_message', return_value=AgentRecord(cpu_s=2.0, peak_rss_mb=300.0, max_fds=10).to_message())
+    mock_update = mocker.patch('main_orchestrator.git_update_tag_message', return_value=True)
+    orchestrator.resource_monitor = MagicMock(**{"finish.return_value": {"cpu_s": 1.5, "peak_rss_mb": 120.0, "max_fds": 40, "wall_time_s": 9.0}})
+
+    orchestrator._finish_resource_accounting()
+    orchestrator._finish_resource_accounting()
+
+    record = AgentRecord.from_message(mock_update.call_args[0][1])
+    assert (record.cpu_s, record.peak_rss_mb, record.max_fds) == (3.5, 300.0, 40)
+    assert mock_update.call_count == 1
+    assert orchestrator.resource_monitor is None
+
+def test_child_over_wall_limit_is_terminated(orchestrator, mocker):
+    """Test that exceeding the wall-time limit terminates the child and records why."""
+    orchestrator.current_agent_tag = 'agent-archive-1'
+    mocker.patch('main_orchestrator.git_get_tag_message', return_value=AgentRecord().to_message())
+    mock_update = mocker.patch('main_orchestrator.git_update_tag_message', return_value=True)
+    mock_terminate = mocker.patch.object(orchestrator, 'terminate_child_process')
+    orchestrator.resource_monitor = MagicMock(**{"sample.return_value": {"rss_mb": 1.0}, "over_wall_limit.return_value": True})
+
+    orchestrator._check_child_resources()
+
+    mock_terminate.assert_called_once()
+    assert "wall-time limit" in AgentRecord.from_message(mock_update.call_args[0][1]).failure_reason
+
+
+def test_child_metrics_merged_and_counted(orchestrator, mocker):
+    """Test that metrics pushed by the child are merged and orchestrator events are counted."""
+    from metrics import CANDIDATES_EVALUATED, REGISTRY
+    mocker.patch.object(REGISTRY, '_metrics', dict(REGISTRY._metrics))
+    for metric in REGISTRY._metrics.values():
+        mocker.patch.object(metric, '_values', {})
+    orchestrator.current_agent_tag = None
+
+    orchestrator.handle_child_message({'type': 'metrics', 'metrics': {
+        'dgm_llm_calls_total': [[['PlannerAgent'], 2.0]],
+        'dgm_tool_latency_seconds': [[['read_file'], [1] + [0] * 13 + [0.004, 1]]],
+    }})
+    orchestrator.handle_child_message({'type': 'task_outcome', 'status': 'offline_evaluation', 'score': 0.5, 'output_summary': {'cached': True}})
+
+    text = REGISTRY.render()
+    assert 'dgm_llm_calls_total{agent="PlannerAgent"} 2' in text
+    assert 'dgm_tool_latency_seconds_count{tool="read_file"} 1' in text
+    assert CANDIDATES_EVALUATED.value() == 1
@@ -0,0 +1,81 @@
+import socket
+import urllib.request
+from metrics import REGISTRY, MetricsRegistry, observe_event_record, start_metrics_server
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def test_render_prometheus_text_format():
+    """Test that counters, gauges and cumulative histogram buckets are rendered in exposition format."""
+    registry = MetricsRegistry()
+    calls = registry.counter("llm_calls_total", "LLM calls.", ["agent"])
+    depth = registry.gauge("queue_depth", "Queue depth.")
+    latency = registry.histogram("tool_latency_seconds", "Tool latency.", ["tool"], buckets=(0.1, 1.0))
+    calls.inc(agent="Planner")
+    calls.inc(2, agent='say "hi"')
+    depth.set(3)
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value, tool="read_file")
+
+    text = registry.render()
+
+    assert "# TYPE llm_calls_total counter" in text
+    assert 'llm_calls_total{agent="Planner"} 1' in text
+    assert 'llm_calls_total{agent="say \\"hi\\""} 2' in text
+    assert "queue_depth 3" in text
+    assert 'tool_latency_seconds_bucket{tool="read_file",le="0.1"} 1' in text
+    assert 'tool_latency_seconds_bucket{tool="read_file",le="1"} 2' in text
+    assert 'tool_latency_seconds_bucket{tool="read_file",le="+Inf"} 3' in text
+    assert 'tool_latency_seconds_count{tool="read_file"} 3' in text
+
+def test_drain_and_merge_accumulate_across_pushes():
+    """Test that drained child increments add up in the orchestrator's registry and gauges are replaced."""
+    child, parent = MetricsRegistry(), MetricsRegistry()
+    for registry in (child, parent):
+        registry.counter("tokens_total", "Tokens.", ["agent"])
+        registry.gauge("depth", "Depth.")
+        registry.histogram("latency_seconds", "Latency.", buckets=(1.0,))
+    child._metrics["tokens_total"].inc(10, agent="Planner")
+    child._metrics["latency_seconds"].observe(0.5)
+    parent.merge(child.drain())
+    child._metrics["tokens_total"].inc(5, agent="Planner")
+    child._metrics["depth"].set(4)
+    parent.merge(child.drain())
+
+    assert child.drain() == {"depth": [[[], 4.0]]}
+    assert parent._metrics["tokens_total"].value(agent="Planner") == 15
+    assert parent._metrics["latency_seconds"].value() == [1, 0, 0.5, 1]
+    assert parent._metrics["depth"].value() == 4
+
+def test_event_records_update_llm_and_tool_metrics():
+    """Test that event records count LLM calls, tokens and tool latency per agent and tool."""
+    REGISTRY.drain()
+    observe_event_record({"author": "PlannerAgent", "latency_s": 1.2, "tokens": {"prompt": 10, "output": 5, "total": 15}})
+    observe_event_record({"author": "ExecutorAgent", "latency_s": 0.1, "tool_calls": ["_read_file_impl"]})
+    observe_event_record({"author": "ExecutorAgent", "latency_s": 0.2, "tool_latency_s": {"_read_file_impl": 0.2}})
+
+    snapshot = REGISTRY.drain()
+
+    assert snapshot["dgm_llm_calls_total"] == [[["PlannerAgent"], 1.0]]
+    assert sorted(snapshot["dgm_llm_tokens_total"]) == [[["PlannerAgent", "output"], 5.0], [["PlannerAgent", "prompt"], 10.0]]
+    assert snapshot["dgm_tool_calls_total"] == [[["_read_file_impl"], 1.0]]
+    assert snapshot["dgm_tool_latency_seconds"][0][1][-1] == 1
+
+def test_metrics_server_serves_registry():
+    """Test that the endpoint serves the registry and is disabled without a port."""
+    registry = MetricsRegistry()
+    registry.counter("cycles_total", "Cycles.").inc()
+    assert start_metrics_server(port=0, registry=registry) is None
+    server = start_metrics_server(port=_free_port(), registry=registry)
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics", timeout=5) as response:
+            body = response.read().decode("utf-8")
+            content_type = response.headers["Content-Type"]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert "cycles_total 1" in body
+    assert content_type.startswith("text/plain; version=0.0.4")
@@ -0,0 +1,85 @@
+import json
+
+import pytest
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+from google.adk.runners import RunConfig
+from google.adk.sessions import BaseSessionService, Session
+from google.genai import types as adk_types
+from unittest.mock import MagicMock
+
+import system_agents
+from model_cascade import ModelCascade
+from system_agents import ExecutorAgent, PlannerAgent
+
+def _context():
+    return InvocationContext(
+        session=Session(id="cascade_session", appName="test_app", userId="test_user", state={"objective": "Test", "knowledge": "Test"}),
+        session_service=MagicMock(spec=BaseSessionService),
+        invocation_id="test_invocation",
+        agent=MagicMock(spec=BaseAgent),
+        run_config=RunConfig(),
+    )
+
+def _mock_llm(responses):
+    """Replies with responses[model], with 1000 tokens of usage per reply."""
+    async def run(agent, context):
+        yield Event(author=agent.name, content=adk_types.Content(role="model", parts=[adk_types.Part(text=responses[agent.model])]),
+                    usage_metadata=adk_types.GenerateContentResponseUsageMetadata(total_token_count=1000))
+    return run
+
+def test_attempts_are_summed_per_tier_with_costs():
+    """Test that tier stats count outcomes, tokens and cost per agent and model."""
+    cascade = ModelCascade(costs={"pro": 10.0})
+    for model, rejection in (("flash", "bad"), ("pro", None), ("flash", None)):
+        with cascade.attempt("Agent", model, 0 if model == "flash" else 1) as attempt:
+            cascade.observe(MagicMock(usage_metadata=MagicMock(total_token_count=500)))
+            attempt.finish(rejection)
+
+    stats = cascade.stats()
+    assert {key: (s["calls"], s["accepted"], s["rejected"], s["tokens"]) for key, s in stats.items()} == {
+        "Agent/flash": (2, 1, 1, 1000), "Agent/pro": (1, 1, 0, 500)}
+    assert stats["Agent/pro"]["cost_usd"] == pytest.approx(0.005) and stats["Agent/flash"]["cost_usd"] == 0
+
+@pytest.mark.asyncio
+async def test_planner_escalates_only_when_the_plan_is_rejected(monkeypatch, mocker):
+    """Test that an unnumbered plan from the first model is retried on the next one, and a good plan is not."""
+    monkeypatch.setenv("PLANNER_LLM_CASCADE", "flash,pro")
+    mocker.patch("system_agents.MODEL_CASCADE", ModelCascade(costs={}))
+    monkeypatch.setattr(LlmAgent, "_run_async_impl", _mock_llm({"flash": "Sure, I can help with that.", "pro": "1. Read knowledge.md."}))
+    planner = PlannerAgent()
+    context = _context()
+
+    async for _ in planner._run_async_impl(context):
+        pass
+
+    assert context.session.state["planner_raw_output"] == "1. Read knowledge.md."
+    assert planner.model == "flash"
+    stats = system_agents.MODEL_CASCADE.stats()
+    assert (stats["PlannerAgent/flash"]["rejected"], stats["PlannerAgent/pro"]["accepted"]) == (1, 1)
+    assert stats["PlannerAgent/pro"]["tokens"] == 1000
+
+    monkeypatch.setattr(LlmAgent, "_run_async_impl", _mock_llm({"flash": "1. Report status.", "pro": "unused"}))
+    async for _ in planner._run_async_impl(context):
+        pass
+    assert system_agents.MODEL_CASCADE.stats()["PlannerAgent/pro"]["calls"] == 1
+
+@pytest.mark.asyncio
+async def test_executor_escalates_when_a_claimed_change_does_not_compile(tmp_path, monkeypatch, mocker):
+    """Test that the executor retries on the next model when its claimed system_agents.py change fails to compile."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "system_agents.py").write_text("def broken(:\n")
+    (tmp_path / "knowledge.md").write_text("# System Learnings")
+    monkeypatch.setenv("EXECUTOR_LLM_CASCADE", "flash,pro")
+    mocker.patch("system_agents.MODEL_CASCADE", ModelCascade(costs={}))
+    claimed = json.dumps({"execution_summary": "Modified.", "system_agents_modified_and_validated": True})
+    honest = json.dumps({"execution_summary": "Could not modify.", "system_agents_modified_and_validated": False})
+    monkeypatch.setattr(LlmAgent, "_run_async_impl", _mock_llm({"flash": claimed, "pro": honest}))
+    context = _context()
+    context.session.state["planner_raw_output"] = "1. Modify system_agents.py."
+
+    async for _ in ExecutorAgent()._run_async_impl(context):
+        pass
+
+    assert context.session.state["executor_outcome"] == {"execution_summary": "Could not modify.", "system_agents_modified_and_validated": False}
@@ -0,0 +1,66 @@
+from pathlib import Path
+from prescreen import MODULE_LEVEL, PrescreenWorker, changed_symbols, select_tests
+
+OLD = '''import os
+
+PROMPT = "Be brief."
+
+def helper(x):
+    return x + 1
+
+def tool(x):
+    return helper(x) * 2
+
+class Agent:
+    def run(self):
+        return PROMPT
+'''
+
+def test_changed_symbols_propagate_to_callers():
+    """Test that a changed function marks its callers, and import edits mark the module."""
+    assert changed_symbols(OLD, OLD + "\n# comment\n") == set()
+    assert changed_symbols(OLD, OLD.replace("x + 1", "x + 2")) == {"helper", "tool"}
+    assert changed_symbols(OLD, OLD.replace("Be brief.", "Be verbose.")) == {"PROMPT", "Agent"}
+    assert MODULE_LEVEL in changed_symbols(OLD, "import sys\n" + OLD)
+    assert changed_symbols(OLD, "def broken(:") == {MODULE_LEVEL}
+
+def test_select_tests_matches_referenced_symbols(tmp_path):
+    """Test that only tests touching changed symbols (directly or via fixtures) are selected."""
+    (tmp_path / "test_a.py").write_text(
+        "import pytest\nfrom mod import tool, Agent\n\n"
+        "@pytest.fixture\ndef agent():\n    return Agent()\n\n"
+        "def test_tool():\n    assert tool(1)\n\n"
+        "def test_agent(agent):\n    assert agent\n\n"
+        "def test_patch(mocker):\n    mocker.patch('mod.helper')\n")
+    (tmp_path / "test_other.py").write_text("def test_unrelated():\n    assert True\n")
+
+    assert select_tests({"Agent", "Agent.run"}, tmp_path, "mod") == [f"{tmp_path / 'test_a.py'}::test_agent"]
+    assert select_tests({"helper"}, tmp_path, "mod") == [f"{tmp_path / 'test_a.py'}::test_patch"]
+    assert len(select_tests({MODULE_LEVEL}, tmp_path, "mod")) == 3
+
+def test_worker_rejects_regressions_but_not_baseline_failures(tmp_path):
+    """Test the warm worker end to end: baseline failures are ignored, new failures and import errors are not."""
+    (tmp_path / "mod.py").write_text(OLD)
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "tests" / "test_mod.py").write_text(
+        "from mod import tool\n\n"
+        "def test_tool():\n    assert tool(1) == 4\n\n"
+        "def test_known_broken():\n    assert tool(1) == 0\n")
+    worker = PrescreenWorker(root=str(tmp_path), module_name="mod", warm_modules=["pytest"], timeout_s=60)
+    try:
+        worker.start(wait=True)
+        ok = worker.screen(OLD, OLD.replace("* 2", "* 2 "))
+        assert ok.passed and ok.selected_tests == []
+
+        (tmp_path / "mod.py").write_text(OLD.replace("x + 1", "x + 3"))
+        broken = worker.screen(OLD, OLD.replace("x + 1", "x + 3"))
+        assert not broken.passed
+        assert broken.failures == ["tests/test_mod.py::test_tool"]
+        assert worker.baseline_failures == {"tests/test_mod.py::test_known_broken"}
+
+        (tmp_path / "mod.py").write_text(OLD.replace("import os", "import does_not_exist"))
+        unimportable = worker.screen(OLD, OLD.replace("import os", "import does_not_exist"))
+        assert not unimportable.passed
+        assert "ModuleNotFoundError" in unimportable.import_error
+    finally:
+        worker.close()
@@ -0,0 +1,51 @@
+import multiprocessing
+import os
+import resource
+import time
+from resource_monitor import ResourceMonitor, apply_limits, read_proc_stats
+
+def _burn_and_hold(seconds):
+    data = bytearray(64 * 1024 * 1024)
+    files = [open(os.devnull) for _ in range(20)]
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        data[0] = (data[0] + 1) % 256
+
+def _exit_with_nofile_limit(queue):
+    apply_limits(nofile=64)
+    queue.put(resource.getrlimit(resource.RLIMIT_NOFILE))
+
+def test_read_proc_stats_of_current_process():
+    """Test that CPU, RSS and FD counts are read from /proc."""
+    stats = read_proc_stats(os.getpid())
+
+    assert stats["cpu_s"] > 0
+    assert stats["rss_mb"] > 1
+    assert stats["fds"] >= 3
+    assert read_proc_stats(2 ** 22 + 12345) is None
+
+def test_monitor_tracks_peaks_of_a_child():
+    """Test that sampling a busy child records its CPU time, peak RSS and open files."""
+    child = multiprocessing.Process(target=_burn_and_hold, args=(0.6,))
+    child.start()
+    monitor = ResourceMonitor(child.pid)
+    while child.is_alive():
+        monitor.sample()
+        time.sleep(0.05)
+    figures = monitor.finish()
+
+    assert monitor.samples > 0
+    assert figures["cpu_s"] > 0.1
+    assert figures["peak_rss_mb"] > 60
+    assert figures["max_fds"] >= 20
+    assert figures["wall_time_s"] >= 0.5
+
+def test_apply_limits_in_child():
+    """Test that setrlimit caps are applied in the process that calls apply_limits."""
+    queue = multiprocessing.Queue()
+    child = multiprocessing.Process(target=_exit_with_nofile_limit, args=(queue,))
+    child.start()
+    child.join()
+
+    assert queue.get(timeout=5) == (64, 64)
+    assert resource.getrlimit(resource.RLIMIT_NOFILE) != (64, 64)
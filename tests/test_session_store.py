@@ -0,0 +1,109 @@
+import pytest
+from google.adk.events import Event, EventActions
+from google.genai import types as adk_types
+from session_store import SqliteSessionService
+
+APP = "test_app"
+USER = "test_user"
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Fixture providing a temporary database path."""
+    return str(tmp_path / "sessions.db")
+
+def _event(text="hello", state_delta=None):
+    return Event(
+        author="tester",
+        content=adk_types.Content(parts=[adk_types.Part(text=text)]),
+        actions=EventActions(state_delta=state_delta or {}),
+    )
+
+@pytest.mark.asyncio
+async def test_session_round_trip(db_path):
+    """Test that state and events survive a new service instance."""
+    service = SqliteSessionService(db_path=db_path)
+    session = await service.create_session(app_name=APP, user_id=USER, state={"objective": "Play ls20"})
+    await service.append_event(session, _event(state_delta={"current_loop": 1}))
+    service.close()
+
+    reopened = SqliteSessionService(db_path=db_path)
+    restored = await reopened.get_session(app_name=APP, user_id=USER, session_id=session.id)
+
+    assert restored.state == {"objective": "Play ls20", "current_loop": 1}
+    assert len(restored.events) == 1
+    assert restored.events[0].content.parts[0].text == "hello"
+
+@pytest.mark.asyncio
+async def test_direct_state_mutations_are_persisted_as_deltas(db_path):
+    """Test that direct state assignments are persisted and only changed keys are written."""
+    service = SqliteSessionService(db_path=db_path)
+    session = await service.create_session(app_name=APP, user_id=USER, state={"a": 1, "b": 2})
+    rows_after_create = service.rows_written
+
+    session.state["b"] = 3
+    session.state["planner_raw_output"] = "1. Do this."
+    await service.append_event(session, _event())
+
+    # Two changed keys plus one event row; the unchanged key "a" is not rewritten.
+    assert service.rows_written - rows_after_create == 3
+
+    del session.state["a"]
+    session.state["temp:scratch"] = "not persisted"
+    await service.append_event(session, _event())
+
+    restored = await SqliteSessionService(db_path=db_path).get_session(app_name=APP, user_id=USER, session_id=session.id)
+    assert restored.state == {"b": 3, "planner_raw_output": "1. Do this."}
+
+@pytest.mark.asyncio
+async def test_state_is_encoded_off_the_event_loop(db_path, monkeypatch):
+    """Test that appending an event encodes the session state in the worker thread, not on the loop."""
+    import threading
+    import session_store
+    service = SqliteSessionService(db_path=db_path)
+    session = await service.create_session(app_name=APP, user_id=USER, state={"a": 1})
+    encoding_threads = set()
+    encode = session_store.encode_state_value
+
+    def recording_encode(value):
+        encoding_threads.add(threading.get_ident())
+        return encode(value)
+    monkeypatch.setattr(session_store, "encode_state_value", recording_encode)
+
+    session.state["b"] = 2
+    await service.append_event(session, _event())
+
+    assert encoding_threads and threading.get_ident() not in encoding_threads
+    restored = await service.get_session(app_name=APP, user_id=USER, session_id=session.id)
+    assert restored.state == {"a": 1, "b": 2}
+
+@pytest.mark.asyncio
+async def test_pydantic_state_values_round_trip(db_path):
+    """Test that Part objects stored in state are restored as Parts."""
+    service = SqliteSessionService(db_path=db_path)
+    image = adk_types.Part(inline_data=adk_types.Blob(mime_type="image/png", data=b"\x89PNG"))
+    session = await service.create_session(app_name=APP, user_id=USER, state={"objective_image": image})
+
+    restored = await service.get_session(app_name=APP, user_id=USER, session_id=session.id)
+
+    assert isinstance(restored.state["objective_image"], adk_types.Part)
+    assert restored.state["objective_image"].inline_data.data == b"\x89PNG"
+
+@pytest.mark.asyncio
+async def test_list_and_delete_sessions(db_path):
+    """Test listing sessions by recency and deleting them."""
+    service = SqliteSessionService(db_path=db_path)
+    first = await service.create_session(app_name=APP, user_id=USER)
+    second = await service.create_session(app_name=APP, user_id=USER)
+    await service.append_event(first, _event())
+
+    listed = (await service.list_sessions(app_name=APP, user_id=USER)).sessions
+    assert [s.id for s in listed] == [second.id, first.id]
+
+    await service.delete_session(app_name=APP, user_id=USER, session_id=first.id)
+    assert await service.get_session(app_name=APP, user_id=USER, session_id=first.id) is None
+
+def test_wal_mode_enabled(db_path):
+    """Test that the database is opened in WAL mode."""
+    service = SqliteSessionService(db_path=db_path)
+    mode = service._conn.execute("PRAGMA journal_mode").fetchone()[0]
+    assert mode.lower() == "wal"
@@ -0,0 +1,34 @@
+import json
+
+from metrics import STRUCTURED_OUTPUTS
+from structured_output import JsonObjectScanner, extract_json_objects, parse_structured_output
+from system_agents import ExecutorOutput, LearnerOutput
+
+def test_scanner_finds_objects_across_chunks():
+    """Test that objects split over chunks are emitted once complete, ignoring braces inside strings."""
+    scanner = JsonObjectScanner()
+    text = 'Here you go:\n```json\n{"a": "}{", "b": {"c": "\\"}"}}\n```\nand {"d": 1}'
+    objects = [obj for i in range(0, len(text), 5) for obj in scanner.feed(text[i:i + 5])]
+
+    assert [json.loads(obj) for obj in objects] == [{"a": "}{", "b": {"c": '"}'}}, {"d": 1}]
+    assert extract_json_objects('{"broken": } then {"ok": "line\nbreak"}') == [{"ok": "line\nbreak"}]
+
+def test_parse_structured_output_counts_how_responses_were_parsed():
+    """Test that direct, prose-wrapped and unusable responses are parsed, extracted or rejected and counted."""
+    def count(result):
+        return STRUCTURED_OUTPUTS.value(agent="TestAgent", result=result) or 0
+    before = {result: count(result) for result in ("direct", "extracted", "failed")}
+    direct = json.dumps({"execution_summary": "Done.", "system_agents_modified_and_validated": True})
+    wrapped = f"I ran the plan.\n```json\n{direct}\n```\n{{\"note\": \"not the answer\"}}"
+
+    assert parse_structured_output(direct, ExecutorOutput, "TestAgent").system_agents_modified_and_validated is True
+    assert parse_structured_output(wrapped, ExecutorOutput, "TestAgent").execution_summary == "Done."
+    assert parse_structured_output("No JSON at all.", ExecutorOutput, "TestAgent") is None
+    assert {result: count(result) - before[result] for result in before} == {"direct": 1, "extracted": 1, "failed": 1}
+
+def test_learner_output_accepts_an_object_report():
+    """Test that a capability gap report written as an object is kept as JSON text."""
+    output = parse_structured_output('{"analysis_summary": "ok", "capability_gap_report": {"gap": "x"}}', LearnerOutput, "TestAgent")
+
+    assert json.loads(output.capability_gap_report) == {"gap": "x"}
+    assert output.updated_knowledge_md == ""
@@ -7,7 +7,7 @@ from google.adk.agents import BaseAgent
 from google.adk.agents.invocation_context import InvocationContext
 from google.adk.runners import RunConfig
 from google.genai import types as adk_types
-from system_agents import PlannerAgent, ExecutorAgent, LearningAgent, TopLevelOrchestratorAgent
+from system_agents import PlannerAgent, ExecutorAgent, LearningAgent, TopLevelOrchestratorAgent, _append_learning, _bounded_text
 
 @pytest.fixture
 def mock_context():
@@ -187,4 +187,126 @@ async def test_executor_agent_compilation_check(mock_context, mocker):
     final_outcome = mock_context.session.state.get("executor_outcome")
     assert final_outcome is not None
     assert final_outcome["execution_summary"] == "Fixed and ran code."
-    assert final_outcome["system_agents_modified_and_validated"] is False
\ No newline at end of file
+    assert final_outcome["system_agents_modified_and_validated"] is False
+
+def test_append_learning_is_bounded(mocker):
+    """Test that learnings behave as a ring buffer and count dropped entries."""
+    mocker.patch('system_agents.MAX_LEARNINGS', 3)
+    state = {}
+    for i in range(5):
+        _append_learning(state, f"learning {i}")
+
+    assert state["learnings"] == ["learning 2", "learning 3", "learning 4"]
+    assert state["elided_counts"]["learnings"] == 2
+
+def test_bounded_text_truncates_and_counts():
+    """Test that oversized state text keeps head and tail and records the elided size."""
+    state = {}
+    text = "a" * 50 + "b" * 50
+
+    bounded = _bounded_text(state, "execution_summary", text, limit=20)
+
+    assert bounded.startswith("a" * 10)
+    assert bounded.endswith("b" * 10)
+    assert "[80 chars elided]" in bounded
+    assert state["elided_counts"]["execution_summary"] == 80
+    assert _bounded_text(state, "execution_summary", "short", limit=20) == "short"
+
+@pytest.mark.asyncio
+async def test_concurrent_sessions_share_runner_with_separate_state(tmp_path, monkeypatch):
+    """Test that concurrent sessions on one runner keep their own objective and loop count and report once."""
+    from google.adk.agents import LlmAgent
+    from benchmarks import _mock_llm_run
+    from system_agents import get_adk_runner_and_services, run_adk_sessions, session_objectives
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("SESSION_DB_PATH", str(tmp_path / "sessions.db"))
+    monkeypatch.setattr(LlmAgent, "_run_async_impl", _mock_llm_run)
+    (tmp_path / "knowledge.md").write_text("# System Learnings")
+    runner, session_service, _, _ = get_adk_runner_and_services(initial_objective="Check status.", initial_knowledge="# System Learnings")
+    messages = []
+    ipc_q = MagicMock()
+    ipc_q.put.side_effect = messages.append
+
+    results = await run_adk_sessions(runner, session_service, session_objectives("Check status.", 2), ipc_q)
+
+    assert [r["status"] for r in results] == ["completed", "completed"]
+    sessions = [await session_service.get_session(app_name=runner.app_name, user_id=r["user_id"], session_id=r["session_id"]) for r in results]
+    assert len({s.id for s in sessions}) == 2
+    assert [s.state["objective"][-8:] for s in sessions] == ["seed 0.)", "seed 1.)"]
+    assert [s.state["current_loop"] for s in sessions] == [1, 1]
+    assert runner.agent.executor.instruction == runner.agent.executor.instruction_template
+    outcomes = [m for m in messages if m["type"] != "metrics"]
+    assert len(outcomes) == 1 and outcomes[0]["type"] == "task_outcome"
+    assert len(outcomes[0]["output_summary"]["sessions"]) == 2
+    assert outcomes[0]["usage"]["tokens"] == sum(r["usage"]["tokens"] for r in results)
+
+@pytest.mark.asyncio
+async def test_concurrent_sessions_run_tools_on_a_thread_pool(monkeypatch):
+    """Test that sync tools run on ADK's tool thread pool only when sessions run concurrently."""
+    import system_agents
+    run_configs = []
+
+    async def fake_run_session(*args):
+        run_configs.append(args[-1])
+        return {}
+    monkeypatch.setattr(system_agents, "run_session", fake_run_session)
+    monkeypatch.setattr(system_agents, "report_session_outcomes", MagicMock())
+
+    await system_agents.run_adk_sessions(MagicMock(), MagicMock(), ["a"])
+    await system_agents.run_adk_sessions(MagicMock(), MagicMock(), ["a", "b", "c"])
+
+    assert run_configs[0] is None
+    assert [config.tool_thread_pool_config.max_workers for config in run_configs[1:]] == [3, 3, 3]
+
+def test_only_one_session_writes_system_agents(tmp_path, monkeypatch):
+    """Test that a second concurrent session cannot overwrite system_agents.py until the first releases it."""
+    import system_agents
+    from system_agents import _CURRENT_SESSION, _guard_self_modification, _release_self_modification
+    target = tmp_path / "system_agents.py"
+    monkeypatch.setattr(system_agents, "SYSTEM_AGENTS_PATH", str(target))
+    monkeypatch.setitem(system_agents._SELF_MODIFICATION, "session", None)
+    writes = []
+    write_file = _guard_self_modification(lambda path, content: writes.append((path, content)) or "ok")
+
+    _CURRENT_SESSION.set("session-a")
+    assert write_file(str(target), "a") == "ok"
+    _CURRENT_SESSION.set("session-b")
+    assert "another session" in write_file(str(target), "b")
+    assert write_file(str(tmp_path / "temp_code.py"), "b") == "ok"
+    _release_self_modification("session-a")
+    assert write_file(str(target), "b") == "ok"
+    assert [content for _, content in writes] == ["a", "b", "b"]
+    _CURRENT_SESSION.set(None)
+
+def test_concurrent_sessions_get_their_own_scratch_files(monkeypatch):
+    """Test that the executor's scratch file names are per session only when sessions run concurrently."""
+    import system_agents
+    from system_agents import EXECUTOR_INSTRUCTION_V1, _session_scratch_files
+    assert _session_scratch_files(EXECUTOR_INSTRUCTION_V1, "abc-123") == EXECUTOR_INSTRUCTION_V1
+    monkeypatch.setattr(system_agents, "ADK_CONCURRENT_SESSIONS", 2)
+
+    instruction = _session_scratch_files(EXECUTOR_INSTRUCTION_V1, "abc-123")
+
+    assert "temp_system_agents.py" not in instruction and "temp_code.py" not in instruction
+    assert "python -m py_compile temp_system_agents_abc123.py" in instruction
+    assert "python -m py_compile temp_code_abc123.py" in instruction
+
+def test_executor_instruction_only_asks_for_schema_keys():
+    """Test that every response key the executor instruction asks for is a field of ExecutorOutput."""
+    import re
+    from system_agents import EXECUTOR_INSTRUCTION_V1, ExecutorOutput
+    requested = set(re.findall(r'^   - "(\w+)":', EXECUTOR_INSTRUCTION_V1, re.MULTILINE))
+    assert requested == set(ExecutorOutput.model_fields)
+
+@pytest.mark.asyncio
+async def test_reload_resumes_only_a_session_with_the_same_objective():
+    """Test that a reload-requested session is not resumed after the objective in input.md changed."""
+    from google.adk.sessions import InMemorySessionService
+    from system_agents import find_resumable_session
+    service = InMemorySessionService()
+    session = await service.create_session(app_name="app", user_id="u", state={
+        "objective": "Solve level 1.", "overall_loop_outcome": {"status": "reload_requested"}})
+
+    resumed = await find_resumable_session(service, "app", "u", "Solve level 1.")
+    assert resumed is not None and resumed.id == session.id
+    assert await find_resumable_session(service, "app", "u", "Solve level 2.") is None
@@ -0,0 +1,68 @@
+import os
+
+from agent_tools import _execute_command_impl, _read_file_impl, _write_file_impl
+from tool_cache import ToolCache
+
+def test_reads_are_cached_until_the_file_changes(tmp_path, mocker):
+    """Test that repeated reads hit the cache and a write or an external change invalidates them."""
+    cache = ToolCache(pure_commands=())
+    read = mocker.Mock(side_effect=_read_file_impl, __name__="_read_file_impl")
+    read_file, write_file = cache.wrap(read), cache.wrap(_write_file_impl)
+    path = str(tmp_path / "knowledge.md")
+    write_file(path, "v1")
+
+    assert read_file(path) == "v1" and read_file(path=path) == "v1"
+    assert read.call_count == 1
+    write_file(path, "v2")
+    assert read_file(path) == "v2"
+    with open(path, "a") as f:
+        f.write(" edited")
+    assert read_file(path) == "v2 edited"
+    assert read.call_count == 3
+    assert cache.stats()["read"] == {"hits": 1, "misses": 3}
+
+def test_compile_checks_are_keyed_by_content(tmp_path, monkeypatch, mocker):
+    """Test that py_compile runs are reused for unchanged content and rerun after an edit."""
+    monkeypatch.chdir(tmp_path)
+    cache = ToolCache(pure_commands=())
+    execute = mocker.Mock(side_effect=_execute_command_impl, __name__="_execute_command_impl")
+    execute_command, write_file = cache.wrap(execute), cache.wrap(_write_file_impl)
+    write_file("temp_code.py", "print(1)\n")
+
+    first = execute_command("python -m py_compile temp_code.py")
+    assert execute_command("python -m py_compile temp_code.py") == first and "RC: 0" in first
+    write_file("temp_code.py", "print(1\n")
+    assert "RC: 1" in execute_command("python -m py_compile temp_code.py")
+    assert execute.call_count == 2
+
+def test_pure_commands_are_dropped_after_writes_and_other_commands(tmp_path, mocker):
+    """Test that declared-pure commands are cached until a write or an uncached command runs."""
+    cache = ToolCache(pure_commands=["echo"])
+    execute = mocker.Mock(return_value="out", __name__="_execute_command_impl")
+    execute_command, write_file = cache.wrap(execute), cache.wrap(_write_file_impl)
+
+    execute_command("echo hi"); execute_command("echo hi")
+    assert execute.call_count == 1
+    write_file(os.path.join(tmp_path, "f.txt"), "x")
+    execute_command("echo hi")
+    execute_command("touch f"); execute_command("touch f")
+    execute_command("echo hi")
+    assert execute.call_count == 5
+    assert ToolCache(enabled=False).wrap(execute)("echo hi") == "out"
+
+def test_code_execution_drops_cached_reads_and_commands(tmp_path, mocker):
+    """Test that running code through the code tool invalidates cached reads and pure commands."""
+    cache = ToolCache(pure_commands=["echo"])
+    read = mocker.Mock(return_value="v1", __name__="_read_file_impl")
+    execute = mocker.Mock(return_value="out", __name__="_execute_command_impl")
+    run_code = mocker.Mock(return_value="Exit Code: 0", __name__="_unsafe_execute_code_impl")
+    read_file, execute_command, execute_code = cache.wrap(read), cache.wrap(execute), cache.wrap(run_code)
+    path = tmp_path / "f.txt"
+    path.write_text("v1")
+
+    read_file(str(path)); execute_command("echo hi")
+    assert execute_code("open('f.txt', 'w').write('v2')", tool_context=None) == "Exit Code: 0"
+    read_file(str(path)); execute_command("echo hi")
+
+    assert read.call_count == 2 and execute.call_count == 2
+    run_code.assert_called_once_with("open('f.txt', 'w').write('v2')", tool_context=None)
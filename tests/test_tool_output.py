@@ -0,0 +1,61 @@
+import asyncio
+import inspect
+
+from tool_output import ToolOutputLimiter, dedupe_lines, parse_budgets, truncate_middle
+
+def test_dedupe_collapses_only_long_runs():
+    """Test that runs of identical lines at or above the threshold collapse to one line and a count."""
+    text = "start\n" + "ok\n" * 5 + "a\na\nend"
+
+    assert dedupe_lines(text, min_run=3) == "start\nok\n[... previous line repeated 4 more times ...]\na\na\nend"
+
+def test_truncate_middle_keeps_head_and_tail_lines():
+    """Test that truncation keeps whole lines from both ends within the budget and reports what was elided."""
+    text = "\n".join(f"line {i:04d}" for i in range(1000))
+
+    result = truncate_middle(text, max_bytes=200, head_fraction=0.5)
+
+    assert result.startswith("line 0000\n") and result.endswith("line 0999")
+    assert "bytes (" in result and "lines) elided ...]" in result
+    assert len(result.encode()) < 300
+    assert truncate_middle("short", max_bytes=200) == "short"
+
+def test_limiter_budgets_verbatim_tools_and_spill(tmp_path):
+    """Test that per-tool budgets apply, verbatim tools keep repeated lines and the full output is spilled."""
+    limiter = ToolOutputLimiter(max_bytes=200, budgets=parse_budgets("_read_file_impl=10000"), dedupe_min_run=3,
+                                spill_dir=str(tmp_path))
+    repeated = "same line\n" * 50
+
+    assert limiter.process("_read_file_impl", repeated) == repeated
+    command_output = limiter.process("_execute_command_impl", repeated + "x" * 500)
+    assert "repeated 49 more times" in command_output and "elided" in command_output
+    spilled = list(tmp_path.iterdir())
+    assert len(spilled) == 1 and spilled[0].read_text() == repeated + "x" * 500
+    assert str(spilled[0]) in command_output
+
+def test_verbatim_tool_over_budget_returns_an_error_not_a_partial_file():
+    """Test that a file read over its budget is refused whole rather than returned with its middle elided."""
+    limiter = ToolOutputLimiter(max_bytes=200, budgets={"_read_file_impl": 100}, dedupe_min_run=3)
+    content = "\n".join(f"line {i:04d}" for i in range(100))
+
+    result = limiter.process("_read_file_impl", content)
+
+    assert result.startswith("Error: file too large") and "in ranges" in result
+    assert "line 0000" not in result and "elided" not in result
+    assert limiter.process("_read_file_impl", content[:90]) == content[:90]
+
+def test_wrap_preserves_sync_and_async_tools():
+    """Test that wrapped tools keep their name and signature and only string results are processed."""
+    limiter = ToolOutputLimiter(max_bytes=20, budgets={}, dedupe_min_run=0)
+
+    def _echo_tool(text: str) -> str:
+        return text
+
+    async def _grid_tool(size: int) -> dict:
+        return {"size": size}
+
+    echo, grid = limiter.wrap(_echo_tool), limiter.wrap(_grid_tool)
+
+    assert echo.__name__ == "_echo_tool" and list(inspect.signature(echo).parameters) == ["text"]
+    assert "elided" in echo("y\n" * 100)
+    assert asyncio.run(grid(3)) == {"size": 3}
@@ -2,7 +2,7 @@ import pytest
 import os
 from pathlib import Path
 from unittest.mock import MagicMock
-from system_agents import (
+from agent_tools import (
     _read_file_impl,
     _write_file_impl,
     _execute_command_impl,
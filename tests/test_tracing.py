@@ -0,0 +1,74 @@
+import asyncio
+import json
+import pytest
+from tracing import Tracer, export_chrome_trace, read_spans, summarize_spans
+
+def test_spans_nest_across_sync_async_and_generators(tmp_path):
+    """Test that spans record their parent across functions, coroutines and async generators."""
+    tracer = Tracer(path=str(tmp_path / "spans.json"))
+
+    @tracer.traced(category="tool")
+    def tool():
+        return "ok"
+
+    @tracer.traced(category="llm")
+    async def llm_call():
+        return tool()
+
+    @tracer.traced(name="Agent", category="agent")
+    async def agent():
+        yield await llm_call()
+        yield tool()
+
+    async def run():
+        return [item async for item in agent()]
+
+    with tracer.span("cycle", category="orchestrator", loop=1):
+        assert asyncio.run(run()) == ["ok", "ok"]
+    tracer.close()
+
+    events = {event["args"]["span_id"]: event for event in read_spans(str(tmp_path / "spans.json"))}
+    by_name = {}
+    for event in events.values():
+        by_name.setdefault(event["name"], []).append(event)
+    cycle, agent_span, llm_span = by_name["cycle"][0], by_name["Agent"][0], by_name[llm_call.__qualname__][0]
+
+    assert cycle["args"]["parent_id"] is None and cycle["args"]["loop"] == 1
+    assert agent_span["args"]["parent_id"] == cycle["args"]["span_id"]
+    assert llm_span["args"]["parent_id"] == agent_span["args"]["span_id"]
+    assert sorted(events[t["args"]["parent_id"]]["name"] for t in by_name[tool.__qualname__]) == ["Agent", llm_call.__qualname__]
+    assert all(e["ph"] == "X" and e["dur"] >= 0 for e in events.values())
+    assert agent_span["ts"] >= cycle["ts"] and agent_span["dur"] <= cycle["dur"]
+
+def test_failed_span_records_error_and_restores_parent(tmp_path):
+    """Test that an exception is recorded on its span and the parent becomes current again."""
+    tracer = Tracer(path=str(tmp_path / "spans.json"))
+    with tracer.span("outer"):
+        with pytest.raises(ValueError):
+            with tracer.span("inner"):
+                raise ValueError("bad")
+        with tracer.span("after"):
+            pass
+    tracer.close()
+
+    events = {e["name"]: e for e in read_spans(str(tmp_path / "spans.json"))}
+
+    assert events["inner"]["args"]["error"] == "ValueError: bad"
+    assert events["after"]["args"]["parent_id"] == events["outer"]["args"]["span_id"]
+
+def test_summary_and_strict_export(tmp_path):
+    """Test self-time accounting and export to a strict JSON trace; a disabled tracer writes nothing."""
+    path = tmp_path / "spans.json"
+    path.write_text("[\n"
+                    '{"name": "cycle", "ph": "X", "ts": 0, "dur": 3000000, "args": {"span_id": "1.1", "parent_id": null}},\n'
+                    '{"name": "llm", "ph": "X", "ts": 0, "dur": 2000000, "args": {"span_id": "1.2", "parent_id": "1.1"}},\n')
+
+    summary = summarize_spans(read_spans(str(path)))
+    count = export_chrome_trace(str(path), str(tmp_path / "trace.json"))
+
+    assert summary["cycle"]["total_s"] == pytest.approx(3.0)
+    assert summary["cycle"]["self_s"] == pytest.approx(1.0)
+    assert count == 2
+    assert len(json.loads((tmp_path / "trace.json").read_text())["traceEvents"]) == 2
+    with Tracer(path="").span("ignored") as span:
+        span.set(x=1)
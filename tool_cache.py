@@ -0,0 +1,167 @@
+import functools
+import hashlib
+import logging
+import os
+import re
+import shlex
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+from metrics import TOOL_CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+TOOL_CACHE_ENABLED = os.getenv("TOOL_CACHE_ENABLED", "true").lower() == "true"
+TOOL_CACHE_MAX_ENTRIES = int(os.getenv("TOOL_CACHE_MAX_ENTRIES", 256))
+# Command prefixes whose output only depends on the command line and the files on disk, e.g. "git log,ls".
+# Their results are dropped on any file write or uncached command.
+TOOL_CACHE_PURE_COMMANDS = os.getenv("TOOL_CACHE_PURE_COMMANDS", "")
+
+_COMPILE_COMMAND = re.compile(r"^\s*python3?\s+-m\s+py_compile\s+(?P<files>.+?)\s*$")
+
+
+def _file_digest(path: str) -> Optional[str]:
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+class ToolCache:
+    """Memoizes idempotent tool calls within a child.
+
+    File reads are keyed by path, mtime and size; `python -m py_compile` runs by the content hash
+    of the compiled files; commands matching a declared pure prefix by the command line. Writes
+    through `_write_file_impl` invalidate the file's read entry and all command entries; code run
+    through `_unsafe_execute_code_impl` may write anything, so it invalidates all reads and commands.
+    Concurrent sessions call the tools from a thread pool, so the entries are guarded by a lock;
+    the tools themselves run outside it.
+    """
+
+    def __init__(self, max_entries: int = TOOL_CACHE_MAX_ENTRIES, pure_commands: Sequence[str] = (), enabled: bool = TOOL_CACHE_ENABLED):
+        self.max_entries = max_entries
+        self.pure_commands = tuple(prefix.strip() for prefix in pure_commands if prefix.strip())
+        self.enabled = enabled
+        self._entries: "OrderedDict[Tuple, str]" = OrderedDict()
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, kind: str, key: Tuple) -> Optional[str]:
+        with self._lock:
+            value = self._entries.get(key)
+            counts = self.misses if value is None else self.hits
+            counts[kind] = counts.get(kind, 0) + 1
+            if value is not None:
+                self._entries.move_to_end(key)
+        TOOL_CACHE_REQUESTS.inc(kind=kind, result="miss" if value is None else "hit")
+        return value
+
+    def _put(self, key: Tuple, value: str) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _invalidate(self, matches: Callable[[Tuple], bool]) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if matches(key)]:
+                del self._entries[key]
+
+    def invalidate_path(self, path: str) -> None:
+        path = os.path.abspath(path)
+        self._invalidate(lambda key: key[0] == "read" and key[1] == path)
+
+    def invalidate_reads(self) -> None:
+        self._invalidate(lambda key: key[0] == "read")
+
+    def invalidate_commands(self) -> None:
+        self._invalidate(lambda key: key[0] == "command")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {kind: {"hits": self.hits.get(kind, 0), "misses": self.misses.get(kind, 0)}
+                    for kind in sorted(set(self.hits) | set(self.misses))}
+
+    def read_file(self, read: Callable[[str], str], path: str) -> str:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return read(path) # Let the tool report the error; errors are not cached.
+        key = ("read", os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+        cached = self._get("read", key)
+        if cached is not None:
+            return cached
+        self.invalidate_path(path) # Older versions of the file.
+        content = read(path)
+        self._put(key, content)
+        return content
+
+    def write_file(self, write: Callable[[str, str], str], path: str, content: str) -> str:
+        try:
+            return write(path, content)
+        finally:
+            self.invalidate_path(path)
+            self.invalidate_commands()
+
+    def execute_code(self, execute: Callable[..., str], *args, **kwargs) -> str:
+        try:
+            return execute(*args, **kwargs)
+        finally:
+            self.invalidate_reads()
+            self.invalidate_commands()
+
+    def _command_key(self, command: str) -> Optional[Tuple[str, Tuple]]:
+        match = _COMPILE_COMMAND.match(command)
+        if match:
+            try:
+                files = shlex.split(match.group("files"))
+            except ValueError:
+                return None
+            digests = tuple(_file_digest(path) for path in files)
+            if None in digests:
+                return None
+            return "compile", ("compile", command.strip(), digests)
+        if any(command.strip() == prefix or command.strip().startswith(prefix + " ") for prefix in self.pure_commands):
+            return "command", ("command", command.strip(), os.getcwd())
+        return None
+
+    def execute_command(self, execute: Callable[[str], str], command: str) -> str:
+        kind_key = self._command_key(command)
+        if kind_key is None:
+            # The command may have changed files or state the pure commands observe.
+            self.invalidate_commands()
+            return execute(command)
+        kind, key = kind_key
+        cached = self._get(kind, key)
+        if cached is not None:
+            return cached
+        output = execute(command)
+        self._put(key, output)
+        return output
+
+    def wrap(self, func: Callable) -> Callable:
+        """Routes `_read_file_impl`, `_write_file_impl`, `_execute_command_impl` or `_unsafe_execute_code_impl`
+        through the cache, keeping the tool's name and signature; other functions are returned unchanged."""
+        handlers = {"_read_file_impl": self.read_file, "_write_file_impl": self.write_file, "_execute_command_impl": self.execute_command,
+                    "_unsafe_execute_code_impl": self.execute_code}
+        handler = handlers.get(func.__name__)
+        if handler is None:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return func(*args, **kwargs)
+            return handler(func, *args, **kwargs)
+        return wrapper
+
+
+TOOL_CACHE = ToolCache(pure_commands=TOOL_CACHE_PURE_COMMANDS.split(","))
@@ -0,0 +1,140 @@
+import functools
+import inspect
+import itertools
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional
+
+from metrics import TOOL_OUTPUT_BYTES
+
+logger = logging.getLogger(__name__)
+
+# Tool results go back to the model verbatim and stay in the session for every later turn,
+# so they are cut to a byte budget before they reach it.
+TOOL_OUTPUT_MAX_BYTES = int(os.getenv("TOOL_OUTPUT_MAX_BYTES", 16384)) # Default budget per tool result; 0 disables
+TOOL_OUTPUT_BUDGETS = os.getenv("TOOL_OUTPUT_BUDGETS", "_read_file_impl=131072") # Per-tool budgets, e.g. "_execute_command_impl=8192"
+TOOL_OUTPUT_HEAD_FRACTION = float(os.getenv("TOOL_OUTPUT_HEAD_FRACTION", 0.4)) # Share of the budget kept from the start; the rest from the end
+TOOL_OUTPUT_DEDUPE_MIN_RUN = int(os.getenv("TOOL_OUTPUT_DEDUPE_MIN_RUN", 3)) # Collapse runs of this many identical lines; 0 disables
+TOOL_OUTPUT_SPILL_DIR = os.getenv("TOOL_OUTPUT_SPILL_DIR", "") # Save the full output of truncated results here; empty disables
+
+# Tools whose output must reach the model unchanged or not at all: the executor rewrites files
+# from what it read, so a deduplicated or elided copy would corrupt them. Over budget, they
+# return an error asking for the file in ranges instead.
+VERBATIM_TOOLS = frozenset({"_read_file_impl"})
+
+
+def parse_budgets(spec: str) -> Dict[str, int]:
+    """Parses "tool=bytes,tool=bytes" into a dict."""
+    budgets = {}
+    for item in spec.split(","):
+        if item.strip():
+            name, _, value = item.partition("=")
+            budgets[name.strip()] = int(value)
+    return budgets
+
+
+def dedupe_lines(text: str, min_run: int = TOOL_OUTPUT_DEDUPE_MIN_RUN) -> str:
+    """Collapses runs of at least `min_run` identical consecutive lines into one line and a count."""
+    if min_run <= 1:
+        return text
+    lines = []
+    for line, group in itertools.groupby(text.split("\n")):
+        count = sum(1 for _ in group)
+        if count >= min_run:
+            lines += [line, f"[... previous line repeated {count - 1} more times ...]"]
+        else:
+            lines += [line] * count
+    return "\n".join(lines)
+
+
+def truncate_middle(text: str, max_bytes: int, head_fraction: float = TOOL_OUTPUT_HEAD_FRACTION) -> str:
+    """Keeps the start and end of `text` within `max_bytes` (UTF-8), cut at line breaks where possible."""
+    data = text.encode("utf-8")
+    if max_bytes <= 0 or len(data) <= max_bytes:
+        return text
+    head_bytes = int(max_bytes * head_fraction)
+    head, tail = data[:head_bytes], data[len(data) - (max_bytes - head_bytes):]
+    # Prefer whole lines, unless that would throw away most of the kept part.
+    if head.rfind(b"\n") > len(head) // 2:
+        head = head[:head.rfind(b"\n") + 1]
+    if 0 <= tail.find(b"\n") < len(tail) // 2:
+        tail = tail[tail.find(b"\n") + 1:]
+    elided = data[len(head):len(data) - len(tail)]
+    elided_lines = elided.count(b"\n")
+    marker = f"\n[... {len(elided)} bytes ({elided_lines} lines) elided ...]\n"
+    return head.decode("utf-8", "ignore") + marker + tail.decode("utf-8", "ignore")
+
+
+class ToolOutputLimiter:
+    """Post-processes string tool results: deduplicates repeated lines, truncates to a per-tool budget
+    (keeping head and tail) and optionally saves the full output to a file the model can grep."""
+
+    def __init__(self, max_bytes: int = TOOL_OUTPUT_MAX_BYTES, budgets: Optional[Dict[str, int]] = None,
+                 head_fraction: float = TOOL_OUTPUT_HEAD_FRACTION, dedupe_min_run: int = TOOL_OUTPUT_DEDUPE_MIN_RUN,
+                 spill_dir: str = TOOL_OUTPUT_SPILL_DIR, verbatim_tools: Iterable[str] = VERBATIM_TOOLS):
+        self.max_bytes = max_bytes
+        self.budgets = parse_budgets(TOOL_OUTPUT_BUDGETS) if budgets is None else budgets
+        self.head_fraction = head_fraction
+        self.dedupe_min_run = dedupe_min_run
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        self.verbatim_tools = frozenset(verbatim_tools)
+
+    def budget(self, tool_name: str) -> int:
+        return self.budgets.get(tool_name, self.max_bytes)
+
+    def process(self, tool_name: str, output: str) -> str:
+        raw_bytes = len(output.encode("utf-8"))
+        result = output
+        if tool_name not in self.verbatim_tools:
+            result = dedupe_lines(result, self.dedupe_min_run)
+        budget = self.budget(tool_name)
+        if budget > 0 and raw_bytes > budget and tool_name in self.verbatim_tools:
+            result = (f"Error: file too large to return whole ({raw_bytes} bytes, {tool_name} budget {budget} bytes). "
+                      f"Nothing was returned, so do not rewrite the file from this result. Read it in ranges with "
+                      f"_execute_command_impl, e.g. sed -n '1,400p' <path>, or find lines with grep -n.")
+        elif budget > 0 and len(result.encode("utf-8")) > budget:
+            result = truncate_middle(result, budget, self.head_fraction)
+            spill_path = self._spill(tool_name, output)
+            if spill_path:
+                result += (f"\n[Full output ({raw_bytes} bytes) saved to {spill_path}; "
+                           f"inspect parts of it with _execute_command_impl, e.g. grep -n or sed -n.]")
+        returned_bytes = len(result.encode("utf-8"))
+        TOOL_OUTPUT_BYTES.inc(raw_bytes, tool=tool_name, stage="raw")
+        TOOL_OUTPUT_BYTES.inc(returned_bytes, tool=tool_name, stage="returned")
+        if returned_bytes < raw_bytes:
+            logger.debug("Tool %s output cut from %s to %s bytes.", tool_name, raw_bytes, returned_bytes)
+        return result
+
+    def _spill(self, tool_name: str, output: str) -> Optional[str]:
+        if self.spill_dir is None:
+            return None
+        try:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            path = self.spill_dir / f"{tool_name.strip('_')}-{time.time_ns()}.txt"
+            path.write_text(output, encoding="utf-8")
+            return str(path)
+        except OSError as e:
+            logger.warning("Could not save the full %s output to %s: %s", tool_name, self.spill_dir, e)
+            return None
+
+    def wrap(self, func: Callable) -> Callable:
+        """Wraps a sync or async tool; non-string results pass through. Keeps the signature for ADK."""
+        tool_name = func.__name__
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                result = await func(*args, **kwargs)
+                return self.process(tool_name, result) if isinstance(result, str) else result
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            result = func(*args, **kwargs)
+            return self.process(tool_name, result) if isinstance(result, str) else result
+        return wrapper
+
+
+LIMITER = ToolOutputLimiter()
+limit_output = LIMITER.wrap
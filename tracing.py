@@ -0,0 +1,201 @@
+import argparse
+import contextvars
+import functools
+import inspect
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Chrome trace (JSON array) file shared by the orchestrator and its children. Empty disables tracing.
+SPAN_TRACE_PATH = os.getenv("SPAN_TRACE_PATH", "")
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """A timed operation; spans started while it is current become its children."""
+
+    __slots__ = ("name", "category", "span_id", "parent", "attributes", "start_us", "_start_ns", "_token")
+
+    def __init__(self, name: str, category: str, span_id: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.category = category
+        self.span_id = span_id
+        self.parent = parent
+        self.attributes = attributes
+        self.start_us = time.time_ns() // 1000
+        self._start_ns = time.perf_counter_ns()
+        self._token: Optional[contextvars.Token] = None
+
+    @property
+    def parent_id(self) -> Optional[str]:
+        return self.parent.span_id if self.parent else None
+
+    def set(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+
+class Tracer:
+    """Records spans as Chrome trace "complete" events, loadable in chrome://tracing or Perfetto.
+
+    Each finished span is appended as one line, so several processes can share the file and
+    a crash loses at most the spans still open. The JSON array is left unterminated, which
+    both viewers accept; `export_chrome_trace` writes a strict JSON copy.
+    """
+
+    def __init__(self, path: str = SPAN_TRACE_PATH):
+        self.path = Path(path) if path else None
+        self._lock = threading.Lock()
+        self._file = None
+        self._pid: Optional[int] = None
+        self._ids = itertools.count(1)
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def start_span(self, name: str, category: str = "function", **attributes) -> Span:
+        """Starts a span under the current one and makes it current; pair with `end_span`."""
+        parent = _current_span.get()
+        span = Span(name, category, f"{os.getpid()}.{next(self._ids)}", parent, attributes)
+        span._token = _current_span.set(span)
+        return span
+
+    def end_span(self, span: Span) -> None:
+        duration_ns = time.perf_counter_ns() - span._start_ns
+        try:
+            _current_span.reset(span._token)
+        except ValueError:
+            # Ended from another context, e.g. an async generator closed by a different task.
+            if _current_span.get() is span:
+                _current_span.set(span.parent)
+        if self.path is None:
+            return
+        event = {
+            "name": span.name,
+            "cat": span.category,
+            "ph": "X",
+            "ts": span.start_us,
+            "dur": duration_ns / 1000,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": {"span_id": span.span_id, "parent_id": span.parent_id, **span.attributes},
+        }
+        self._write(json.dumps(event, default=str))
+
+    @contextmanager
+    def span(self, name: str, category: str = "function", **attributes) -> Iterator[Span]:
+        span = self.start_span(name, category, **attributes)
+        try:
+            yield span
+        except Exception as e:
+            span.set(error=f"{type(e).__name__}: {e}"[:200])
+            raise
+        finally:
+            self.end_span(span)
+
+    def traced(self, name: Optional[str] = None, category: str = "function") -> Callable[[Callable], Callable]:
+        """Decorates a function, coroutine function or async generator function to run in a span."""
+        def decorator(func: Callable) -> Callable:
+            span_name = name or func.__qualname__
+            if inspect.isasyncgenfunction(func):
+                @functools.wraps(func)
+                async def async_gen_wrapper(*args, **kwargs):
+                    with self.span(span_name, category):
+                        async for item in func(*args, **kwargs):
+                            yield item
+                return async_gen_wrapper
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with self.span(span_name, category):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name, category):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _write(self, line: str) -> None:
+        with self._lock:
+            try:
+                if self._file is None or self._pid != os.getpid():
+                    # A forked child must not share the parent's buffered file object.
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    self._file = open(self.path, "a", encoding="utf-8")
+                    self._pid = os.getpid()
+                    if self._file.tell() == 0:
+                        self._file.write("[\n")
+                self._file.write(line + ",\n")
+                self._file.flush()
+            except OSError as e:
+                logger.warning("Could not write span to %s: %s", self.path, e)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None and self._pid == os.getpid():
+                self._file.close()
+            self._file = None
+
+
+TRACER = Tracer()
+span = TRACER.span
+traced = TRACER.traced
+
+
+def read_spans(path: str) -> List[Dict[str, Any]]:
+    """Reads the events of a span trace file written by `Tracer`."""
+    events = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip().rstrip(",")
+            if line and line not in ("[", "]"):
+                events.append(json.loads(line))
+    return events
+
+
+def export_chrome_trace(path: str, output_path: str) -> int:
+    """Writes the spans as a strict JSON trace object; returns the number of events."""
+    events = read_spans(path)
+    Path(output_path).write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}), encoding="utf-8")
+    return len(events)
+
+
+def summarize_spans(events: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    """Total and self time (excluding child spans) per span name, in seconds."""
+    children_us: Dict[str, float] = {}
+    for event in events:
+        parent_id = event.get("args", {}).get("parent_id")
+        if parent_id:
+            children_us[parent_id] = children_us.get(parent_id, 0.0) + event["dur"]
+    summary: Dict[str, Dict[str, float]] = {}
+    for event in events:
+        stats = summary.setdefault(event["name"], {"count": 0, "total_s": 0.0, "self_s": 0.0})
+        stats["count"] += 1
+        stats["total_s"] += event["dur"] / 1e6
+        stats["self_s"] += max(0.0, event["dur"] - children_us.get(event["args"].get("span_id"), 0.0)) / 1e6
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize or export a span trace.")
+    parser.add_argument("path", nargs="?", default=SPAN_TRACE_PATH or "traces/spans.json", help="Span trace file.")
+    parser.add_argument("--export", metavar="OUTPUT", help="Write a strict JSON Chrome trace to OUTPUT.")
+    args = parser.parse_args()
+    if args.export:
+        print(f"Wrote {export_chrome_trace(args.path, args.export)} events to {args.export}")
+    else:
+        print(f"{'name':<48}{'count':>8}{'total_s':>12}{'self_s':>12}")
+        for span_name, stats in sorted(summarize_spans(read_spans(args.path)).items(), key=lambda item: item[1]["self_s"], reverse=True):
+            print(f"{span_name:<48}{stats['count']:>8}{stats['total_s']:>12.3f}{stats['self_s']:>12.3f}")